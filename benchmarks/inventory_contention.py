@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Benchmark de contención del inventario.
+
+Varios procesos, cada uno con varios threads, descuentan unidades de un
+mismo producto ("hot SKU") a la vez. Al final verifica que no se vendió más
+de lo que había (ventas * cantidad == inicial - final, final >= 0) y reporta
+el throughput.
+
+Uso (desde la raíz del repo, con la base de datos de DATABASE_URL):
+
+    python benchmarks/inventory_contention.py --processes 4 --threads 8 \\
+        --orders 500 --initial 10000 --quantity 1
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from sqlalchemy import delete, func, select  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from database import engine  # noqa: E402
+from models_db import Base, InventoryStock, Location, Product  # noqa: E402
+from services.inventory_service import STOCK_SLOTS, take_stock  # noqa: E402
+
+LOCATION = "BENCH"
+
+
+def _worker(product_id: str, threads: int, orders: int, quantity: int, results):
+    """Un proceso: `threads` threads que intentan `orders` ventas cada uno."""
+    engine.dispose()  # conexiones propias, no las heredadas del padre
+    product_uuid = uuid.UUID(product_id)
+    counts = {"sold": 0, "rejected": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def run():
+        sold = rejected = errors = 0
+        for _ in range(orders):
+            try:
+                with Session(engine) as session:
+                    if take_stock(session, product_uuid, LOCATION, quantity):
+                        session.commit()
+                        sold += 1
+                    else:
+                        session.rollback()
+                        rejected += 1
+            except Exception:  # p. ej. timeouts de bloqueo en SQLite
+                errors += 1
+        with lock:
+            counts["sold"] += sold
+            counts["rejected"] += rejected
+            counts["errors"] += errors
+
+    pool = [threading.Thread(target=run) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    results.put(counts)
+
+
+def _setup(initial: int) -> uuid.UUID:
+    Base.metadata.create_all(engine)
+    product_id = uuid.uuid4()
+    share, extra = divmod(initial, STOCK_SLOTS)
+    with Session(engine) as session:
+        session.merge(Location(code=LOCATION, name="Benchmark", kind="warehouse"))
+        session.add(
+            Product(
+                id=product_id,
+                name=f"Benchmark {product_id.hex[:8]}",
+                description="Producto temporal del benchmark de inventario",
+            )
+        )
+        session.flush()
+        session.add_all(
+            InventoryStock(
+                product_id=product_id,
+                location=LOCATION,
+                slot=slot,
+                quantity=share + (slot < extra),
+            )
+            for slot in range(STOCK_SLOTS)
+        )
+        session.commit()
+    return product_id
+
+
+def _remaining(product_id: uuid.UUID) -> int:
+    with Session(engine) as session:
+        return session.execute(
+            select(func.coalesce(func.sum(InventoryStock.quantity), 0)).where(
+                InventoryStock.product_id == product_id
+            )
+        ).scalar_one()
+
+
+def _cleanup(product_id: uuid.UUID) -> None:
+    with Session(engine) as session:
+        session.execute(
+            delete(InventoryStock).where(InventoryStock.product_id == product_id)
+        )
+        session.execute(delete(Product).where(Product.id == product_id))
+        session.commit()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=8, help="threads por proceso")
+    parser.add_argument("--orders", type=int, default=200, help="ventas por thread")
+    parser.add_argument("--quantity", type=int, default=1, help="unidades por venta")
+    parser.add_argument(
+        "--initial",
+        type=int,
+        default=None,
+        help="stock inicial (por defecto, la mitad de lo pedido: fuerza rechazos)",
+    )
+    args = parser.parse_args()
+
+    attempts = args.processes * args.threads * args.orders
+    initial = args.initial
+    if initial is None:
+        initial = attempts * args.quantity // 2
+
+    product_id = _setup(initial)
+    engine.dispose()
+    try:
+        results = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(
+                target=_worker,
+                args=(str(product_id), args.threads, args.orders, args.quantity, results),
+            )
+            for _ in range(args.processes)
+        ]
+        started = time.perf_counter()
+        for process in processes:
+            process.start()
+        totals = {"sold": 0, "rejected": 0, "errors": 0}
+        for _ in processes:
+            for key, value in results.get().items():
+                totals[key] += value
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - started
+
+        final = _remaining(product_id)
+    finally:
+        _cleanup(product_id)
+
+    sold_units = totals["sold"] * args.quantity
+    consistent = final >= 0 and sold_units == initial - final
+    print(f"database:   {engine.url.get_backend_name()}")
+    print(f"workers:    {args.processes} processes x {args.threads} threads")
+    print(f"slots:      {STOCK_SLOTS}")
+    print(f"stock:      {initial} -> {final}")
+    print(
+        f"orders:     {attempts} attempted, {totals['sold']} sold, "
+        f"{totals['rejected']} rejected, {totals['errors']} errors"
+    )
+    print(f"elapsed:    {elapsed:.2f}s")
+    print(f"throughput: {attempts / elapsed:.0f} orders/s")
+    print(f"oversold:   {'no' if consistent else 'YES'}")
+    return 0 if consistent else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
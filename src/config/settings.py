@@ -1,4 +1,5 @@
 import os
+import tempfile
 from typing import List
 
 from dotenv import load_dotenv
@@ -58,6 +59,93 @@ class Settings:
     ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
     SECRET_KEY: str = os.getenv("SECRET_KEY", "change-this-secret-key")
 
+    # ====================================
+    # CACHÉ DE RESULTADOS DEL CATÁLOGO
+    # ====================================
+    CACHE_ENABLED: bool = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+    CACHE_MAX_ENTRIES: int = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+    CACHE_TTL_SECONDS: float = float(os.getenv("CACHE_TTL_SECONDS", "60"))
+    CACHE_NEGATIVE_TTL_SECONDS: float = float(
+        os.getenv("CACHE_NEGATIVE_TTL_SECONDS", "10")
+    )
+    # Archivo mmap con las versiones de los tags, compartido por los workers
+    CACHE_VERSIONS_FILE: str = os.getenv(
+        "CACHE_VERSIONS_FILE",
+        os.path.join(tempfile.gettempdir(), "mapo_cache_versions"),
+    )
+
+    # ====================================
+    # INVENTARIO
+    # ====================================
+    # Filas por (producto, ubicación) entre las que se reparte el stock, para
+    # que los descuentos concurrentes de un mismo producto no se serialicen
+    INVENTORY_STOCK_SLOTS: int = int(os.getenv("INVENTORY_STOCK_SLOTS", "4"))
+    INVENTORY_DEFAULT_LOCATION: str = os.getenv("INVENTORY_DEFAULT_LOCATION", "MAIN")
+    # Movimientos (por worker) entre checkpoints de saldo de un producto, y
+    # antigüedad mínima de los movimientos que cubre un checkpoint (margen
+    # para transacciones que aún no confirmaron)
+    STOCK_CHECKPOINT_INTERVAL: int = int(os.getenv("STOCK_CHECKPOINT_INTERVAL", "500"))
+    STOCK_CHECKPOINT_DELAY_SECONDS: int = int(
+        os.getenv("STOCK_CHECKPOINT_DELAY_SECONDS", "60")
+    )
+    # Reservas de stock (carritos): duración por defecto y máxima, y cada
+    # cuánto cada worker carga de la base los vencimientos próximos
+    RESERVATION_DEFAULT_TTL_SECONDS: int = int(
+        os.getenv("RESERVATION_DEFAULT_TTL_SECONDS", "900")
+    )
+    RESERVATION_MAX_TTL_SECONDS: int = int(
+        os.getenv("RESERVATION_MAX_TTL_SECONDS", "3600")
+    )
+    RESERVATION_REFILL_SECONDS: int = int(os.getenv("RESERVATION_REFILL_SECONDS", "30"))
+
+    # ====================================
+    # MINIATURAS DE IMÁGENES
+    # ====================================
+    IMAGE_CACHE_DIR: str = os.getenv(
+        "IMAGE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "mapo_images")
+    )
+    IMAGE_CACHE_MAX_BYTES: int = int(
+        os.getenv("IMAGE_CACHE_MAX_BYTES", str(512 * 1024 * 1024))
+    )
+    IMAGE_FETCH_TIMEOUT_SECONDS: float = float(
+        os.getenv("IMAGE_FETCH_TIMEOUT_SECONDS", "5")
+    )
+    IMAGE_MAX_SOURCE_BYTES: int = int(
+        os.getenv("IMAGE_MAX_SOURCE_BYTES", str(10 * 1024 * 1024))
+    )
+    # Imágenes subidas (almacenamiento permanente, no usar un directorio temporal)
+    IMAGE_UPLOAD_DIR: str = os.getenv("IMAGE_UPLOAD_DIR", "media/images")
+    IMAGE_MAX_UPLOAD_BYTES: int = int(
+        os.getenv("IMAGE_MAX_UPLOAD_BYTES", str(10 * 1024 * 1024))
+    )
+    IMAGE_WORKERS: int = int(os.getenv("IMAGE_WORKERS", "2"))
+
+    # ====================================
+    # SNAPSHOT DEL CATÁLOGO
+    # ====================================
+    CATALOG_SNAPSHOT_ENABLED: bool = (
+        os.getenv("CATALOG_SNAPSHOT_ENABLED", "true").lower() == "true"
+    )
+    # Archivo mapeado en memoria por todos los workers del nodo
+    CATALOG_SNAPSHOT_FILE: str = os.getenv(
+        "CATALOG_SNAPSHOT_FILE",
+        os.path.join(tempfile.gettempdir(), "mapo_catalog_snapshot.bin"),
+    )
+
+    # ====================================
+    # MICRO-CACHÉ DE RUTAS PÚBLICAS
+    # ====================================
+    # Segundos que se reutiliza una respuesta pública (0 = desactivado)
+    MICRO_CACHE_TTL_SECONDS: float = float(os.getenv("MICRO_CACHE_TTL_SECONDS", "1"))
+    MICRO_CACHE_MAX_ENTRIES: int = int(os.getenv("MICRO_CACHE_MAX_ENTRIES", "1024"))
+
+    # ====================================
+    # COMPRESIÓN DE RESPUESTAS
+    # ====================================
+    COMPRESSION_MINIMUM_SIZE: int = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "500"))
+    # Cuerpos comprimidos guardados por (ETag, codificación)
+    COMPRESSION_CACHE_ENTRIES: int = int(os.getenv("COMPRESSION_CACHE_ENTRIES", "256"))
+
     # ====================================
     # CONFIGURACIÓN DE CORS
     # ====================================
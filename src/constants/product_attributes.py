@@ -0,0 +1,32 @@
+from enum import Enum
+
+
+class ProductAttributeEnum(str, Enum):
+    """Atributos tipados de producto por los que se puede filtrar."""
+
+    SPECIES = "species"
+    LIFE_STAGE = "life_stage"
+    BRAND = "brand"
+    WEIGHT = "weight"
+    MEDICATION_TYPE = "medication_type"
+
+
+# Valores permitidos por atributo (None = texto libre, normalizado)
+ATTRIBUTE_VALUES = {
+    ProductAttributeEnum.SPECIES: ("perro", "gato", "ave", "pez", "roedor", "reptil"),
+    ProductAttributeEnum.LIFE_STAGE: ("cachorro", "adulto", "senior", "todas"),
+    ProductAttributeEnum.BRAND: None,
+    ProductAttributeEnum.WEIGHT: None,
+    ProductAttributeEnum.MEDICATION_TYPE: (
+        "antiparasitario",
+        "antibiotico",
+        "antiinflamatorio",
+        "vacuna",
+        "vitamina",
+    ),
+}
+
+
+def normalize_attribute_value(value: str) -> str:
+    """Normaliza un valor de atributo para compararlo (minúsculas, sin espacios extra)."""
+    return " ".join(value.lower().split())
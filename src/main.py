@@ -14,7 +14,16 @@ from database import engine
 from models_db import Base
 
 # Routers
-from routers import client, inventory, product, user, category
+from routers import client, image, inventory, product, user, category
+from services.availability_service import ensure_product_availability
+from services.catalog_cache import CATALOG_TAG, PRODUCTS_TAG, tag_versions
+from services.catalog_version import ensure_catalog_versions
+from services.category_service import ensure_category_closure
+from services.location_service import ensure_default_location
+from services.reservation_service import start_reservation_expiry
+from services.scan_service import load_scan_index
+from utils.compression import CompressionMiddleware
+from utils.micro_cache import MicroCacheMiddleware
 from utils.logging_config import (
     log_error,
     log_request,
@@ -52,6 +61,17 @@ log_startup_info()
 # Crear las tablas de la base de datos (opcional en desarrollo)
 try:
     Base.metadata.create_all(engine)
+    # Las categorías previas a la jerarquía se registran como raíces
+    ensure_category_closure()
+    # Filas previas al feed de cambios: asignarles una versión
+    ensure_catalog_versions()
+    # Índice de códigos de barras / SKU para la lectura en caja
+    load_scan_index()
+    # Ubicación por defecto del inventario y disponibilidad agregada
+    ensure_default_location()
+    ensure_product_availability()
+    # Vencimiento de reservas de stock (también las pendientes de antes)
+    start_reservation_expiry()
     logger.info("Base de datos conectada y tablas creadas exitosamente")
 except Exception as db_error:
     logger.error(f"Error creando tablas de base de datos: {db_error}")
@@ -76,7 +96,27 @@ app = FastAPI(
     redoc_url="/redoc" if settings.DEBUG else None,
 )
 
-# CORS configuration usando variables de entorno
+
+# Rutas GET públicas cuya respuesta no depende del usuario
+PUBLIC_CACHEABLE_PATHS = (
+    r"/products/",
+    r"/products/(search|autocomplete|facets|changes)",
+    r"/products/[0-9a-fA-F-]{36}(/attributes)?",
+    r"/category/.*",
+)
+
+# Micro-caché con single-flight (queda por dentro de la compresión, así guarda
+# el cuerpo sin comprimir una sola vez)
+app.add_middleware(
+    MicroCacheMiddleware,
+    paths=PUBLIC_CACHEABLE_PATHS,
+    ttl=settings.MICRO_CACHE_TTL_SECONDS,
+    max_entries=settings.MICRO_CACHE_MAX_ENTRIES,
+    version_key=lambda: tag_versions.snapshot((CATALOG_TAG, PRODUCTS_TAG)),
+)
+
+# CORS configuration usando variables de entorno (por fuera de la
+# micro-caché: Access-Control-Allow-Origin depende del Origin de cada request)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.ALLOWED_ORIGINS,
@@ -85,6 +125,13 @@ app.add_middleware(
     allow_headers=["*"],  # Permitir headers como Authorization
 )
 
+# Compresión gzip/brotli de respuestas
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    cache_entries=settings.COMPRESSION_CACHE_ENTRIES,
+)
+
 
 # Middleware para logging de requests
 @app.middleware("http")
@@ -128,6 +175,7 @@ app.include_router(product.router, prefix="/products", tags=["products"])
 app.include_router(client.router, prefix="/clients", tags=["clients"])
 app.include_router(inventory.router, prefix="/inventory", tags=["inventory"])
 app.include_router(category.router, prefix="/category", tags=["category"])
+app.include_router(image.router, prefix="/images", tags=["images"])
 
 
 @app.get("/")
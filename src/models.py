@@ -1,4 +1,5 @@
 from typing import Optional
+from uuid import UUID
 
 from pydantic import BaseModel
 
@@ -40,12 +41,14 @@ class LoginSchema(BaseModel):
 class CategorySchema(BaseModel):
     name: str
     description: Optional[str] = None
+    parent_id: Optional[UUID] = None
 
     class Config:
         schema_extra = {
             "example": {
                 "name": "Alimentos",
-                "description": "Productos comestibles para mascotas"
+                "description": "Productos comestibles para mascotas",
+                "parent_id": None
             }
         }
 
@@ -60,4 +63,15 @@ class CategoryUpdateSchema(BaseModel):
                 "name": "Juguetes",
                 "description": "Artículos de entretenimiento para mascotas"
             }
-        }
\ No newline at end of file
+        }
+
+
+class CategoryMoveSchema(BaseModel):
+    parent_id: Optional[UUID] = None
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "parent_id": "0b8c1f4e-8d9a-4f3a-9c61-2f5b7d8e9a10"
+            }
+        }
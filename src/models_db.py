@@ -1,12 +1,25 @@
 import uuid
+from datetime import date, datetime
 from typing import Optional
 
 from sqlalchemy import (
+    DDL,
+    JSON,
+    BigInteger,
+    Boolean,
+    CheckConstraint,
+    Date,
+    DateTime,
     ForeignKeyConstraint,
+    Index,
+    Integer,
     PrimaryKeyConstraint,
     String,
     UniqueConstraint,
     Uuid,
+    event,
+    func,
+    literal_column,
     text,
 )
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
@@ -36,6 +49,33 @@ class Product(Base):
     __table_args__ = (
         PrimaryKeyConstraint("id", name="product_pk"),
         UniqueConstraint("name", name="product_pk_2"),
+        # Filtro por categoría ordenado por nombre
+        Index("product_category_id_name_idx", "category_id", "name"),
+        # Feed de cambios (version > since)
+        Index("product_version_idx", "version"),
+        # Lectura de códigos en caja (NULL permitido en varios productos)
+        Index("product_sku_idx", "sku", unique=True),
+        Index("product_barcode_idx", "barcode", unique=True),
+        # Mismo filtro restringido a productos con imagen (índice parcial)
+        Index(
+            "product_with_image_category_id_name_idx",
+            "category_id",
+            "name",
+            postgresql_where=text("image_url IS NOT NULL"),
+            sqlite_where=text("image_url IS NOT NULL"),
+        ),
+        # Búsqueda full-text y por similitud (solo PostgreSQL)
+        Index(
+            "product_search_vector_idx",
+            text("to_tsvector('spanish', name || ' ' || description)"),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "product_name_trgm_idx",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
     )
 
     id: Mapped[uuid.UUID] = mapped_column(
@@ -45,6 +85,58 @@ class Product(Base):
     description: Mapped[str] = mapped_column(String, nullable=False)
     category_id: Mapped[Optional[uuid.UUID]] = mapped_column(Uuid)
     image_url: Mapped[Optional[str]] = mapped_column(String)
+    sku: Mapped[Optional[str]] = mapped_column(String(64))
+    barcode: Mapped[Optional[str]] = mapped_column(String(64))
+    # Versión del catálogo de la última escritura (ver CatalogVersion)
+    version: Mapped[int] = mapped_column(
+        BigInteger, nullable=False, default=0, server_default=text("0")
+    )
+
+
+# Búsqueda por prefijo de nombre sin distinguir mayúsculas (LIKE 'abc%').
+# En PostgreSQL text_pattern_ops permite usar el índice con cualquier collation.
+Index(
+    "product_name_lower_idx",
+    func.lower(Product.name).label("name_lower"),
+    postgresql_ops={"name_lower": "text_pattern_ops"},
+)
+
+# Documento de búsqueda full-text (solo PostgreSQL). Debe coincidir con la
+# expresión del índice product_search_vector_idx para que éste se utilice.
+PRODUCT_SEARCH_CONFIG = literal_column("'spanish'")
+product_search_vector = func.to_tsvector(
+    PRODUCT_SEARCH_CONFIG, Product.name + " " + Product.description
+)
+
+
+class ProductAttribute(Base):
+    """
+    Atributo tipado de un producto (especie, etapa de vida, marca, peso,
+    tipo de medicamento). Un valor por atributo y producto.
+    """
+
+    __tablename__ = "product_attribute"
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["product_id"],
+            ["product.id"],
+            name="product_attribute_product_id_fk",
+            ondelete="CASCADE",
+        ),
+        PrimaryKeyConstraint("product_id", "attribute", name="product_attribute_pk"),
+        Index("product_attribute_attribute_value_idx", "attribute", "value"),
+    )
+
+    product_id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True)
+    attribute: Mapped[str] = mapped_column(String, primary_key=True)
+    value: Mapped[str] = mapped_column(String, nullable=False)
+
+
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
 
 
 class Role(Base):
@@ -87,6 +179,8 @@ class Category(Base):
     __table_args__ = (
         PrimaryKeyConstraint("id", name="category_pk"),
         UniqueConstraint("name", name="category_name_uk"),
+        Index("category_parent_id_idx", "parent_id"),
+        Index("category_version_idx", "version"),
     )
 
     id: Mapped[uuid.UUID] = mapped_column(
@@ -94,10 +188,344 @@ class Category(Base):
     )
     name: Mapped[str] = mapped_column(String, nullable=False)
     description: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    # Categoría padre (None = categoría raíz)
+    parent_id: Mapped[Optional[uuid.UUID]] = mapped_column(Uuid, nullable=True)
+    # Versión del catálogo de la última escritura (ver CatalogVersion)
+    version: Mapped[int] = mapped_column(
+        BigInteger, nullable=False, default=0, server_default=text("0")
+    )
 
     #conectar categorias con productos
     products: Mapped[list["Product"]] = relationship(
         "Product",
         backref="category",
         primaryjoin="Category.id == foreign(Product.category_id)",
-    )
\ No newline at end of file
+    )
+
+
+class CategoryClosure(Base):
+    """
+    Tabla de clausura de la jerarquía de categorías: una fila por cada par
+    (ancestro, descendiente), incluida la propia categoría con depth 0.
+    Subárboles y breadcrumbs se resuelven con un solo query indexado.
+    """
+
+    __tablename__ = "category_closure"
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["ancestor_id"],
+            ["category.id"],
+            name="category_closure_ancestor_id_fk",
+            ondelete="CASCADE",
+        ),
+        ForeignKeyConstraint(
+            ["descendant_id"],
+            ["category.id"],
+            name="category_closure_descendant_id_fk",
+            ondelete="CASCADE",
+        ),
+        PrimaryKeyConstraint(
+            "ancestor_id", "descendant_id", name="category_closure_pk"
+        ),
+        Index("category_closure_descendant_id_depth_idx", "descendant_id", "depth"),
+    )
+
+    ancestor_id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True)
+    descendant_id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True)
+    depth: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class CatalogVersion(Base):
+    """
+    Contador monotónico de versiones del catálogo (una fila por contador).
+    Cada escritura de productos o categorías lo incrementa dentro de su
+    transacción; el bloqueo de la fila hace que las versiones se confirmen en
+    orden, de modo que un cliente que ya vio la versión N no pierde cambios.
+    """
+
+    __tablename__ = "catalog_version"
+    __table_args__ = (PrimaryKeyConstraint("name", name="catalog_version_pk"),)
+
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+    value: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+
+class CatalogTombstone(Base):
+    """Registro de un producto o categoría eliminado, para el feed de cambios."""
+
+    __tablename__ = "catalog_tombstone"
+    __table_args__ = (
+        PrimaryKeyConstraint("entity", "entity_id", name="catalog_tombstone_pk"),
+        Index("catalog_tombstone_version_idx", "version"),
+    )
+
+    entity: Mapped[str] = mapped_column(String, primary_key=True)
+    entity_id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+
+class Location(Base):
+    """Tienda o bodega donde se guarda inventario."""
+
+    __tablename__ = "location"
+    __table_args__ = (PrimaryKeyConstraint("code", name="location_pk"),)
+
+    code: Mapped[str] = mapped_column(String(50), primary_key=True)
+    name: Mapped[str] = mapped_column(String, nullable=False)
+    kind: Mapped[str] = mapped_column(String(20), nullable=False)
+    address: Mapped[Optional[str]] = mapped_column(String)
+    active: Mapped[bool] = mapped_column(
+        Boolean, nullable=False, default=True, server_default=text("true")
+    )
+
+
+class InventoryStock(Base):
+    """
+    Existencias de un producto en una ubicación.
+
+    El stock de cada (producto, ubicación) se reparte en varias filas
+    (`slot`): los descuentos concurrentes de un producto muy vendido
+    actualizan filas distintas en lugar de hacer fila sobre un único bloqueo.
+    La existencia total es la suma de los slots y ninguno puede quedar
+    negativo.
+    """
+
+    __tablename__ = "inventory_stock"
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["product_id"],
+            ["product.id"],
+            name="inventory_stock_product_id_fk",
+            ondelete="CASCADE",
+        ),
+        ForeignKeyConstraint(
+            ["location"], ["location.code"], name="inventory_stock_location_fk"
+        ),
+        PrimaryKeyConstraint(
+            "product_id", "location", "slot", name="inventory_stock_pk"
+        ),
+        CheckConstraint("quantity >= 0", name="inventory_stock_quantity_check"),
+    )
+
+    product_id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True)
+    location: Mapped[str] = mapped_column(String(50), primary_key=True)
+    slot: Mapped[int] = mapped_column(Integer, primary_key=True)
+    quantity: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default=text("0")
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+
+class InventoryLot(Base):
+    """
+    Lote de un producto perecedero en una ubicación, con su fecha de
+    vencimiento. Desglosa parte del stock físico: las salidas toman primero
+    los lotes que vencen antes (FEFO) y el stock sin lote sigue vendiéndose
+    como siempre.
+    """
+
+    __tablename__ = "inventory_lot"
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["product_id"],
+            ["product.id"],
+            name="inventory_lot_product_id_fk",
+            ondelete="CASCADE",
+        ),
+        ForeignKeyConstraint(
+            ["location"], ["location.code"], name="inventory_lot_location_fk"
+        ),
+        PrimaryKeyConstraint("id", name="inventory_lot_pk"),
+        UniqueConstraint(
+            "product_id", "location", "lot_code", name="inventory_lot_uk"
+        ),
+        CheckConstraint("quantity >= 0", name="inventory_lot_quantity_check"),
+        # Asignación FEFO: lotes de un producto en orden de vencimiento
+        Index("inventory_lot_product_id_expiry_date_idx", "product_id", "expiry_date"),
+        # Reporte de próximos a vencer: rango de fechas solo sobre lotes con
+        # existencias (índice parcial)
+        Index(
+            "inventory_lot_expiry_date_idx",
+            "expiry_date",
+            postgresql_where=text("quantity > 0"),
+            sqlite_where=text("quantity > 0"),
+        ),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        Uuid, primary_key=True, server_default=text("gen_random_uuid()")
+    )
+    product_id: Mapped[uuid.UUID] = mapped_column(Uuid, nullable=False)
+    location: Mapped[str] = mapped_column(String(50), nullable=False)
+    lot_code: Mapped[str] = mapped_column(String(50), nullable=False)
+    expiry_date: Mapped[date] = mapped_column(Date, nullable=False)
+    quantity: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default=text("0")
+    )
+    received_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+
+class StockMovement(Base):
+    """
+    Movimiento de inventario (entrada, venta, ajuste o traslado). El libro es
+    de solo inserción: `quantity` lleva signo y nunca se modifica.
+    """
+
+    __tablename__ = "stock_movement"
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["product_id"],
+            ["product.id"],
+            name="stock_movement_product_id_fk",
+            ondelete="RESTRICT",  # el libro es la auditoría: nunca se borra
+        ),
+        ForeignKeyConstraint(
+            ["user_id"],
+            ["user.id"],
+            name="stock_movement_user_id_fk",
+            ondelete="SET NULL",
+        ),
+        PrimaryKeyConstraint("id", name="stock_movement_pk"),
+        Index(
+            "stock_movement_product_id_location_created_at_idx",
+            "product_id",
+            "location",
+            "created_at",
+        ),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        Uuid, primary_key=True, server_default=text("gen_random_uuid()")
+    )
+    product_id: Mapped[uuid.UUID] = mapped_column(Uuid, nullable=False)
+    location: Mapped[str] = mapped_column(String(50), nullable=False)
+    kind: Mapped[str] = mapped_column(String(20), nullable=False)
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+    reference: Mapped[Optional[str]] = mapped_column(String(100))
+    # Lote del que salieron o al que entraron las unidades (ver InventoryLot)
+    lot_code: Mapped[Optional[str]] = mapped_column(String(50))
+    user_id: Mapped[Optional[uuid.UUID]] = mapped_column(Uuid)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+
+class StockCheckpoint(Base):
+    """
+    Saldo de un producto en una ubicación a una fecha (`as_of`): la suma de
+    todos sus movimientos hasta ese momento. El saldo a otra fecha es el del
+    checkpoint anterior más los pocos movimientos posteriores a él.
+    """
+
+    __tablename__ = "stock_checkpoint"
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["product_id"],
+            ["product.id"],
+            name="stock_checkpoint_product_id_fk",
+            ondelete="RESTRICT",
+        ),
+        PrimaryKeyConstraint(
+            "product_id", "location", "as_of", name="stock_checkpoint_pk"
+        ),
+    )
+
+    product_id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True)
+    location: Mapped[str] = mapped_column(String(50), primary_key=True)
+    as_of: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    balance: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class ProductAvailability(Base):
+    """
+    Existencias agregadas de un producto: total y cantidad por ubicación
+    (solo las ubicaciones con stock). Se recalcula tras cada escritura de
+    inventario del producto, así las consultas de disponibilidad leen una
+    fila por producto en lugar de sumar los slots de todas las ubicaciones.
+    """
+
+    __tablename__ = "product_availability"
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["product_id"],
+            ["product.id"],
+            name="product_availability_product_id_fk",
+            ondelete="CASCADE",
+        ),
+        PrimaryKeyConstraint("product_id", name="product_availability_pk"),
+    )
+
+    product_id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True)
+    total: Mapped[int] = mapped_column(Integer, nullable=False)
+    locations: Mapped[dict] = mapped_column(JSON, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+
+class StockReservation(Base):
+    """
+    Reserva temporal de stock (carrito o pedido pendiente). Mientras está
+    activa sus unidades no están disponibles; al confirmarse se registran
+    como venta y al liberarse o vencer vuelven al stock.
+    """
+
+    __tablename__ = "stock_reservation"
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["user_id"],
+            ["user.id"],
+            name="stock_reservation_user_id_fk",
+            ondelete="SET NULL",
+        ),
+        PrimaryKeyConstraint("id", name="stock_reservation_pk"),
+        Index("stock_reservation_status_expires_at_idx", "status", "expires_at"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        Uuid, primary_key=True, server_default=text("gen_random_uuid()")
+    )
+    status: Mapped[str] = mapped_column(String(20), nullable=False)
+    reference: Mapped[Optional[str]] = mapped_column(String(100))
+    user_id: Mapped[Optional[uuid.UUID]] = mapped_column(Uuid)
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+    items: Mapped[list["StockReservationItem"]] = relationship(
+        "StockReservationItem", order_by="StockReservationItem.product_id"
+    )
+
+
+class StockReservationItem(Base):
+    __tablename__ = "stock_reservation_item"
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["reservation_id"],
+            ["stock_reservation.id"],
+            name="stock_reservation_item_reservation_id_fk",
+            ondelete="CASCADE",
+        ),
+        ForeignKeyConstraint(
+            ["product_id"],
+            ["product.id"],
+            name="stock_reservation_item_product_id_fk",
+            ondelete="CASCADE",
+        ),
+        PrimaryKeyConstraint(
+            "reservation_id", "product_id", "location", name="stock_reservation_item_pk"
+        ),
+        Index("stock_reservation_item_product_id_idx", "product_id"),
+    )
+
+    reservation_id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True)
+    product_id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True)
+    location: Mapped[str] = mapped_column(String(50), primary_key=True)
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -1,25 +1,50 @@
+from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from src.database import get_db
-from src.models import CategorySchema, CategoryUpdateSchema
-from src.models_db import Category
-from src.services import category_service
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from models import CategoryMoveSchema, CategorySchema, CategoryUpdateSchema
+from services import category_service
+from services.catalog_cache import CATALOG_TAG, tag_versions
+from services.catalog_snapshot import catalog_snapshot
+from utils.fields import parse_fields
+from utils.http_cache import conditional_get, raw_json_response
 
 router = APIRouter()
 
+catalog_etag = conditional_get(tag_versions, lambda request: (CATALOG_TAG,))
+
 @router.post("/", response_model=dict)
 def create_category(category: CategorySchema):
     return category_service.create_category(category)
 
-@router.get("/", response_model=list)
-def list_categories():
-    return category_service.get_categories()
+@router.get("/", response_model=list, dependencies=[Depends(catalog_etag)])
+def list_categories(
+    response: Response,
+    fields: Optional[str] = Query(None, description="Campos separados por coma"),
+):
+    if fields is None:
+        body = catalog_snapshot.categories_json()
+        if body is not None:
+            return raw_json_response(body, response)
+    return category_service.get_categories(
+        fields=parse_fields(fields, category_service.CATEGORY_FIELDS)
+    )
+
+@router.get("/with-products", response_model=list)
+def list_categories_with_products(include_counts: bool = Query(False)):
+    return category_service.get_category_catalog(
+        include_products=True, include_counts=include_counts
+    )
 
-@router.get("/with-products")
-def list_categories_with_products():
-    return category_service.get_categories(include_products=True)
+@router.get("/with-counts", response_model=list)
+def list_categories_with_counts():
+    return category_service.get_category_catalog(
+        include_products=False, include_counts=True
+    )
+
+@router.get("/tree", response_model=list)
+def get_category_tree():
+    return category_service.get_category_tree()
 
 @router.get("/{category_id}", response_model=dict)
 def get_category(category_id: UUID):
@@ -40,11 +65,31 @@ def delete_category(category_id: UUID):
     deleted = category_service.delete_category_service(category_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Category not found")
+    if deleted.get("error") == "has_subcategories":
+        raise HTTPException(status_code=409, detail=deleted["detail"])
     return {"message": "Category deleted successfully"}
 
+@router.put("/{category_id}/move", response_model=dict)
+def move_category(category_id: UUID, move: CategoryMoveSchema):
+    moved = category_service.move_category_service(category_id, move.parent_id)
+    if moved.get("error") == "not_found":
+        raise HTTPException(status_code=404, detail=moved["detail"])
+    if moved.get("error") == "invalid_move":
+        raise HTTPException(status_code=400, detail=moved["detail"])
+    return moved
+
+@router.get("/{category_id}/breadcrumb", response_model=list)
+def get_category_breadcrumb(category_id: UUID):
+    breadcrumb = category_service.get_category_breadcrumb_service(category_id)
+    if isinstance(breadcrumb, dict):
+        raise HTTPException(status_code=404, detail="Category not found")
+    return breadcrumb
+
 @router.get("/{category_id}/products")
-def get_category_with_products(category_id: UUID, db: Session = Depends(get_db)):
-    category = db.query(Category).filter(Category.id == category_id).first()
-    if not category:
-        return {"error": "Category not found"}
-    return {"category": category.name, "products": category.products}
\ No newline at end of file
+def get_category_with_products(
+    category_id: UUID,
+    include_subcategories: bool = Query(False),
+):
+    if include_subcategories:
+        return category_service.get_category_subtree_products_service(category_id)
+    return category_service.get_category_products_service(category_id)
\ No newline at end of file
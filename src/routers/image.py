@@ -0,0 +1,60 @@
+import uuid
+from typing import Optional
+
+from fastapi import APIRouter, Query, Request, Response
+from fastapi.responses import FileResponse
+
+from services.image_service import (
+    THUMBNAIL_MEDIA_TYPE,
+    get_asset_service,
+    get_product_thumbnail_service,
+)
+from utils.http_cache import etag_matches
+
+router = APIRouter()
+
+# Con `v` (versión de la imagen de origen) la URL nunca cambia de contenido
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+THUMBNAIL_CACHE_CONTROL = "public, max-age=86400"
+
+
+def _file_response(
+    request: Request, path: str, media_type: str, etag: str, cache_control: str
+) -> Response:
+    """FileResponse (sendfile / Range) con ETag, o 304 si coincide If-None-Match."""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=media_type, headers=headers)
+
+
+@router.get("/assets/{digest}")
+def get_asset(digest: str, request: Request):
+    """
+    Imagen subida (público). La URL es el sha256 del contenido: inmutable.
+    """
+    path, media_type = get_asset_service(digest)
+    return _file_response(
+        request, path, media_type, f'"{digest}"', IMMUTABLE_CACHE_CONTROL
+    )
+
+
+@router.get("/products/{product_id}/{size}")
+def get_product_thumbnail(
+    product_id: uuid.UUID,
+    size: str,
+    request: Request,
+    v: Optional[str] = Query(None, max_length=32),
+):
+    """
+    Miniatura de la imagen de un producto (público).
+    Tamaños: sm, md, lg. Soporta Range e If-None-Match.
+    """
+    path, digest, version = get_product_thumbnail_service(product_id, size)
+    return _file_response(
+        request,
+        path,
+        THUMBNAIL_MEDIA_TYPE,
+        f'"{digest}"',
+        IMMUTABLE_CACHE_CONTROL if v == version else THUMBNAIL_CACHE_CONTROL,
+    )
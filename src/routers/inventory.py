@@ -1,12 +1,50 @@
-from typing import List
+import uuid
+from datetime import datetime
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query
 
-from config.permissions import Action, Entity, PermissionManager
-from database import get_db
-from schemas.user import UserResponse
-from utils.auth import get_current_user, get_current_user_from_db, get_effective_roles
+from config.permissions import Action, Entity
+from schemas.inventory import (
+    EXPIRING_MAX_DAYS,
+    AvailabilityRequest,
+    LocationCode,
+    LocationCreate,
+    LocationKind,
+    LocationUpdate,
+    ReservationCreate,
+    StockChange,
+    StockDecrementRequest,
+    StockSet,
+    StockTransfer,
+)
+from services.availability_service import get_availability_service
+from services.inventory_service import (
+    decrement_items_service,
+    decrement_stock_service,
+    get_product_stock_service,
+    get_stock_movements_service,
+    get_stock_service,
+    increment_stock_service,
+    set_stock_service,
+    transfer_stock_service,
+)
+from services.location_service import (
+    create_location_service,
+    get_locations_service,
+    update_location_service,
+)
+from services.lot_service import (
+    get_expiring_lots_service,
+    get_product_lots_service,
+)
+from services.reservation_service import (
+    confirm_reservation_service,
+    get_reservation_service,
+    release_reservation_service,
+    reserve_stock_service,
+)
+from utils.auth import require_permission
 
 router = APIRouter()
 
@@ -15,106 +53,222 @@ router = APIRouter()
 async def get_inventory_stock(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    current_user: UserResponse = Depends(get_current_user),
-    db: Session = Depends(get_db),
-):
-    """
-    Obtener lista de inventario/stock.
-    Los usuarios pueden ver todo el inventario según los permisos.
-    """
-    # Obtener roles del usuario
-    user_from_db = get_current_user_from_db(current_user)
-    user_roles = get_effective_roles(user_from_db, str(current_user.id))
-
-    # Verificar permisos para cualquier rol del usuario
-    has_permission = False
-    for role in user_roles:
-        if PermissionManager.can_perform_action(
-            role, Entity.INVENTORY_STOCK, Action.READ
-        ):
-            has_permission = True
-            break
-
-    if not has_permission:
-        raise HTTPException(
-            status_code=403,
-            detail=f"Insufficient permissions. Required: INVENTORY_STOCK READ. User roles: {[role.value for role in user_roles]}",
-        )
-
-    # Por ahora devolver array vacío hasta que se implemente la tabla de inventario
-    # TODO: Implementar consulta real a la base de datos
-    return []
-
-
-@router.get("/{inventory_id}", response_model=dict)
-async def get_inventory_item(
-    inventory_id: str,
-    current_user: UserResponse = Depends(get_current_user),
-    db: Session = Depends(get_db),
-):
-    """
-    Obtener un elemento de inventario específico por ID.
-    """
-    # Obtener roles del usuario
-    user_from_db = get_current_user_from_db(current_user)
-    user_roles = get_effective_roles(user_from_db, str(current_user.id))
-
-    # Verificar permisos
-    has_permission = False
-    for role in user_roles:
-        if PermissionManager.can_perform_action(
-            role, Entity.INVENTORY_STOCK, Action.READ
-        ):
-            has_permission = True
-            break
-
-    if not has_permission:
-        raise HTTPException(
-            status_code=403,
-            detail=f"Insufficient permissions. Required: INVENTORY_STOCK READ. User roles: {[role.value for role in user_roles]}",
-        )
-
-    # Por ahora devolver un item de inventario de ejemplo
-    # TODO: Implementar consulta real a la base de datos
-    return {
-        "id": inventory_id,
-        "product_id": "example-product-id",
-        "quantity": 100,
-        "location": "Warehouse A",
-        "last_updated": "2025-09-16T06:00:00Z",
-    }
-
-
-@router.post("/", response_model=dict)
-async def create_inventory_item(
-    inventory_data: dict,
-    current_user: UserResponse = Depends(get_current_user),
-    db: Session = Depends(get_db),
-):
-    """
-    Crear un nuevo elemento de inventario.
-    """
-    # Obtener roles del usuario
-    user_from_db = get_current_user_from_db(current_user)
-    user_roles = get_effective_roles(user_from_db, str(current_user.id))
-
-    # Verificar permisos
-    has_permission = False
-    for role in user_roles:
-        if PermissionManager.can_perform_action(
-            role, Entity.INVENTORY_STOCK, Action.CREATE
-        ):
-            has_permission = True
-            break
-
-    if not has_permission:
-        raise HTTPException(
-            status_code=403,
-            detail=f"Insufficient permissions. Required: INVENTORY_STOCK CREATE. User roles: {[role.value for role in user_roles]}",
-        )
-
-    # TODO: Implementar creación real en la base de datos
-    return {
-        "message": "Inventory creation endpoint - implementation pending",
-        "data": inventory_data,
-    }
+    location: Optional[LocationCode] = Query(None),
+    current_user=Depends(require_permission(Entity.INVENTORY_STOCK, Action.READ)),
+):
+    """
+    Obtener las existencias por producto y ubicación.
+    """
+    return get_stock_service(skip, limit, location)
+
+
+@router.get("/locations", response_model=List[dict])
+async def get_locations(
+    kind: Optional[LocationKind] = Query(None),
+    include_inactive: bool = Query(False),
+    current_user=Depends(require_permission(Entity.INVENTORY_STOCK, Action.READ)),
+):
+    """
+    Obtener las tiendas y bodegas.
+    """
+    return get_locations_service(kind, include_inactive)
+
+
+@router.post("/locations", response_model=dict)
+def create_location(
+    location: LocationCreate,
+    current_user=Depends(require_permission(Entity.INVENTORY_STOCK, Action.CREATE)),
+):
+    """
+    Crear una tienda o bodega.
+    """
+    return create_location_service(location)
+
+
+@router.patch("/locations/{code}", response_model=dict)
+def update_location(
+    code: LocationCode,
+    location: LocationUpdate,
+    current_user=Depends(require_permission(Entity.INVENTORY_STOCK, Action.UPDATE)),
+):
+    """
+    Actualizar o desactivar una tienda o bodega.
+    """
+    return update_location_service(code, location)
+
+
+@router.post("/availability", response_model=dict)
+async def get_availability(
+    request: AvailabilityRequest,
+    current_user=Depends(require_permission(Entity.INVENTORY_STOCK, Action.READ)),
+):
+    """
+    Obtener la disponibilidad (total y por ubicación) de varios productos en
+    una sola consulta. Con `location_kind` solo cuenta ese tipo de ubicación.
+    """
+    return get_availability_service(request)
+
+
+@router.get("/lots/expiring", response_model=List[dict])
+async def get_expiring_lots(
+    days: int = Query(30, ge=0, le=EXPIRING_MAX_DAYS),
+    location: Optional[LocationCode] = Query(None),
+    include_expired: bool = Query(False),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    current_user=Depends(require_permission(Entity.INVENTORY_STOCK, Action.READ)),
+):
+    """
+    Obtener los lotes con existencias que vencen en los próximos `days` días,
+    del más próximo a vencer al más lejano.
+    """
+    return get_expiring_lots_service(days, location, include_expired, skip, limit)
+
+
+@router.post("/reservations", response_model=dict)
+def create_reservation(
+    request: ReservationCreate,
+    current_user=Depends(require_permission(Entity.INVENTORY_STOCK, Action.UPDATE)),
+):
+    """
+    Reservar stock por `ttl_seconds` (carrito o pedido pendiente): todos los
+    ítems o ninguno. Responde 409 si alguno no tiene existencias suficientes.
+    """
+    return reserve_stock_service(request, current_user.id)
+
+
+@router.get("/reservations/{reservation_id}", response_model=dict)
+async def get_reservation(
+    reservation_id: uuid.UUID,
+    current_user=Depends(require_permission(Entity.INVENTORY_STOCK, Action.READ)),
+):
+    """
+    Obtener una reserva de stock.
+    """
+    return get_reservation_service(reservation_id)
+
+
+@router.post("/reservations/{reservation_id}/confirm", response_model=dict)
+def confirm_reservation(
+    reservation_id: uuid.UUID,
+    current_user=Depends(require_permission(Entity.INVENTORY_STOCK, Action.UPDATE)),
+):
+    """
+    Confirmar una reserva: sus unidades se registran como venta.
+    """
+    return confirm_reservation_service(reservation_id, current_user.id)
+
+
+@router.post("/reservations/{reservation_id}/release", response_model=dict)
+def release_reservation(
+    reservation_id: uuid.UUID,
+    current_user=Depends(require_permission(Entity.INVENTORY_STOCK, Action.UPDATE)),
+):
+    """
+    Liberar una reserva: sus unidades vuelven a estar disponibles.
+    """
+    return release_reservation_service(reservation_id)
+
+
+@router.post("/decrement", response_model=dict)
+def decrement_inventory_items(
+    request: StockDecrementRequest,
+    current_user=Depends(require_permission(Entity.INVENTORY_STOCK, Action.UPDATE)),
+):
+    """
+    Descontar varios productos a la vez (checkout): todos o ninguno.
+    Responde 409 si alguno no tiene existencias suficientes.
+    """
+    return decrement_items_service(request, current_user.id)
+
+
+@router.get("/{product_id}", response_model=dict)
+async def get_product_stock(
+    product_id: uuid.UUID,
+    as_of: Optional[datetime] = Query(
+        None, description="Fecha para consultar las existencias históricas"
+    ),
+    current_user=Depends(require_permission(Entity.INVENTORY_STOCK, Action.READ)),
+):
+    """
+    Obtener las existencias de un producto por ubicación, actuales o a una
+    fecha (`as_of`).
+    """
+    return get_product_stock_service(product_id, as_of)
+
+
+@router.get("/{product_id}/movements", response_model=List[dict])
+async def get_product_stock_movements(
+    product_id: uuid.UUID,
+    location: Optional[LocationCode] = Query(None),
+    since: Optional[datetime] = Query(None),
+    until: Optional[datetime] = Query(None),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    current_user=Depends(require_permission(Entity.INVENTORY_STOCK, Action.READ)),
+):
+    """
+    Obtener el historial de movimientos de un producto (más recientes primero).
+    """
+    return get_stock_movements_service(product_id, location, since, until, skip, limit)
+
+
+@router.get("/{product_id}/lots", response_model=List[dict])
+async def get_product_lots(
+    product_id: uuid.UUID,
+    location: Optional[LocationCode] = Query(None),
+    current_user=Depends(require_permission(Entity.INVENTORY_STOCK, Action.READ)),
+):
+    """
+    Obtener los lotes con existencias de un producto en orden de asignación
+    (primero el que vence antes).
+    """
+    return get_product_lots_service(product_id, location)
+
+
+@router.put("/{product_id}", response_model=dict)
+def set_product_stock(
+    product_id: uuid.UUID,
+    stock: StockSet,
+    current_user=Depends(require_permission(Entity.INVENTORY_STOCK, Action.UPDATE)),
+):
+    """
+    Fijar las existencias de un producto en una ubicación (conteo físico).
+    """
+    return set_stock_service(product_id, stock, current_user.id)
+
+
+@router.post("/{product_id}/increment", response_model=dict)
+def increment_product_stock(
+    product_id: uuid.UUID,
+    change: StockChange,
+    current_user=Depends(require_permission(Entity.INVENTORY_STOCK, Action.UPDATE)),
+):
+    """
+    Sumar existencias de un producto (entrada de mercancía).
+    """
+    return increment_stock_service(product_id, change, current_user.id)
+
+
+@router.post("/{product_id}/decrement", response_model=dict)
+def decrement_product_stock(
+    product_id: uuid.UUID,
+    change: StockChange,
+    current_user=Depends(require_permission(Entity.INVENTORY_STOCK, Action.UPDATE)),
+):
+    """
+    Descontar existencias de un producto. Responde 409 si no alcanzan.
+    """
+    return decrement_stock_service(product_id, change, current_user.id)
+
+
+@router.post("/{product_id}/transfer", response_model=dict)
+def transfer_product_stock(
+    product_id: uuid.UUID,
+    transfer: StockTransfer,
+    current_user=Depends(require_permission(Entity.INVENTORY_STOCK, Action.UPDATE)),
+):
+    """
+    Trasladar existencias de un producto entre ubicaciones.
+    """
+    return transfer_stock_service(product_id, transfer, current_user.id)
@@ -1,22 +1,84 @@
 import uuid
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, File, Query, Request, Response, UploadFile
+from fastapi.responses import StreamingResponse
 
 from config.permissions import Action, Entity
-from schemas.product import ProductCreate, ProductUpdate
+from constants.product_attributes import normalize_attribute_value
+from schemas.product import (
+    DEFAULT_DUPLICATE_THRESHOLD,
+    ProductAttributesUpdate,
+    ProductBatchGetRequest,
+    ProductBulkDeleteRequest,
+    ProductBulkUpdateRequest,
+    ProductCreate,
+    ProductDuplicateCheck,
+    ProductFileFormat,
+    ProductScanRequest,
+    ProductSort,
+    ProductUpdate,
+)
+from services.catalog_cache import (
+    CATALOG_TAG,
+    PRODUCTS_TAG,
+    product_tag,
+    tag_versions,
+)
+from services.catalog_snapshot import catalog_snapshot
+from services.change_feed_service import (
+    CHANGES_PAGE_SIZE,
+    get_catalog_changes_service,
+)
+from services.duplicate_service import (
+    check_duplicates_service,
+    find_duplicate_clusters_service,
+)
+from services.facet_service import (
+    facet_search_service,
+    get_product_attributes_service,
+    set_product_attributes_service,
+)
+from services.image_service import store_image_service
+from services.product_bulk_service import (
+    bulk_delete_products_service,
+    bulk_update_products_service,
+    export_products_service,
+    import_products_service,
+)
 from services.product_service import (
+    PRODUCT_FIELDS,
     create_product_service,
     delete_product_service,
     get_product_by_id_service,
+    get_products_by_ids_service,
     get_products_service,
     update_product_service,
 )
+from services.scan_service import scan_product_service, scan_products_service
+from services.search_service import (
+    autocomplete_products_service,
+    search_products_service,
+)
 from utils.auth import require_permission
+from utils.fields import parse_fields
+from utils.http_cache import conditional_get, raw_json_response
 
 router = APIRouter()
 
 
+def _product_etag_tags(request: Request):
+    try:
+        product_id = uuid.UUID(request.path_params["product_id"])
+    except ValueError:
+        return ()
+    return (product_tag(product_id), PRODUCTS_TAG)
+
+
+catalog_etag = conditional_get(tag_versions, lambda request: (CATALOG_TAG,))
+product_etag = conditional_get(tag_versions, _product_etag_tags)
+
+
 @router.post("/", response_model=dict)
 async def create_product(
     product_data: ProductCreate,
@@ -29,15 +91,225 @@ async def create_product(
     return create_product_service(product_data)
 
 
-@router.get("/", response_model=List[dict])
-async def get_products():
+@router.post("/import", response_model=dict)
+def import_products(
+    file: UploadFile = File(...),
+    file_format: Optional[ProductFileFormat] = Query(None, alias="format"),
+    current_user=Depends(require_permission(Entity.PRODUCTS, Action.CREATE)),
+):
     """
-    Obtener todos los productos (público).
+    Importación masiva de productos desde CSV o NDJSON - Solo roles con
+    permiso de creación de productos.
+    Los productos existentes (mismo nombre) se actualizan. Si no se indica
+    `format` se deduce de la extensión del archivo.
     """
-    return get_products_service()
+    if file_format is None:
+        extension = (file.filename or "").rsplit(".", 1)[-1].lower()
+        file_format = (
+            ProductFileFormat.NDJSON
+            if extension in ("ndjson", "jsonl")
+            else ProductFileFormat.CSV
+        )
+    return import_products_service(file.file, file_format)
 
 
-@router.get("/{product_id}", response_model=dict)
+@router.get("/export")
+async def export_products(
+    file_format: ProductFileFormat = Query(ProductFileFormat.NDJSON, alias="format"),
+    category_id: Optional[List[uuid.UUID]] = Query(None),
+    current_user=Depends(require_permission(Entity.PRODUCTS, Action.READ)),
+):
+    """
+    Exportar el catálogo completo (o de algunas categorías) en NDJSON o CSV.
+    La respuesta se envía en streaming con memoria constante.
+    """
+    media_type = (
+        "text/csv" if file_format == ProductFileFormat.CSV else "application/x-ndjson"
+    )
+    return StreamingResponse(
+        export_products_service(file_format, category_ids=category_id),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="products.{file_format.value}"'
+        },
+    )
+
+
+@router.get("/", response_model=List[dict], dependencies=[Depends(catalog_etag)])
+async def get_products(
+    response: Response,
+    category_id: Optional[List[uuid.UUID]] = Query(None),
+    name_prefix: Optional[str] = Query(None, min_length=1, max_length=100),
+    has_image: Optional[bool] = Query(None),
+    sort: ProductSort = Query(ProductSort.NAME),
+    skip: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    fields: Optional[str] = Query(None, description="Campos separados por coma"),
+):
+    """
+    Obtener productos (público).
+    Permite filtrar por una o varias categorías (`category_id` repetido),
+    prefijo de nombre y presencia de imagen, y ordenar por una clave permitida.
+    Con `fields=id,name` solo se consultan y devuelven esos campos.
+    El listado completo sin filtros se sirve desde el snapshot compartido.
+    """
+    unfiltered = (
+        category_id is None
+        and name_prefix is None
+        and has_image is None
+        and sort == ProductSort.NAME
+        and skip == 0
+        and limit is None
+        and fields is None
+    )
+    if unfiltered:
+        body = catalog_snapshot.products_json()
+        if body is not None:
+            return raw_json_response(body, response)
+    return get_products_service(
+        category_ids=category_id,
+        name_prefix=name_prefix,
+        has_image=has_image,
+        sort=sort,
+        skip=skip,
+        limit=limit,
+        fields=parse_fields(fields, PRODUCT_FIELDS),
+    )
+
+
+@router.get("/search", response_model=List[dict])
+async def search_products(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    fields: Optional[str] = Query(None, description="Campos separados por coma"),
+):
+    """
+    Búsqueda full-text de productos por nombre y descripción (público).
+    Los resultados se ordenan por relevancia.
+    """
+    return search_products_service(
+        q, limit=limit, fields=parse_fields(fields, PRODUCT_FIELDS)
+    )
+
+
+@router.get("/autocomplete", response_model=List[dict])
+async def autocomplete_products(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+):
+    """
+    Sugerencias de nombres de producto mientras se escribe (público).
+    """
+    return autocomplete_products_service(q, limit=limit)
+
+
+@router.post("/batch-get", response_model=dict)
+async def batch_get_products(
+    request: ProductBatchGetRequest,
+    fields: Optional[str] = Query(None, description="Campos separados por coma"),
+):
+    """
+    Obtener varios productos por ID en una sola petición (público).
+    Los resultados respetan el orden de `ids`; los no encontrados son `null`
+    y se listan en `missing`.
+    """
+    return get_products_by_ids_service(
+        request.ids, fields=parse_fields(fields, PRODUCT_FIELDS)
+    )
+
+
+@router.get("/changes", response_model=dict)
+async def get_catalog_changes(
+    since: int = Query(0, ge=0, description="Última versión recibida (0 = todo)"),
+    limit: int = Query(CHANGES_PAGE_SIZE, ge=1, le=CHANGES_PAGE_SIZE),
+):
+    """
+    Feed incremental del catálogo para sincronizar clientes (público).
+    Devuelve productos y categorías modificados y los ids eliminados desde la
+    versión `since`, en formato columnas + filas. Enviar la `version`
+    recibida como `since` en la siguiente llamada.
+    """
+    return get_catalog_changes_service(since, limit=limit)
+
+
+@router.get("/facets", response_model=dict)
+async def facet_products(
+    species: Optional[List[str]] = Query(None),
+    life_stage: Optional[List[str]] = Query(None),
+    brand: Optional[List[str]] = Query(None),
+    weight: Optional[List[str]] = Query(None),
+    medication_type: Optional[List[str]] = Query(None),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    fields: Optional[str] = Query(None, description="Campos separados por coma"),
+):
+    """
+    Filtrar productos por atributos (público).
+    Un atributo repetido acepta cualquiera de sus valores; atributos distintos
+    se combinan con AND. Devuelve el total, la página ordenada por nombre y
+    los conteos por valor de cada faceta.
+    """
+    filters = {
+        "species": species,
+        "life_stage": life_stage,
+        "brand": brand,
+        "weight": weight,
+        "medication_type": medication_type,
+    }
+    filters = {
+        attribute: [normalize_attribute_value(value) for value in values]
+        for attribute, values in filters.items()
+        if values
+    }
+    return facet_search_service(
+        filters, skip=skip, limit=limit, fields=parse_fields(fields, PRODUCT_FIELDS)
+    )
+
+
+@router.get("/scan/{code}", response_model=dict)
+def scan_product(code: str):
+    """
+    Obtener un producto por código de barras o SKU (público).
+    Se resuelve desde un índice en memoria, sin consultar la base de datos.
+    """
+    return scan_product_service(code)
+
+
+@router.post("/scan", response_model=dict)
+def scan_products(request: ProductScanRequest):
+    """
+    Resolver varios códigos escaneados en una sola petición (público).
+    Devuelve los productos por código y la lista de códigos no encontrados.
+    """
+    return scan_products_service(request.codes)
+
+
+@router.get("/duplicates", response_model=dict)
+def get_duplicate_clusters(
+    threshold: float = Query(DEFAULT_DUPLICATE_THRESHOLD, gt=0, le=1),
+    current_user=Depends(require_permission(Entity.PRODUCTS, Action.READ)),
+):
+    """
+    Grupos de productos casi duplicados en todo el catálogo (nombre +
+    descripción, MinHash + LSH).
+    """
+    return find_duplicate_clusters_service(threshold)
+
+
+@router.post("/duplicates/check", response_model=dict)
+def check_duplicates(
+    request: ProductDuplicateCheck,
+    current_user=Depends(require_permission(Entity.PRODUCTS, Action.READ)),
+):
+    """
+    Productos parecidos a uno nuevo, para avisar antes de crearlo.
+    """
+    return check_duplicates_service(request)
+
+
+@router.get(
+    "/{product_id}", response_model=dict, dependencies=[Depends(product_etag)]
+)
 async def get_product(product_id: uuid.UUID):
     """
     Obtener un producto por ID (público).
@@ -45,6 +317,69 @@ async def get_product(product_id: uuid.UUID):
     return get_product_by_id_service(product_id)
 
 
+@router.get("/{product_id}/attributes", response_model=dict)
+async def get_product_attributes(product_id: uuid.UUID):
+    """
+    Obtener los atributos tipados de un producto (público).
+    """
+    return get_product_attributes_service(product_id)
+
+
+@router.post("/{product_id}/image", response_model=dict)
+def upload_product_image(
+    product_id: uuid.UUID,
+    file: UploadFile = File(...),
+    current_user=Depends(require_permission(Entity.PRODUCTS, Action.UPDATE)),
+):
+    """
+    Subir la imagen de un producto - Solo ADMIN y SUPERADMIN.
+    Se guarda localmente (JPEG, PNG, WEBP o GIF) y `image_url` pasa a apuntar
+    a /images/assets/<sha256>.
+    """
+    get_product_by_id_service(product_id)
+    image = store_image_service(file.file)
+    result = update_product_service(
+        product_id, ProductUpdate(image_url=image["image_url"])
+    )
+    return {**result, "image": image}
+
+
+@router.put("/{product_id}/attributes", response_model=dict)
+async def set_product_attributes(
+    product_id: uuid.UUID,
+    attributes: ProductAttributesUpdate,
+    current_user=Depends(require_permission(Entity.PRODUCTS, Action.UPDATE)),
+):
+    """
+    Reemplazar los atributos tipados de un producto - Solo ADMIN y SUPERADMIN.
+    """
+    return set_product_attributes_service(product_id, attributes)
+
+
+@router.patch("/bulk", response_model=dict)
+async def bulk_update_products(
+    request: ProductBulkUpdateRequest,
+    current_user=Depends(require_permission(Entity.PRODUCTS, Action.UPDATE)),
+):
+    """
+    Actualizar muchos productos a la vez (por ids y/o filtros) - Solo ADMIN y
+    SUPERADMIN. Se ejecuta como un único UPDATE y devuelve las filas afectadas.
+    """
+    return bulk_update_products_service(request)
+
+
+@router.post("/bulk-delete", response_model=dict)
+async def bulk_delete_products(
+    request: ProductBulkDeleteRequest,
+    current_user=Depends(require_permission(Entity.PRODUCTS, Action.DELETE)),
+):
+    """
+    Eliminar muchos productos a la vez (por ids y/o filtros) - Solo SUPERADMIN.
+    Se ejecuta como un único DELETE y devuelve las filas eliminadas.
+    """
+    return bulk_delete_products_service(request)
+
+
 @router.put("/{product_id}", response_model=dict)
 async def update_product(
     product_id: uuid.UUID,
@@ -1,19 +1,23 @@
 import uuid
-from typing import List
+import zlib
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 
-from config.permissions import PermissionManager
+from config.permissions import PERMISSIONS_CONFIG, PermissionManager
 from constants.role import RoleEnum
 from schemas.user import (
     ActiveRoleResponse,
     LoginSchema,
     SignUpSchema,
     SwitchRoleSchema,
+    UserListItem,
     UserResponse,
     UserUpdate,
 )
+from services.catalog_cache import tag_versions, user_tag
 from services.user_service import (
+    USER_FIELDS,
     create_user_service,
     get_user_by_id_service,
     get_users_service,
@@ -26,9 +30,38 @@ from utils.auth import (
     get_current_user_from_db,
     get_user_with_permissions,
 )
+from utils.fields import parse_fields
+from utils.http_cache import PRIVATE_CACHE_CONTROL, check_not_modified
 
 router = APIRouter()
 
+# Cambia cuando cambia la matriz de permisos (nuevo despliegue)
+_PERMISSIONS_DIGEST = zlib.crc32(repr(PERMISSIONS_CONFIG).encode())
+
+
+def permissions_etag(
+    request: Request,
+    response: Response,
+    user=Depends(get_user_with_permissions),
+):
+    """
+    GET condicional de los permisos. Usa el mismo usuario que el endpoint
+    (FastAPI resuelve la dependencia una vez por petición). El rol activo y
+    los roles entran al ETag: el rol activo vive en memoria de cada worker y
+    no en las versiones compartidas.
+    """
+    active_role = user.active_role.value if user.active_role else "none"
+    roles = ",".join(sorted(role.value for role in user.roles))
+    check_not_modified(
+        tag_versions,
+        (user_tag(user.uid), f"permissions:{_PERMISSIONS_DIGEST}"),
+        request,
+        response,
+        PRIVATE_CACHE_CONTROL,
+        f"active-role:{active_role}",
+        f"roles:{roles}",
+    )
+
 
 @router.post("/signup", response_model=dict)
 async def create_user(user_data: SignUpSchema):
@@ -46,12 +79,18 @@ async def login(user_data: LoginSchema):
     return login_service(user_data.email, user_data.password)
 
 
-@router.get("/", response_model=List[UserResponse])
-async def get_users(current_user=Depends(get_current_user)):
+@router.get(
+    "/", response_model=List[UserListItem], response_model_exclude_unset=True
+)
+async def get_users(
+    fields: Optional[str] = Query(None, description="Campos separados por coma"),
+    current_user=Depends(get_current_user),
+):
     """
     Obtener todos los usuarios (requiere autenticación).
+    Con `fields=id,email` se omite la persona embebida y su JOIN.
     """
-    return get_users_service()
+    return get_users_service(fields=parse_fields(fields, USER_FIELDS))
 
 
 @router.get("/{user_id}", response_model=UserResponse)
@@ -83,7 +122,7 @@ async def validate_token(current_user=Depends(get_current_user)):
     return {"message": "Token is valid", "user": current_user}
 
 
-@router.get("/me/permissions")
+@router.get("/me/permissions", dependencies=[Depends(permissions_etag)])
 async def get_my_permissions(user=Depends(get_user_with_permissions)):
     """
     Obtener todos los permisos del usuario actual para el frontend.
@@ -145,6 +184,7 @@ async def switch_role(
 
     # Establecer el rol activo
     ActiveRoleManager.set_active_role(user_id, requested_role)
+    tag_versions.bump([user_tag(user.uid)])
 
     # Calcular permisos para el nuevo rol activo
     permissions = PermissionManager.get_user_permissions(requested_role)
@@ -164,6 +204,7 @@ async def clear_active_role(user=Depends(get_current_user_from_db)):
     """
     user_id = str(user.id)
     ActiveRoleManager.clear_active_role(user_id)
+    tag_versions.bump([user_tag(user.uid)])
 
     return {
         "message": "Active role cleared. Now using all assigned roles.",
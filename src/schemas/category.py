@@ -12,6 +12,7 @@ class CategoryBase(BaseModel):
 class CategoryCreate(BaseModel):
     name: str
     description: Optional[str] = None
+    parent_id: Optional[UUID] = None
 
 
 #  Actualizar categoría
@@ -0,0 +1,139 @@
+import uuid
+from datetime import date
+from enum import Enum
+from typing import Annotated, List, Optional
+
+from pydantic import BaseModel, Field, StringConstraints, model_validator
+
+from config.settings import settings
+
+# Máximo de ítems por descuento en lote (checkout)
+INVENTORY_MAX_ITEMS = 200
+
+# Máximo de productos por consulta de disponibilidad
+AVAILABILITY_MAX_PRODUCTS = 200
+
+# Máximo de días hacia adelante del reporte de lotes por vencer
+EXPIRING_MAX_DAYS = 365
+
+DEFAULT_LOCATION = settings.INVENTORY_DEFAULT_LOCATION
+
+# Código de ubicación: letras, dígitos, guiones y guiones bajos
+LocationCode = Annotated[
+    str,
+    StringConstraints(
+        strip_whitespace=True, min_length=1, max_length=50, pattern=r"^[0-9A-Za-z_\-]+$"
+    ),
+]
+
+# Código de lote del fabricante o proveedor
+LotCode = Annotated[
+    str, StringConstraints(strip_whitespace=True, min_length=1, max_length=50)
+]
+
+# Referencia externa de un movimiento (factura, pedido, etc.)
+MovementReference = Annotated[
+    str, StringConstraints(strip_whitespace=True, max_length=100)
+]
+
+
+class LocationKind(str, Enum):
+    STORE = "store"
+    WAREHOUSE = "warehouse"
+
+
+class LocationCreate(BaseModel):
+    code: LocationCode
+    name: str = Field(..., min_length=1, max_length=100)
+    kind: LocationKind = LocationKind.WAREHOUSE
+    address: Optional[str] = Field(None, max_length=255)
+
+
+class LocationUpdate(BaseModel):
+    name: Optional[str] = Field(None, min_length=1, max_length=100)
+    kind: Optional[LocationKind] = None
+    address: Optional[str] = Field(None, max_length=255)
+    active: Optional[bool] = None
+
+
+class ReservationStatus(str, Enum):
+    ACTIVE = "active"
+    CONFIRMED = "confirmed"
+    RELEASED = "released"
+    EXPIRED = "expired"
+
+
+class MovementKind(str, Enum):
+    RECEIPT = "receipt"
+    SALE = "sale"
+    ADJUSTMENT = "adjustment"
+    TRANSFER_OUT = "transfer_out"
+    TRANSFER_IN = "transfer_in"
+
+
+class StockChange(BaseModel):
+    quantity: int = Field(..., gt=0)
+    location: LocationCode = DEFAULT_LOCATION
+    reference: Optional[MovementReference] = None
+    # Entrada: lote que se recibe (el vencimiento se exige al crear el lote).
+    # Salida: lote del que se descuenta en vez de asignar por vencimiento.
+    lot_code: Optional[LotCode] = None
+    expiry_date: Optional[date] = None
+
+    @model_validator(mode="after")
+    def check_lot(self):
+        if self.expiry_date is not None and self.lot_code is None:
+            raise ValueError("expiry_date requires lot_code")
+        return self
+
+
+class StockSet(BaseModel):
+    quantity: int = Field(..., ge=0)
+    location: LocationCode = DEFAULT_LOCATION
+    reference: Optional[MovementReference] = None
+
+
+class StockTransfer(BaseModel):
+    quantity: int = Field(..., gt=0)
+    from_location: LocationCode
+    to_location: LocationCode
+    reference: Optional[MovementReference] = None
+
+    @model_validator(mode="after")
+    def check_locations(self):
+        if self.from_location == self.to_location:
+            raise ValueError("from_location and to_location must be different")
+        return self
+
+
+class StockItem(BaseModel):
+    product_id: uuid.UUID
+    quantity: int = Field(..., gt=0)
+    location: LocationCode = DEFAULT_LOCATION
+
+
+class StockDecrementRequest(BaseModel):
+    """Ítems a descontar juntos: se descuentan todos o ninguno."""
+
+    items: List[StockItem] = Field(..., min_length=1, max_length=INVENTORY_MAX_ITEMS)
+    reference: Optional[MovementReference] = None
+
+
+class AvailabilityRequest(BaseModel):
+    product_ids: List[uuid.UUID] = Field(
+        ..., min_length=1, max_length=AVAILABILITY_MAX_PRODUCTS
+    )
+    # Solo ubicaciones de este tipo (p. ej. tiendas, para "dónde lo consigo")
+    location_kind: Optional[LocationKind] = None
+
+
+class ReservationCreate(BaseModel):
+    """Ítems a reservar juntos: se reservan todos o ninguno."""
+
+    items: List[StockItem] = Field(..., min_length=1, max_length=INVENTORY_MAX_ITEMS)
+    ttl_seconds: int = Field(
+        settings.RESERVATION_DEFAULT_TTL_SECONDS,
+        ge=1,
+        le=settings.RESERVATION_MAX_TTL_SECONDS,
+    )
+    reference: Optional[MovementReference] = None
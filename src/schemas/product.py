@@ -1,7 +1,28 @@
 import uuid
-from typing import Optional
+from enum import Enum
+from typing import Annotated, List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, StringConstraints, field_validator
+
+from constants.product_attributes import ATTRIBUTE_VALUES, normalize_attribute_value
+
+# Máximo de ids aceptados en una consulta por lote
+PRODUCT_BATCH_MAX_IDS = 500
+
+# Máximo de ids aceptados en una actualización/eliminación masiva
+PRODUCT_BULK_MAX_IDS = 5000
+
+# Máximo de códigos por lectura en lote (checkout de varios ítems)
+PRODUCT_SCAN_MAX_CODES = 200
+
+# SKU / código de barras: letras, dígitos y guiones, sin espacios
+ProductCode = Annotated[
+    str,
+    StringConstraints(strip_whitespace=True, pattern=r"^[0-9A-Za-z\-]{1,64}$"),
+]
+
+# Similitud estimada (Jaccard de trigramas) desde la que se reporta un duplicado
+DEFAULT_DUPLICATE_THRESHOLD = 0.5
 
 
 class ProductCreate(BaseModel):
@@ -9,6 +30,8 @@ class ProductCreate(BaseModel):
     description: str
     category_id: Optional[uuid.UUID] = None
     image_url: Optional[str] = None
+    sku: Optional[ProductCode] = None
+    barcode: Optional[ProductCode] = None
 
 
 class ProductUpdate(BaseModel):
@@ -16,6 +39,8 @@ class ProductUpdate(BaseModel):
     description: Optional[str] = None
     category_id: Optional[uuid.UUID] = None
     image_url: Optional[str] = None
+    sku: Optional[ProductCode] = None
+    barcode: Optional[ProductCode] = None
 
 
 class ProductResponse(BaseModel):
@@ -24,6 +49,100 @@ class ProductResponse(BaseModel):
     description: str
     category_id: Optional[uuid.UUID] = None
     image_url: Optional[str] = None
+    sku: Optional[str] = None
+    barcode: Optional[str] = None
 
     class Config:
         from_attributes = True
+
+
+class ProductSort(str, Enum):
+    """Claves de ordenamiento permitidas para el listado de productos."""
+
+    NAME = "name"
+    NAME_DESC = "-name"
+    CATEGORY = "category"
+
+
+class ProductFileFormat(str, Enum):
+    """Formatos de archivo para importación y exportación del catálogo."""
+
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+class ProductBatchGetRequest(BaseModel):
+    ids: List[uuid.UUID] = Field(..., min_length=1, max_length=PRODUCT_BATCH_MAX_IDS)
+
+
+class ProductBulkFilter(BaseModel):
+    category_id: Optional[List[uuid.UUID]] = None
+    name_prefix: Optional[str] = Field(None, min_length=1, max_length=100)
+    has_image: Optional[bool] = None
+
+
+class ProductBulkSelection(BaseModel):
+    ids: Optional[List[uuid.UUID]] = Field(
+        None, min_length=1, max_length=PRODUCT_BULK_MAX_IDS
+    )
+    filters: Optional[ProductBulkFilter] = None
+
+
+# El nombre no se puede modificar en masa (restricción única product_pk_2)
+class ProductBulkPatch(BaseModel):
+    description: Optional[str] = None
+    category_id: Optional[uuid.UUID] = None
+    image_url: Optional[str] = None
+
+    @field_validator("description")
+    @classmethod
+    def check_description(cls, value: Optional[str]) -> str:
+        # La columna es NOT NULL: omitir el campo para no modificarlo
+        if value is None:
+            raise ValueError("description cannot be null")
+        return value
+
+
+class ProductBulkUpdateRequest(ProductBulkSelection):
+    patch: ProductBulkPatch
+
+
+class ProductBulkDeleteRequest(ProductBulkSelection):
+    pass
+
+
+class ProductAttributesUpdate(BaseModel):
+    """
+    Atributos tipados de un producto. Reemplaza el conjunto completo: los
+    atributos omitidos o en null se eliminan.
+    """
+
+    species: Optional[str] = Field(None, min_length=1, max_length=50)
+    life_stage: Optional[str] = Field(None, min_length=1, max_length=50)
+    brand: Optional[str] = Field(None, min_length=1, max_length=100)
+    weight: Optional[str] = Field(None, min_length=1, max_length=50)
+    medication_type: Optional[str] = Field(None, min_length=1, max_length=50)
+
+    @field_validator("*")
+    @classmethod
+    def check_value(cls, value: Optional[str], info) -> Optional[str]:
+        if value is None:
+            return None
+        value = normalize_attribute_value(value)
+        allowed = ATTRIBUTE_VALUES[info.field_name]
+        if allowed is not None and value not in allowed:
+            raise ValueError(f"must be one of {list(allowed)}")
+        return value
+
+
+class ProductDuplicateCheck(BaseModel):
+    name: str = Field(..., min_length=1, max_length=200)
+    description: Optional[str] = None
+    # Producto existente a excluir (al editar)
+    exclude_id: Optional[uuid.UUID] = None
+    threshold: float = Field(DEFAULT_DUPLICATE_THRESHOLD, gt=0, le=1)
+    limit: int = Field(10, ge=1, le=100)
+
+
+class ProductScanRequest(BaseModel):
+    codes: List[str] = Field(..., min_length=1, max_length=PRODUCT_SCAN_MAX_CODES)
@@ -44,6 +44,18 @@ class UserResponse(BaseModel):
         from_attributes = True
 
 
+class UserListItem(BaseModel):
+    """
+    Usuario del listado. Con `fields=` solo vienen los campos pedidos (el id
+    siempre), por eso el resto es opcional.
+    """
+
+    id: uuid.UUID
+    email: Optional[str] = None
+    uid: Optional[str] = None
+    person: Optional[PersonResponse] = None
+
+
 class PersonUpdate(BaseModel):
     name: Optional[str] = None
     last_name: Optional[str] = None
@@ -0,0 +1,155 @@
+import uuid
+from typing import Dict, Iterable, List
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from database import engine
+from models_db import InventoryStock, Location, ProductAvailability
+from schemas.inventory import AvailabilityRequest
+
+_INSERT_BY_DIALECT = {
+    "postgresql": postgresql_insert,
+    "sqlite": sqlite_insert,
+}
+
+# Productos por transacción al reconstruir el agregado
+_REBUILD_BATCH_SIZE = 500
+
+
+def _stock_by_location(
+    session: Session, product_ids: List[uuid.UUID]
+) -> Dict[uuid.UUID, Dict[str, int]]:
+    """Cantidad por ubicación (solo las que tienen stock) de cada producto."""
+    rows = session.execute(
+        select(
+            InventoryStock.product_id,
+            InventoryStock.location,
+            func.sum(InventoryStock.quantity).label("quantity"),
+        )
+        .where(InventoryStock.product_id.in_(product_ids))
+        .group_by(InventoryStock.product_id, InventoryStock.location)
+        .order_by(InventoryStock.product_id, InventoryStock.location)
+    )
+    stock: Dict[uuid.UUID, Dict[str, int]] = {}
+    for row in rows:
+        if row.quantity > 0:
+            stock.setdefault(row.product_id, {})[row.location] = row.quantity
+    return stock
+
+
+def refresh_availability(product_ids: Iterable[uuid.UUID]) -> None:
+    """
+    Recalcula el agregado de disponibilidad de los productos.
+
+    Corre en una transacción corta aparte, después de confirmar el cambio de
+    stock: actualizarlo dentro de ella haría que todas las ventas de un
+    producto esperaran por la misma fila, anulando el reparto en slots.
+    Bloquea la fila del agregado antes de leer los slots, así de dos
+    recálculos simultáneos el último siempre ve el stock más reciente.
+    """
+    product_ids = sorted(set(product_ids), key=str)
+    if not product_ids:
+        return
+    insert = _INSERT_BY_DIALECT[engine.dialect.name]
+    with Session(engine) as session:
+        session.execute(
+            insert(ProductAvailability)
+            .values(
+                [
+                    {"product_id": product_id, "total": 0, "locations": {}}
+                    for product_id in product_ids
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=[ProductAvailability.product_id])
+        )
+        session.execute(
+            select(ProductAvailability.product_id)
+            .where(ProductAvailability.product_id.in_(product_ids))
+            .order_by(ProductAvailability.product_id)
+            .with_for_update()
+        ).all()
+        stock = _stock_by_location(session, product_ids)
+        for product_id in product_ids:
+            locations = stock.get(product_id, {})
+            session.execute(
+                update(ProductAvailability)
+                .where(ProductAvailability.product_id == product_id)
+                .values(
+                    total=sum(locations.values()),
+                    locations=locations,
+                    updated_at=func.now(),
+                )
+                .execution_options(synchronize_session=False)
+            )
+        session.commit()
+
+
+def ensure_product_availability() -> int:
+    """
+    Calcula el agregado de los productos con stock que aún no lo tienen
+    (stock anterior al agregado). Devuelve la cantidad de productos calculados.
+    """
+    with Session(engine) as session:
+        missing = (
+            session.execute(
+                select(InventoryStock.product_id)
+                .distinct()
+                .where(
+                    ~select(ProductAvailability.product_id)
+                    .where(ProductAvailability.product_id == InventoryStock.product_id)
+                    .exists()
+                )
+            )
+            .scalars()
+            .all()
+        )
+    for start in range(0, len(missing), _REBUILD_BATCH_SIZE):
+        refresh_availability(missing[start : start + _REBUILD_BATCH_SIZE])
+    return len(missing)
+
+
+def get_availability_service(request: AvailabilityRequest) -> dict:
+    """
+    Servicio para consultar la disponibilidad de varios productos: total y
+    cantidad por ubicación, leídos del agregado en una sola consulta. Con
+    `location_kind` solo cuenta las ubicaciones activas de ese tipo (p. ej.
+    tiendas donde conseguir el producto).
+    """
+    with Session(engine) as session:
+        rows = session.execute(
+            select(ProductAvailability.product_id, ProductAvailability.locations).where(
+                ProductAvailability.product_id.in_(request.product_ids)
+            )
+        )
+        stock = {row.product_id: row.locations for row in rows}
+        allowed = None
+        if request.location_kind is not None:
+            allowed = set(
+                session.scalars(
+                    select(Location.code).where(
+                        Location.kind == request.location_kind.value,
+                        Location.active.is_(True),
+                    )
+                )
+            )
+
+    items = []
+    for product_id in request.product_ids:
+        locations = stock.get(product_id, {})
+        if allowed is not None:
+            locations = {
+                code: quantity
+                for code, quantity in locations.items()
+                if code in allowed
+            }
+        items.append(
+            {
+                "product_id": str(product_id),
+                "total": sum(locations.values()),
+                "locations": locations,
+            }
+        )
+    return {"items": items}
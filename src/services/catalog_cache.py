@@ -0,0 +1,93 @@
+import uuid
+from typing import List, Optional, Sequence, Tuple, Union
+
+from config.settings import settings
+from services.catalog_events import on_products_changed
+from utils.tag_cache import SharedTagVersions, TagCache
+
+# Listados (productos y categorías)
+CATALOG_TAG = "catalog"
+# Todos los productos individuales (escrituras masivas)
+PRODUCTS_TAG = "products"
+# Índices de productos en memoria: cualquier escritura de productos
+PRODUCT_INDEXES_TAG = "product-indexes"
+# Atributos tipados de productos (índice de facetas)
+PRODUCT_ATTRIBUTES_TAG = "product-attributes"
+
+# Versiones por tag compartidas entre workers; también derivan los ETag
+tag_versions = SharedTagVersions(settings.CACHE_VERSIONS_FILE)
+
+catalog_cache = TagCache(
+    tag_versions,
+    max_entries=settings.CACHE_MAX_ENTRIES,
+    ttl=settings.CACHE_TTL_SECONDS,
+    negative_ttl=settings.CACHE_NEGATIVE_TTL_SECONDS,
+    enabled=settings.CACHE_ENABLED,
+)
+
+
+def product_tag(product_id: Union[uuid.UUID, str]) -> str:
+    return f"product:{product_id}"
+
+
+def category_tag(category_id: Union[uuid.UUID, str]) -> str:
+    return f"category:{category_id}"
+
+
+def user_tag(uid: str) -> str:
+    return f"user:{uid}"
+
+
+def invalidate_category(category_id: Union[uuid.UUID, str]) -> None:
+    """Invalida una categoría y los listados (llamar después del commit)."""
+    catalog_cache.invalidate(CATALOG_TAG, category_tag(category_id))
+
+
+class SharedIndexVersion:
+    """
+    Versión compartida de un índice en memoria construido desde la base de
+    datos, para detectar las escrituras hechas por otros workers.
+
+    Cada escritura incrementa los `tags` en todos los workers. El índice
+    anota los contadores con que se cargó y suma uno por cada escritura
+    local que se aplica a sí mismo: si los contadores compartidos avanzaron
+    más que eso, otro worker escribió y hay que recargarlo. Un desfase
+    momentáneo (contador incrementado y escritura aún sin aplicar) solo
+    provoca una recarga de más.
+    """
+
+    def __init__(self, tags: Sequence[str] = (PRODUCT_INDEXES_TAG,)):
+        self._tags = tuple(tags)
+        self._expected: Optional[Tuple[int, ...]] = None
+
+    def current(self) -> Tuple[int, ...]:
+        """Contadores actuales; tomarlos antes de leer la base de datos."""
+        return tag_versions.snapshot(self._tags)
+
+    def loaded(self, version: Tuple[int, ...]) -> None:
+        self._expected = version
+
+    def applied(self, tag: str = PRODUCT_INDEXES_TAG) -> None:
+        """Cuenta una escritura local de `tag` ya aplicada al índice."""
+        if self._expected is None:
+            return
+        expected = list(self._expected)
+        expected[1 + self._tags.index(tag)] += 1  # la posición 0 es el epoch
+        self._expected = tuple(expected)
+
+    def is_current(self) -> bool:
+        return self._expected is not None and self._expected == self.current()
+
+
+@on_products_changed
+def _invalidate_products(saved: List[dict], deleted_ids: List[str], bulk: bool):
+    """Invalida los productos escritos y los listados del catálogo."""
+    if bulk:
+        catalog_cache.invalidate(CATALOG_TAG, PRODUCTS_TAG, PRODUCT_INDEXES_TAG)
+        return
+    catalog_cache.invalidate(
+        CATALOG_TAG,
+        PRODUCT_INDEXES_TAG,
+        *(product_tag(product["id"]) for product in saved),
+        *(product_tag(product_id) for product_id in deleted_ids),
+    )
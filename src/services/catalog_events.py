@@ -0,0 +1,33 @@
+from typing import Callable, Iterable, List
+
+# Listener(saved, deleted_ids, bulk):
+#   saved: productos creados/actualizados serializados con product_to_dict
+#   deleted_ids: ids (str) de productos eliminados
+#   bulk: True si la escritura fue masiva y el detalle no está disponible
+ProductListener = Callable[[List[dict], List[str], bool], None]
+
+_product_listeners: List[ProductListener] = []
+
+
+def on_products_changed(listener: ProductListener) -> ProductListener:
+    """
+    Registra una función que se ejecuta después de cada escritura de productos.
+    Se usa como decorador por los índices en memoria que deben mantenerse
+    sincronizados con la tabla `product`.
+    """
+    _product_listeners.append(listener)
+    return listener
+
+
+def notify_products_changed(
+    saved: Iterable[dict] = (),
+    deleted_ids: Iterable[str] = (),
+    bulk: bool = False,
+) -> None:
+    """
+    Notifica a los listeners registrados una escritura ya confirmada (commit).
+    """
+    saved = list(saved)
+    deleted_ids = list(deleted_ids)
+    for listener in _product_listeners:
+        listener(saved, deleted_ids, bulk)
@@ -0,0 +1,199 @@
+import json
+import mmap
+import os
+import struct
+import threading
+from collections import namedtuple
+from functools import partial
+from typing import Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from config.settings import settings
+from database import engine
+from models_db import Category, Product
+from services.catalog_cache import CATALOG_TAG, PRODUCTS_TAG, tag_versions
+from services.catalog_version import current_catalog_version
+from services.category_service import CATEGORY_FIELDS
+from services.product_service import PRODUCT_FIELDS, product_list_item, product_to_dict
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos
+    fcntl = None
+
+SNAPSHOT_MAGIC = b"MAPOSNP1"
+
+# magic, versión del catálogo, versiones de los tags (epoch, catalog, products),
+# offset y largo del JSON de productos, offset y largo del JSON de categorías
+_HEADER = struct.Struct("<8sQ3QQQQQ")
+
+_SnapshotHeader = namedtuple(
+    "_SnapshotHeader",
+    "version tags products_offset products_length categories_offset categories_length",
+)
+
+# Tags cuyas versiones determinan si el snapshot está vigente
+SNAPSHOT_TAGS = (CATALOG_TAG, PRODUCTS_TAG)
+
+# Filas leídas por lote al construir el snapshot
+SNAPSHOT_BATCH_SIZE = 1000
+
+
+def _json_array(rows, to_dict) -> bytes:
+    return (
+        "[" + ",".join(json.dumps(to_dict(row), ensure_ascii=False) for row in rows) + "]"
+    ).encode()
+
+
+def build_catalog_snapshot(path: str) -> Optional[int]:
+    """
+    Construye el snapshot del catálogo y lo publica de forma atómica.
+
+    Escribe el listado completo de productos (orden por nombre, como
+    GET /products) y de categorías ya serializados en JSON detrás de un
+    header binario con sus offsets, en un archivo temporal que reemplaza al
+    anterior con os.replace. Los workers que tienen mapeado el archivo viejo
+    lo siguen leyendo sin interrupciones hasta que cambian al nuevo.
+
+    Si otro proceso ya está construyendo el snapshot no hace nada.
+
+    Returns:
+        Versión del catálogo publicada, o None si no se construyó.
+    """
+    lock_fd = os.open(path + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return None
+
+        # Versiones tomadas antes de leer: un cambio concurrente deja el
+        # snapshot marcado como viejo en lugar de servir datos mezclados
+        tags = tag_versions.snapshot(SNAPSHOT_TAGS)
+        with Session(engine) as session:
+            version = current_catalog_version(session)
+            products = session.query(
+                *[getattr(Product, field) for field in PRODUCT_FIELDS]
+            ).order_by(Product.name)
+            products_json = _json_array(
+                products.yield_per(SNAPSHOT_BATCH_SIZE), product_list_item
+            )
+            categories = session.query(
+                *[getattr(Category, field) for field in CATEGORY_FIELDS]
+            ).order_by(Category.name)
+            # product_to_dict serializa cualquier fila por columnas
+            categories_json = _json_array(
+                categories, partial(product_to_dict, fields=CATEGORY_FIELDS)
+            )
+
+        products_offset = _HEADER.size
+        categories_offset = products_offset + len(products_json)
+        header = _HEADER.pack(
+            SNAPSHOT_MAGIC,
+            version,
+            *tags,
+            products_offset,
+            len(products_json),
+            categories_offset,
+            len(categories_json),
+        )
+
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as file:
+            file.write(header)
+            file.write(products_json)
+            file.write(categories_json)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+        return version
+    finally:
+        os.close(lock_fd)
+
+
+class CatalogSnapshot:
+    """
+    Lector del snapshot del catálogo, mapeado en memoria de solo lectura.
+
+    Todos los workers del nodo comparten las mismas páginas del archivo (una
+    sola copia del catálogo en RAM) y un worker nuevo lo usa apenas arranca,
+    sin reconstruir nada. Los listados se devuelven como memoryview sobre el
+    mmap, listos para enviar sin copiar ni serializar.
+
+    Si el snapshot falta o quedó viejo (cambiaron las versiones de sus tags)
+    los métodos devuelven None, para que el llamador use la base de datos, y
+    se reconstruye en segundo plano.
+    """
+
+    def __init__(self, path: str, enabled: bool = True):
+        self.path = path
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._mapping: Optional[mmap.mmap] = None
+        self._header: Optional[_SnapshotHeader] = None
+        self._file_id: Optional[Tuple[int, int]] = None
+        self._rebuilding = False
+
+    def products_json(self) -> Optional[memoryview]:
+        """JSON del listado completo de productos, o None si no está vigente."""
+        return self._section("products")
+
+    def categories_json(self) -> Optional[memoryview]:
+        """JSON del listado completo de categorías, o None si no está vigente."""
+        return self._section("categories")
+
+    def version(self) -> Optional[int]:
+        """Versión del catálogo del snapshot mapeado."""
+        with self._lock:
+            header = self._current_header()
+        return header.version if header else None
+
+    def _section(self, name: str) -> Optional[memoryview]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            header = self._current_header()
+            if header is None or header.tags != tag_versions.snapshot(SNAPSHOT_TAGS):
+                self._rebuild_in_background()
+                return None
+            offset = getattr(header, f"{name}_offset")
+            length = getattr(header, f"{name}_length")
+            return memoryview(self._mapping)[offset : offset + length]
+
+    def _current_header(self) -> Optional[_SnapshotHeader]:
+        """Mapea el archivo si se publicó uno nuevo (otro inode) desde la última vez."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        file_id = (stat.st_ino, stat.st_mtime_ns)
+        if file_id != self._file_id:
+            with open(self.path, "rb") as file:
+                mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, *fields = _HEADER.unpack_from(mapping, 0)
+            if magic != SNAPSHOT_MAGIC:
+                return None
+            header = _SnapshotHeader(version, tuple(fields[:3]), *fields[3:])
+            # El mapeo anterior se libera cuando no quedan memoryviews vivos
+            self._mapping, self._header, self._file_id = mapping, header, file_id
+        return self._header
+
+    def _rebuild_in_background(self) -> None:
+        if self._rebuilding:
+            return
+        self._rebuilding = True
+
+        def rebuild():
+            try:
+                build_catalog_snapshot(self.path)
+            finally:
+                self._rebuilding = False
+
+        threading.Thread(target=rebuild, name="catalog-snapshot", daemon=True).start()
+
+
+catalog_snapshot = CatalogSnapshot(
+    settings.CATALOG_SNAPSHOT_FILE, enabled=settings.CATALOG_SNAPSHOT_ENABLED
+)
@@ -0,0 +1,84 @@
+import uuid
+from typing import Iterable
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from database import engine
+from models_db import CatalogTombstone, CatalogVersion, Category, Product
+
+CATALOG_COUNTER = "catalog"
+
+# Valores de CatalogTombstone.entity
+PRODUCT_ENTITY = "product"
+CATEGORY_ENTITY = "category"
+
+
+def next_catalog_version(session: Session) -> int:
+    """
+    Reserva la siguiente versión del catálogo dentro de la transacción de la
+    escritura. Debe llamarse en la misma sesión que hace el cambio, justo
+    antes del commit: la fila del contador queda bloqueada hasta entonces.
+    """
+    version = session.execute(
+        update(CatalogVersion)
+        .where(CatalogVersion.name == CATALOG_COUNTER)
+        .values(value=CatalogVersion.value + 1)
+        .returning(CatalogVersion.value)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+    if version is None:
+        version = 1
+        session.execute(
+            insert(CatalogVersion).values(name=CATALOG_COUNTER, value=version)
+        )
+    return version
+
+
+def current_catalog_version(session: Session) -> int:
+    """Última versión confirmada del catálogo (0 si nunca hubo escrituras)."""
+    version = session.execute(
+        select(CatalogVersion.value).where(CatalogVersion.name == CATALOG_COUNTER)
+    ).scalar()
+    return version or 0
+
+
+def record_tombstones(
+    session: Session, entity: str, entity_ids: Iterable[uuid.UUID], version: int
+) -> None:
+    """Registra las eliminaciones de `entity` con la versión de la escritura."""
+    rows = [
+        {"entity": entity, "entity_id": entity_id, "version": version}
+        for entity_id in entity_ids
+    ]
+    if rows:
+        session.execute(insert(CatalogTombstone), rows)
+
+
+def ensure_catalog_versions() -> int:
+    """
+    Asigna una versión a los productos y categorías escritos antes de existir
+    el feed de cambios (version = 0), para que una sincronización completa
+    (since=0) los incluya.
+
+    Returns:
+        Versión asignada, o 0 si no había filas sin versión.
+    """
+    with Session(engine) as session:
+        legacy = [
+            model
+            for model in (Product, Category)
+            if session.execute(select(model.id).where(model.version == 0).limit(1)).first()
+        ]
+        if not legacy:
+            return 0
+        version = next_catalog_version(session)
+        for model in legacy:
+            session.execute(
+                update(model)
+                .where(model.version == 0)
+                .values(version=version)
+                .execution_options(synchronize_session=False)
+            )
+        session.commit()
+        return version
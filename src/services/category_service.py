@@ -1,12 +1,29 @@
 from contextlib import contextmanager
-from typing import Dict, List, Optional, Any
-from uuid import UUID
+from typing import Dict, List, Optional, Any, Sequence
+from uuid import UUID, uuid4
 
 from database import engine
-from models_db import Category
+from models_db import Category, CategoryClosure, Product
 from schemas.category import CategoryCreate, CategoryUpdate, CategoryOut
+from services.catalog_cache import (
+    CATALOG_TAG,
+    catalog_cache,
+    category_tag,
+    invalidate_category,
+)
+from services.catalog_version import (
+    CATEGORY_ENTITY,
+    next_catalog_version,
+    record_tombstones,
+)
+from services.product_service import product_to_dict
+from sqlalchemy import Uuid, delete, func, insert, literal, select
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
+
+
+# Campos que pueden pedirse con `fields=` (en orden de serialización)
+CATEGORY_FIELDS = ("id", "name", "description", "parent_id")
 
 
 @contextmanager
@@ -21,20 +38,23 @@ def get_db_session():
     finally:
         session.close()
 
-def _category_to_dict(category: Category) -> Dict[str, Optional[str]]:
-    """Convert a Category model instance to a dictionary.
+def _category_to_dict(
+    category: Category, fields: Sequence[str] = CATEGORY_FIELDS
+) -> Dict[str, Optional[str]]:
+    """Convert a Category model instance (or column row) to a dictionary.
     
     Args:
-        category: The Category model instance to convert.
+        category: The Category model instance or row to convert.
+        fields: Fields to include in the result.
         
     Returns:
         Dict containing the category's data.
     """
-    return {
-        "id": str(category.id),
-        "name": category.name,
-        "description": category.description,
-    }
+    data = {field: getattr(category, field) for field in fields}
+    for field in ("id", "parent_id"):
+        if data.get(field) is not None:
+            data[field] = str(data[field])
+    return data
 
 def _handle_db_error(error: Exception) -> Dict[str, str]:
     """Handle database errors and return appropriate error response.
@@ -55,8 +75,63 @@ def _handle_db_error(error: Exception) -> Dict[str, str]:
         "detail": str(error.orig) if hasattr(error, "orig") else str(error)
     }
 
+def _not_found(category_id: UUID) -> Dict[str, str]:
+    return {
+        "error": "not_found",
+        "detail": f"Category with id {category_id} not found"
+    }
+
+def _insert_closure_rows(db: Session, category_id: UUID, parent_id: Optional[UUID]):
+    """Insert the closure rows of a new leaf category.
+    
+    The category becomes its own ancestor at depth 0 and inherits every
+    ancestor of its parent with depth + 1, in one INSERT ... SELECT.
+    
+    Args:
+        db: Active database session.
+        category_id: The new category's UUID.
+        parent_id: The parent category UUID, or None for a root category.
+    """
+    db.add(CategoryClosure(ancestor_id=category_id, descendant_id=category_id, depth=0))
+    if parent_id is not None:
+        db.execute(
+            insert(CategoryClosure).from_select(
+                ["ancestor_id", "descendant_id", "depth"],
+                select(
+                    CategoryClosure.ancestor_id,
+                    literal(category_id, Uuid),
+                    CategoryClosure.depth + 1,
+                ).where(CategoryClosure.descendant_id == parent_id),
+            )
+        )
+
+def ensure_category_closure() -> int:
+    """Add the self row for categories that have no closure rows yet.
+    
+    Categories created before the hierarchy existed are roots; this makes
+    them visible to subtree and breadcrumb queries. Runs in one statement.
+    
+    Returns:
+        Number of categories backfilled.
+    """
+    with get_db_session() as db:
+        missing = select(
+            Category.id, Category.id, literal(0)
+        ).where(
+            ~select(CategoryClosure.descendant_id)
+            .where(CategoryClosure.descendant_id == Category.id)
+            .exists()
+        )
+        result = db.execute(
+            insert(CategoryClosure).from_select(
+                ["ancestor_id", "descendant_id", "depth"], missing
+            )
+        )
+        db.commit()
+        return result.rowcount
+
 def create_category(category_data: CategoryCreate) -> Dict[str, Any]:
-    """Create a new category.
+    """Create a new category, optionally under a parent category.
     
     Args:
         category_data: Category data for creation.
@@ -64,29 +139,255 @@ def create_category(category_data: CategoryCreate) -> Dict[str, Any]:
     Returns:
         Dict containing the created category data or error information.
     """
+    parent_id = getattr(category_data, "parent_id", None)
     try:
         with get_db_session() as db:
+            if parent_id is not None and not db.get(Category, parent_id):
+                return _not_found(parent_id)
             new_category = Category(
+                id=uuid4(),
                 name=category_data.name,
-                description=category_data.description
+                description=category_data.description,
+                parent_id=parent_id,
+                version=next_catalog_version(db),
             )
             db.add(new_category)
+            db.flush()
+            _insert_closure_rows(db, new_category.id, parent_id)
             db.commit()
+            invalidate_category(new_category.id)
             db.refresh(new_category)
             return _category_to_dict(new_category)
     except Exception as e:
         return _handle_db_error(e)
 
-def get_categories() -> List[Dict[str, Any]]:
-    """Retrieve all categories.
+@catalog_cache.cached(tags=lambda *args, **kwargs: (CATALOG_TAG,))
+def get_categories(fields: Sequence[str] = CATEGORY_FIELDS) -> List[Dict[str, Any]]:
+    """Retrieve all categories ordered by name (same order as the snapshot).
     
+    Args:
+        fields: Fields to select and return (sparse fieldset).
+        
     Returns:
         List of category dictionaries.
     """
+    columns = [getattr(Category, field) for field in fields]
+    with get_db_session() as db:
+        rows = db.query(*columns).order_by(Category.name).all()
+        return [_category_to_dict(row, fields) for row in rows]
+
+def get_category_catalog(
+    include_products: bool = True, include_counts: bool = False
+) -> List[Dict[str, Any]]:
+    """Retrieve every category with its products and/or product counts.
+    
+    Products are loaded for all categories with a single extra SELECT ... IN
+    (selectinload) and counts with one GROUP BY, so the number of queries
+    does not grow with the number of categories.
+    
+    Args:
+        include_products: Whether to embed each category's products.
+        include_counts: Whether to add a `product_count` per category.
+        
+    Returns:
+        List of plain category dictionaries.
+    """
+    with get_db_session() as db:
+        query = db.query(Category).order_by(Category.name)
+        if include_products:
+            query = query.options(selectinload(Category.products))
+        categories = query.all()
+
+        counts = {}
+        if include_counts:
+            counts = dict(
+                db.query(Product.category_id, func.count(Product.id))
+                .group_by(Product.category_id)
+                .all()
+            )
+
+        catalog = []
+        for category in categories:
+            data = _category_to_dict(category)
+            if include_products:
+                data["products"] = [
+                    product_to_dict(product)
+                    for product in sorted(category.products, key=lambda p: p.name)
+                ]
+            if include_counts:
+                data["product_count"] = counts.get(category.id, 0)
+            catalog.append(data)
+        return catalog
+
+def get_category_products_service(category_id: UUID) -> Dict[str, Any]:
+    """Retrieve a category name and its products as plain dictionaries.
+    
+    Args:
+        category_id: The UUID of the category.
+        
+    Returns:
+        Dict with the category name and its products, or error information.
+    """
+    with get_db_session() as db:
+        category = (
+            db.query(Category.name).filter(Category.id == category_id).first()
+        )
+        if not category:
+            return {"error": "Category not found"}
+        products = (
+            db.query(Product)
+            .filter(Product.category_id == category_id)
+            .order_by(Product.name)
+            .all()
+        )
+        return {
+            "category": category.name,
+            "products": [product_to_dict(product) for product in products],
+        }
+
+def get_category_tree() -> List[Dict[str, Any]]:
+    """Retrieve the category hierarchy as nested dictionaries.
+    
+    Loads every category in one query and links children in memory.
+    
+    Returns:
+        List of root categories, each with a `children` list.
+    """
+    with get_db_session() as db:
+        categories = db.query(Category).order_by(Category.name).all()
+        nodes = {
+            category.id: {**_category_to_dict(category), "children": []}
+            for category in categories
+        }
+        roots = []
+        for category in categories:
+            parent = nodes.get(category.parent_id)
+            (parent["children"] if parent else roots).append(nodes[category.id])
+        return roots
+
+def get_category_breadcrumb_service(category_id: UUID) -> Any:
+    """Retrieve the path from the root category down to a category.
+    
+    Uses one query over the closure table (descendant_id, depth index).
+    
+    Args:
+        category_id: The UUID of the category.
+        
+    Returns:
+        List of category dictionaries from the root to the category, or
+        error information.
+    """
+    with get_db_session() as db:
+        path = (
+            db.query(Category)
+            .join(CategoryClosure, CategoryClosure.ancestor_id == Category.id)
+            .filter(CategoryClosure.descendant_id == category_id)
+            .order_by(CategoryClosure.depth.desc())
+            .all()
+        )
+        if not path:
+            return _not_found(category_id)
+        return [_category_to_dict(category) for category in path]
+
+def get_category_subtree_products_service(category_id: UUID) -> Dict[str, Any]:
+    """Retrieve all products of a category and of all its subcategories.
+    
+    Uses one query joining products with the closure table.
+    
+    Args:
+        category_id: The UUID of the root category of the subtree.
+        
+    Returns:
+        Dict with the category name and the subtree's products, or error
+        information.
+    """
     with get_db_session() as db:
-        categories = db.query(Category).all()
-        return [_category_to_dict(category) for category in categories]
+        category = db.query(Category.name).filter(Category.id == category_id).first()
+        if not category:
+            return {"error": "Category not found"}
+        products = (
+            db.query(Product)
+            .join(
+                CategoryClosure, CategoryClosure.descendant_id == Product.category_id
+            )
+            .filter(CategoryClosure.ancestor_id == category_id)
+            .order_by(Product.name)
+            .all()
+        )
+        return {
+            "category": category.name,
+            "products": [product_to_dict(product) for product in products],
+        }
 
+def move_category_service(
+    category_id: UUID, new_parent_id: Optional[UUID]
+) -> Dict[str, Any]:
+    """Move a category (and its whole subtree) under another parent.
+    
+    Only the closure rows linking the subtree to its old ancestors are
+    replaced, so the work is bounded by subtree size times depth.
+    
+    Args:
+        category_id: The UUID of the category to move.
+        new_parent_id: The new parent UUID, or None to make it a root.
+        
+    Returns:
+        Dict containing the moved category data or error information.
+    """
+    try:
+        with get_db_session() as db:
+            category = db.get(Category, category_id)
+            if not category:
+                return _not_found(category_id)
+            if new_parent_id is not None:
+                if not db.get(Category, new_parent_id):
+                    return _not_found(new_parent_id)
+                in_subtree = db.get(CategoryClosure, (category_id, new_parent_id))
+                if in_subtree:
+                    return {
+                        "error": "invalid_move",
+                        "detail": "A category cannot be moved into its own subtree"
+                    }
+
+            subtree = select(CategoryClosure.descendant_id).where(
+                CategoryClosure.ancestor_id == category_id
+            )
+            db.execute(
+                delete(CategoryClosure)
+                .where(CategoryClosure.descendant_id.in_(subtree))
+                .where(CategoryClosure.ancestor_id.notin_(subtree))
+            )
+            if new_parent_id is not None:
+                parent_path = select(CategoryClosure).where(
+                    CategoryClosure.descendant_id == new_parent_id
+                ).subquery()
+                subtree_rows = select(CategoryClosure).where(
+                    CategoryClosure.ancestor_id == category_id
+                ).subquery()
+                db.execute(
+                    insert(CategoryClosure).from_select(
+                        ["ancestor_id", "descendant_id", "depth"],
+                        select(
+                            parent_path.c.ancestor_id,
+                            subtree_rows.c.descendant_id,
+                            parent_path.c.depth + subtree_rows.c.depth + 1,
+                        ).select_from(parent_path.join(subtree_rows, literal(True))),
+                    )
+                )
+
+            category.parent_id = new_parent_id
+            category.version = next_catalog_version(db)
+            db.commit()
+            invalidate_category(category_id)
+            db.refresh(category)
+            return _category_to_dict(category)
+    except Exception as e:
+        return _handle_db_error(e)
+
+@catalog_cache.cached(
+    tags=lambda category_id: (category_tag(category_id),),
+    is_negative=lambda result: "error" in result,
+)
 def get_category_by_id_service(category_id: UUID) -> Dict[str, Any]:
     """Retrieve a category by its ID.
     
@@ -127,8 +428,10 @@ def update_category_service(category_id: UUID, category_data: CategoryUpdate) ->
             update_data = category_data.dict(exclude_unset=True)
             for key, value in update_data.items():
                 setattr(category, key, value)
+            category.version = next_catalog_version(db)
 
             db.commit()
+            invalidate_category(category_id)
             db.refresh(category)
             return _category_to_dict(category)
     except Exception as e:
@@ -152,8 +455,25 @@ def delete_category_service(category_id: UUID) -> Dict[str, Any]:
                     "error": "not_found",
                     "detail": f"Category with id {category_id} not found"
                 }
+            has_children = (
+                db.query(Category.id).filter(Category.parent_id == category_id).first()
+            )
+            if has_children:
+                return {
+                    "error": "has_subcategories",
+                    "detail": "Move or delete the subcategories first"
+                }
+            db.execute(
+                delete(CategoryClosure).where(
+                    CategoryClosure.descendant_id == category_id
+                )
+            )
             db.delete(category)
+            record_tombstones(
+                db, CATEGORY_ENTITY, [category_id], next_catalog_version(db)
+            )
             db.commit()
+            invalidate_category(category_id)
             return {
                 "message": "Category deleted successfully",
                 "id": str(category_id)
@@ -0,0 +1,103 @@
+import uuid
+from typing import Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import select, union_all
+from sqlalchemy.orm import Session
+
+from database import engine
+from models_db import CatalogTombstone, Category, Product
+from services.catalog_version import (
+    CATEGORY_ENTITY,
+    PRODUCT_ENTITY,
+    current_catalog_version,
+)
+from services.category_service import CATEGORY_FIELDS
+from services.product_service import PRODUCT_FIELDS
+
+# Cambios (filas + eliminaciones) devueltos por página del feed
+CHANGES_PAGE_SIZE = 1000
+
+
+def _encode_rows(rows, fields: Sequence[str]) -> dict:
+    """Codificación compacta: nombres de columna una vez y filas como listas."""
+    return {
+        "columns": list(fields),
+        "rows": [
+            [str(value) if isinstance(value, uuid.UUID) else value for value in row]
+            for row in rows
+        ],
+    }
+
+
+def get_catalog_changes_service(since: int, limit: int = CHANGES_PAGE_SIZE) -> dict:
+    """
+    Servicio del feed incremental del catálogo.
+
+    Devuelve productos y categorías escritos después de la versión `since`
+    y los ids eliminados desde entonces. Las páginas se cortan en un límite
+    de versión (una escritura masiva nunca queda partida); el cliente guarda
+    `version` y la envía como `since` en la siguiente sincronización, y
+    repite mientras `has_more` sea verdadero.
+    """
+    with Session(engine) as session:
+        # Todas las versiones <= current ya están confirmadas
+        current = current_catalog_version(session)
+        if since > current:
+            raise HTTPException(
+                status_code=409,
+                detail="Unknown catalog version, a full sync (since=0) is required",
+            )
+
+        changed_versions = union_all(
+            select(Product.version).where(Product.version > since),
+            select(Category.version).where(Category.version > since),
+            select(CatalogTombstone.version).where(CatalogTombstone.version > since),
+        ).subquery()
+        overflow_version = session.execute(
+            select(changed_versions.c.version)
+            .order_by(changed_versions.c.version)
+            .offset(limit)
+            .limit(1)
+        ).scalar()
+
+        upto = current
+        if overflow_version is not None:
+            # Cortar antes de la versión que no entra completa; si toda la
+            # página es de una sola versión, esa versión se devuelve completa
+            upto = overflow_version - 1 if overflow_version - 1 > since else overflow_version
+            upto = min(upto, current)
+
+        def changed(model):
+            return (model.version > since) & (model.version <= upto)
+
+        products = session.execute(
+            select(*[getattr(Product, field) for field in PRODUCT_FIELDS])
+            .where(changed(Product))
+            .order_by(Product.version)
+        ).all()
+        categories = session.execute(
+            select(*[getattr(Category, field) for field in CATEGORY_FIELDS])
+            .where(changed(Category))
+            .order_by(Category.version)
+        ).all()
+        tombstones = session.execute(
+            select(CatalogTombstone.entity, CatalogTombstone.entity_id)
+            .where(changed(CatalogTombstone))
+            .order_by(CatalogTombstone.version)
+        ).all()
+
+    deleted = {PRODUCT_ENTITY: [], CATEGORY_ENTITY: []}
+    for tombstone in tombstones:
+        deleted[tombstone.entity].append(str(tombstone.entity_id))
+
+    return {
+        "version": upto,
+        "has_more": upto < current,
+        "products": _encode_rows(products, PRODUCT_FIELDS),
+        "categories": _encode_rows(categories, CATEGORY_FIELDS),
+        "deleted": {
+            "products": deleted[PRODUCT_ENTITY],
+            "categories": deleted[CATEGORY_ENTITY],
+        },
+    }
@@ -0,0 +1,120 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from database import engine
+from models_db import Product
+from schemas.product import DEFAULT_DUPLICATE_THRESHOLD, ProductDuplicateCheck
+from services.catalog_cache import SharedIndexVersion
+from services.catalog_events import on_products_changed
+from utils.minhash import MinHashLSH, np
+
+_duplicate_index: Optional[MinHashLSH] = None
+_names: Dict[str, str] = {}
+_index_loaded = False
+_index_lock = threading.Lock()
+# Escrituras de otros workers (las firmas son por proceso)
+_index_version = SharedIndexVersion()
+
+
+def _product_text(name: Optional[str], description: Optional[str]) -> str:
+    return f"{name or ''} {description or ''}"
+
+
+def _ensure_index_loaded() -> Tuple[MinHashLSH, Dict[str, str]]:
+    """
+    Calcula las firmas de todo el catálogo la primera vez que se usan, y las
+    recalcula si otro worker escribió productos. Las escrituras de este
+    worker las mantienen actualizadas. Devuelve (índice, nombres por id).
+
+    El recálculo llena un índice y un diccionario de nombres nuevos y recién
+    al terminar reemplaza ambos: una consulta concurrente sigue usando el par
+    anterior completo.
+    """
+    global _duplicate_index, _names, _index_loaded
+    if np is None:
+        raise HTTPException(status_code=503, detail="Duplicate detection not available")
+    if _index_loaded and _index_version.is_current():
+        return _duplicate_index, _names
+    with _index_lock:
+        if _index_loaded and _index_version.is_current():
+            return _duplicate_index, _names
+        version = _index_version.current()
+        index = MinHashLSH()
+        names: Dict[str, str] = {}
+        with Session(engine) as session:
+            rows = session.query(Product.id, Product.name, Product.description)
+            items = []
+            for row in rows.yield_per(1000):
+                product_id = str(row.id)
+                names[product_id] = row.name
+                items.append((product_id, _product_text(row.name, row.description)))
+        index.add_many(items)
+        _duplicate_index, _names = index, names
+        _index_loaded = True
+        _index_version.loaded(version)
+        return index, names
+
+
+@on_products_changed
+def _sync_duplicate_index(saved: List[dict], deleted_ids: List[str], bulk: bool):
+    """
+    Mantiene las firmas al día con las escrituras de productos.
+    Si no están cargadas no hace nada: se calcularán al primer uso.
+    """
+    global _index_loaded
+    with _index_lock:
+        if not _index_loaded:
+            return
+        if bulk:
+            _index_loaded = False
+            return
+        for product in saved:
+            _names[product["id"]] = product["name"]
+        _duplicate_index.add_many(
+            (product["id"], _product_text(product["name"], product["description"]))
+            for product in saved
+        )
+        for product_id in deleted_ids:
+            _names.pop(product_id, None)
+            _duplicate_index.remove(product_id)
+        _index_version.applied()
+
+
+def find_duplicate_clusters_service(
+    threshold: float = DEFAULT_DUPLICATE_THRESHOLD,
+) -> dict:
+    """
+    Servicio para encontrar grupos de productos casi duplicados en todo el
+    catálogo (nombre + descripción).
+    """
+    index, names = _ensure_index_loaded()
+    clusters = [
+        [
+            {"id": product_id, "name": names.get(product_id), "similarity": score}
+            for product_id, score in cluster
+        ]
+        for cluster in index.clusters(threshold)
+    ]
+    return {"total": len(clusters), "clusters": clusters}
+
+
+def check_duplicates_service(request: ProductDuplicateCheck) -> dict:
+    """
+    Servicio para buscar productos parecidos a uno nuevo (o a uno existente,
+    excluyéndolo con `exclude_id`). Solo compara contra los candidatos de LSH.
+    """
+    index, names = _ensure_index_loaded()
+    matches = index.query(
+        _product_text(request.name, request.description),
+        threshold=request.threshold,
+        exclude=str(request.exclude_id) if request.exclude_id else None,
+    )
+    return {
+        "duplicates": [
+            {"id": product_id, "name": names.get(product_id), "similarity": score}
+            for product_id, score in matches[: request.limit]
+        ]
+    }
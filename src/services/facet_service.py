@@ -0,0 +1,161 @@
+import threading
+import uuid
+from typing import Dict, List, Optional, Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from constants.product_attributes import ProductAttributeEnum
+from database import engine
+from models_db import Product, ProductAttribute
+from schemas.product import ProductAttributesUpdate
+from services.catalog_cache import (
+    PRODUCT_ATTRIBUTES_TAG,
+    PRODUCT_INDEXES_TAG,
+    SharedIndexVersion,
+    tag_versions,
+)
+from services.catalog_events import on_products_changed
+from services.product_service import PRODUCT_FIELDS, product_to_dict
+from utils.facet_index import FacetIndex
+
+FACET_ATTRIBUTES = tuple(attribute.value for attribute in ProductAttributeEnum)
+
+product_facet_index = FacetIndex()
+_index_loaded = False
+_index_lock = threading.Lock()
+# Escrituras de otros workers, de productos o de atributos (índice por proceso)
+_index_version = SharedIndexVersion((PRODUCT_INDEXES_TAG, PRODUCT_ATTRIBUTES_TAG))
+
+
+def _ensure_index_loaded() -> FacetIndex:
+    """
+    Construye los bitmaps desde la base de datos la primera vez que se usan,
+    y los reconstruye si otro worker escribió productos o atributos. Las
+    escrituras de este worker los mantienen actualizados.
+
+    La reconstrucción llena un índice nuevo y recién al terminar reemplaza
+    al anterior: una búsqueda concurrente nunca ve un índice a medio cargar.
+    """
+    global product_facet_index, _index_loaded
+    if _index_loaded and _index_version.is_current():
+        return product_facet_index
+    with _index_lock:
+        if _index_loaded and _index_version.is_current():
+            return product_facet_index
+        version = _index_version.current()
+        index = FacetIndex()
+        with Session(engine) as session:
+            attributes: Dict[uuid.UUID, Dict[str, str]] = {}
+            rows = session.query(
+                ProductAttribute.product_id,
+                ProductAttribute.attribute,
+                ProductAttribute.value,
+            )
+            for row in rows.yield_per(1000):
+                attributes.setdefault(row.product_id, {})[row.attribute] = row.value
+            for row in session.query(Product.id, Product.name).yield_per(1000):
+                index.upsert(str(row.id), row.name, attributes.get(row.id, {}))
+        product_facet_index = index
+        _index_loaded = True
+        _index_version.loaded(version)
+        return index
+
+
+@on_products_changed
+def _sync_facet_index(saved: List[dict], deleted_ids: List[str], bulk: bool):
+    """
+    Mantiene los bitmaps al día con las escrituras de productos.
+    Si no están cargados no hace nada: se construirán completos al primer uso.
+    """
+    global _index_loaded
+    with _index_lock:
+        if not _index_loaded:
+            return
+        if bulk:
+            _index_loaded = False
+            return
+        # Crear o renombrar un producto conserva sus atributos
+        for product in saved:
+            product_facet_index.upsert(
+                product["id"],
+                product["name"],
+                product_facet_index.attributes(product["id"]),
+            )
+        for product_id in deleted_ids:
+            product_facet_index.remove(product_id)
+        _index_version.applied()
+
+
+def get_product_attributes_service(product_id: uuid.UUID) -> dict:
+    """
+    Servicio para obtener los atributos tipados de un producto.
+    """
+    with Session(engine) as session:
+        if not session.get(Product, product_id):
+            raise HTTPException(status_code=404, detail="Product not found")
+        rows = session.query(ProductAttribute.attribute, ProductAttribute.value).filter(
+            ProductAttribute.product_id == product_id
+        )
+        return {row.attribute: row.value for row in rows}
+
+
+def set_product_attributes_service(
+    product_id: uuid.UUID, attributes_data: ProductAttributesUpdate
+) -> dict:
+    """
+    Servicio para reemplazar los atributos tipados de un producto.
+    Actualiza los bitmaps del producto sin reconstruir el índice.
+    """
+    attributes = attributes_data.model_dump(exclude_none=True)
+    with Session(engine) as session:
+        product = session.get(Product, product_id)
+        if not product:
+            raise HTTPException(status_code=404, detail="Product not found")
+        session.execute(
+            delete(ProductAttribute).where(ProductAttribute.product_id == product_id)
+        )
+        session.add_all(
+            ProductAttribute(product_id=product_id, attribute=attribute, value=value)
+            for attribute, value in attributes.items()
+        )
+        session.commit()
+        name = product.name
+
+    with _index_lock:
+        if _index_loaded:
+            product_facet_index.upsert(str(product_id), name, attributes)
+            _index_version.applied(PRODUCT_ATTRIBUTES_TAG)
+    tag_versions.bump([PRODUCT_ATTRIBUTES_TAG])
+    return attributes
+
+
+def facet_search_service(
+    filters: Dict[str, Optional[List[str]]],
+    skip: int = 0,
+    limit: int = 20,
+    fields: Sequence[str] = PRODUCT_FIELDS,
+) -> dict:
+    """
+    Servicio de filtrado por facetas.
+    Resuelve filtros y conteos con los bitmaps en memoria y solo consulta la
+    base de datos para los productos de la página pedida.
+    """
+    total, product_ids, facets = _ensure_index_loaded().search(
+        filters, FACET_ATTRIBUTES, skip=skip, limit=limit
+    )
+
+    products = []
+    if product_ids:
+        columns = [getattr(Product, field) for field in fields]
+        with Session(engine) as session:
+            rows = (
+                session.query(*columns)
+                .filter(Product.id.in_([uuid.UUID(product_id) for product_id in product_ids]))
+                .all()
+            )
+        by_id = {str(row.id): product_to_dict(row, fields) for row in rows}
+        products = [by_id[product_id] for product_id in product_ids if product_id in by_id]
+
+    return {"total": total, "products": products, "facets": facets}
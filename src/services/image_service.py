@@ -0,0 +1,388 @@
+import hashlib
+import io
+import ipaddress
+import os
+import re
+import socket
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from typing import BinaryIO, Iterator, Optional, Tuple
+from urllib.parse import urljoin, urlparse, urlunparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from config.settings import settings
+from database import engine
+from models_db import Product
+from utils.image_cache import ContentAddressedCache
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow es opcional: sin él no se generan miniaturas
+    Image = None
+
+# Lado mayor (px) de cada tamaño de miniatura
+THUMBNAIL_SIZES = {"sm": 160, "md": 320, "lg": 640}
+
+# Tamaño referenciado desde los listados de productos
+LIST_THUMBNAIL_SIZE = "sm"
+
+THUMBNAIL_MEDIA_TYPE = "image/webp"
+THUMBNAIL_QUALITY = 80
+
+# Redirecciones del origen que se siguen (cada destino se vuelve a validar)
+FETCH_MAX_REDIRECTS = 3
+
+# Imágenes subidas: se sirven en /images/assets/<sha256>
+ASSET_URL_PREFIX = "/images/assets/"
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Formatos aceptados en las subidas (formato de Pillow -> media type)
+UPLOAD_MEDIA_TYPES = {
+    "JPEG": "image/jpeg",
+    "PNG": "image/png",
+    "WEBP": "image/webp",
+    "GIF": "image/gif",
+}
+
+_DIGEST_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+image_cache = ContentAddressedCache(
+    settings.IMAGE_CACHE_DIR, max_bytes=settings.IMAGE_CACHE_MAX_BYTES
+)
+
+# Almacenamiento permanente de las imágenes subidas (sin desalojo)
+asset_store = ContentAddressedCache(settings.IMAGE_UPLOAD_DIR, max_bytes=None)
+
+# Pool para decodificar y redimensionar (Pillow libera el GIL en esas
+# operaciones); acota cuántas imágenes se procesan a la vez
+_image_pool = ThreadPoolExecutor(
+    max_workers=settings.IMAGE_WORKERS, thread_name_prefix="image"
+)
+
+# Bloqueos por clave (repartidos en franjas): los fallos concurrentes de una
+# misma imagen descargan el origen una sola vez por worker
+_key_locks = [threading.Lock() for _ in range(64)]
+
+
+def _lock_for(key: str) -> threading.Lock:
+    return _key_locks[int(key[:8], 16) % len(_key_locks)]
+
+
+def image_version(image_url: str) -> str:
+    """Versión corta de la imagen de origen, para URLs inmutables."""
+    return ContentAddressedCache.key(image_url)[:16]
+
+
+def asset_url(digest: str) -> str:
+    return f"{ASSET_URL_PREFIX}{digest}"
+
+
+def asset_digest(image_url: str) -> Optional[str]:
+    """Digest de una imagen subida, o None si `image_url` es externa."""
+    if not image_url.startswith(ASSET_URL_PREFIX):
+        return None
+    digest = image_url[len(ASSET_URL_PREFIX) :]
+    return digest if _DIGEST_PATTERN.fullmatch(digest) else None
+
+
+def thumbnail_url(
+    product_id, image_url: Optional[str], size: str = LIST_THUMBNAIL_SIZE
+) -> Optional[str]:
+    """
+    URL de la miniatura de un producto. Incluye la versión de `image_url`,
+    así que cambia cuando cambia la imagen y puede cachearse para siempre.
+    """
+    if not image_url:
+        return None
+    return f"/images/products/{product_id}/{size}?v={image_version(image_url)}"
+
+
+def _is_public_address(address: str) -> bool:
+    return ipaddress.ip_address(address.split("%")[0]).is_global
+
+
+def _ascii_hostname(url: str) -> str:
+    return urlparse(url).hostname.encode("idna").decode("ascii")
+
+
+def _check_public_url(url: str) -> str:
+    """
+    Solo se descargan URLs http(s) cuyo host resuelve a direcciones públicas:
+    image_url la define quien edita el producto y no debe servir para llegar
+    a servicios de la red interna (SSRF). Devuelve la dirección validada, a
+    la que se conecta la descarga.
+    """
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise HTTPException(status_code=404, detail="Image not available")
+    try:
+        addresses = socket.getaddrinfo(
+            _ascii_hostname(url), None, type=socket.SOCK_STREAM
+        )
+    except (socket.gaierror, UnicodeError) as e:
+        raise HTTPException(status_code=502, detail=f"Error fetching image: {str(e)}")
+    if not all(_is_public_address(address[4][0]) for address in addresses):
+        raise HTTPException(status_code=404, detail="Image not available")
+    return addresses[0][4][0]
+
+
+class _PinnedHostAdapter(HTTPAdapter):
+    """
+    Adaptador HTTPS para conectar a una dirección IP ya validada: el SNI y el
+    certificado se verifican contra el nombre del host original.
+    """
+
+    def __init__(self, hostname: str):
+        self._hostname = hostname
+        super().__init__(max_retries=0)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["server_hostname"] = self._hostname
+        kwargs["assert_hostname"] = self._hostname
+        super().init_poolmanager(*args, **kwargs)
+
+
+@contextmanager
+def _get_pinned(url: str, address: str) -> Iterator[requests.Response]:
+    """
+    GET a `url` conectando a `address` sin volver a resolver el host, así un
+    DNS que cambia de respuesta entre la validación y la conexión (DNS
+    rebinding) no llega a la red interna. No usa proxies del entorno, que
+    resolverían el host por su cuenta.
+    """
+    parsed = urlparse(url)
+    hostname = _ascii_hostname(url)
+    port = f":{parsed.port}" if parsed.port else ""
+    ip_host = f"[{address}]" if ":" in address else address
+    pinned_url = urlunparse(parsed._replace(netloc=f"{ip_host}{port}"))
+    with requests.Session() as session:
+        session.trust_env = False
+        if parsed.scheme == "https":
+            session.mount("https://", _PinnedHostAdapter(hostname))
+        with session.get(
+            pinned_url,
+            headers={"Host": f"{hostname}{port}"},
+            stream=True,
+            allow_redirects=False,
+            timeout=settings.IMAGE_FETCH_TIMEOUT_SECONDS,
+        ) as response:
+            yield response
+
+
+def _fetch_source(image_url: str) -> bytes:
+    """
+    Descarga la imagen original, con límite de tiempo y de tamaño. Las
+    redirecciones se siguen a mano para validar cada destino.
+    """
+    url = image_url
+    try:
+        for _ in range(FETCH_MAX_REDIRECTS + 1):
+            address = _check_public_url(url)
+            with _get_pinned(url, address) as response:
+                if response.is_redirect:
+                    url = urljoin(url, response.headers["location"])
+                    continue
+                response.raise_for_status()
+                content_type = response.headers.get("content-type", "")
+                if not content_type.startswith("image/"):
+                    raise HTTPException(
+                        status_code=502, detail="Origin is not an image"
+                    )
+                length = response.headers.get("content-length", "")
+                if length.isdigit() and int(length) > settings.IMAGE_MAX_SOURCE_BYTES:
+                    raise HTTPException(
+                        status_code=502, detail="Origin image too large"
+                    )
+                data = bytearray()
+                for chunk in response.iter_content(64 * 1024):
+                    data += chunk
+                    if len(data) > settings.IMAGE_MAX_SOURCE_BYTES:
+                        raise HTTPException(
+                            status_code=502, detail="Origin image too large"
+                        )
+                return bytes(data)
+    except requests.RequestException as e:
+        raise HTTPException(status_code=502, detail=f"Error fetching image: {str(e)}")
+    raise HTTPException(status_code=502, detail="Too many redirects from origin")
+
+
+def _render_thumbnail(source: bytes, size: str) -> bytes:
+    try:
+        with Image.open(io.BytesIO(source)) as image:
+            image = ImageOps.exif_transpose(image)
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+            side = THUMBNAIL_SIZES[size]
+            image.thumbnail((side, side))
+            output = io.BytesIO()
+            image.save(output, format="WEBP", quality=THUMBNAIL_QUALITY)
+            return output.getvalue()
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        raise HTTPException(status_code=502, detail=f"Invalid origin image: {str(e)}")
+
+
+def _load_source(image_url: str) -> bytes:
+    """Imagen original: del almacenamiento local si fue subida, si no del origen."""
+    digest = asset_digest(image_url)
+    if digest is not None:
+        source = asset_store.read(digest)
+        if source is None:
+            raise HTTPException(status_code=404, detail="Image not found")
+        return source
+
+    source_key = ContentAddressedCache.key(image_url)
+    source_digest = image_cache.get(source_key)
+    source = image_cache.read(source_digest) if source_digest else None
+    if source is None:
+        source = _fetch_source(image_url)
+        image_cache.put(source_key, source)
+    return source
+
+
+def _ensure_thumbnail(image_url: str, size: str) -> str:
+    """Genera la miniatura si no está en la caché. Devuelve su digest."""
+    thumbnail_key = ContentAddressedCache.key(image_url, size)
+    digest = image_cache.get(thumbnail_key)
+    if digest is None:
+        with _lock_for(thumbnail_key):
+            digest = image_cache.get(thumbnail_key)
+            if digest is None:
+                source = _load_source(image_url)
+                digest = image_cache.put(
+                    thumbnail_key, _render_thumbnail(source, size)
+                )
+    return digest
+
+
+def get_product_thumbnail_service(
+    product_id: uuid.UUID, size: str
+) -> Tuple[str, str, str]:
+    """
+    Servicio para obtener la miniatura de la imagen de un producto.
+
+    La imagen original se descarga una sola vez y cada tamaño se genera una
+    sola vez; ambos quedan en la caché en disco compartida por los workers.
+
+    Returns:
+        (ruta del archivo, digest del contenido, versión de la imagen de origen)
+    """
+    if Image is None:
+        raise HTTPException(status_code=503, detail="Thumbnails not available")
+    if size not in THUMBNAIL_SIZES:
+        raise HTTPException(status_code=404, detail="Unknown thumbnail size")
+
+    with Session(engine) as session:
+        image_url = (
+            session.query(Product.image_url).filter(Product.id == product_id).scalar()
+        )
+    if not image_url:
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    digest = _ensure_thumbnail(image_url, size)
+    return image_cache.object_path(digest), digest, image_version(image_url)
+
+
+def _identify_image(path: str) -> str:
+    """Valida que el archivo sea una imagen aceptada y devuelve su media type."""
+    try:
+        with Image.open(path) as image:
+            image_format = image.format
+            image.verify()
+    except (OSError, ValueError, Image.DecompressionBombError):
+        image_format = None
+    if image_format not in UPLOAD_MEDIA_TYPES:
+        raise HTTPException(status_code=415, detail="Unsupported image format")
+    return UPLOAD_MEDIA_TYPES[image_format]
+
+
+def _copy_to_disk(upload: BinaryIO) -> Tuple[str, str, int]:
+    """
+    Copia la subida a un archivo temporal por bloques, calculando el sha256
+    al vuelo. Devuelve (ruta temporal, digest, tamaño).
+    """
+    hasher = hashlib.sha256()
+    size = 0
+    temp_path = asset_store.temp_path()
+    try:
+        with open(temp_path, "wb") as file:
+            while True:
+                chunk = upload.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > settings.IMAGE_MAX_UPLOAD_BYTES:
+                    raise HTTPException(status_code=413, detail="Image too large")
+                hasher.update(chunk)
+                file.write(chunk)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    return temp_path, hasher.hexdigest(), size
+
+
+def store_image_service(upload: BinaryIO) -> dict:
+    """
+    Servicio para guardar una imagen subida (el archivo ya recibido por
+    Starlette). Se llama desde un endpoint síncrono: la copia a disco corre
+    en el threadpool, fuera del event loop.
+
+    El archivo se guarda por su sha256 (la misma imagen subida dos veces se
+    guarda una sola vez) y las miniaturas se generan en el pool de imágenes.
+    """
+    if Image is None:
+        raise HTTPException(status_code=503, detail="Image uploads not available")
+
+    temp_path, digest, size = _copy_to_disk(upload)
+    try:
+        media_type = _image_pool.submit(_identify_image, temp_path).result()
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    created = asset_store.adopt(temp_path, digest)
+
+    image_url = asset_url(digest)
+    list(_image_pool.map(partial(_ensure_thumbnail, image_url), THUMBNAIL_SIZES))
+    return {
+        "image_url": image_url,
+        "digest": digest,
+        "media_type": media_type,
+        "size": size,
+        "created": created,
+    }
+
+
+def _sniff_media_type(path: str) -> str:
+    with open(path, "rb") as file:
+        head = file.read(12)
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head.startswith(b"GIF8"):
+        return "image/gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return "application/octet-stream"
+
+
+def get_asset_service(digest: str) -> Tuple[str, str]:
+    """
+    Servicio para obtener una imagen subida.
+
+    Returns:
+        (ruta del archivo, media type)
+    """
+    if not _DIGEST_PATTERN.fullmatch(digest):
+        raise HTTPException(status_code=404, detail="Image not found")
+    path = asset_store.object_path(digest)
+    try:
+        return path, _sniff_media_type(path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Image not found")
@@ -0,0 +1,635 @@
+import random
+import uuid
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from config.settings import settings
+from database import engine
+from models_db import (
+    InventoryStock,
+    Product,
+    StockReservation,
+    StockReservationItem,
+)
+from schemas.inventory import (
+    MovementKind,
+    ReservationStatus,
+    StockChange,
+    StockDecrementRequest,
+    StockItem,
+    StockSet,
+    StockTransfer,
+)
+from services.availability_service import refresh_availability
+from services.location_service import require_active_location
+from services.lot_service import (
+    LotAllocation,
+    allocate_fefo,
+    expired_lot_units,
+    receive_lot,
+    take_from_lot,
+)
+from services.stock_ledger import (
+    as_utc,
+    get_movements,
+    movements_committed,
+    record_movement,
+    stock_as_of,
+)
+
+# Filas entre las que se reparte el stock de cada (producto, ubicación)
+STOCK_SLOTS = max(settings.INVENTORY_STOCK_SLOTS, 1)
+
+
+def _stock_filter(product_id: uuid.UUID, location: str) -> tuple:
+    return (
+        InventoryStock.product_id == product_id,
+        InventoryStock.location == location,
+    )
+
+
+def _slot_order() -> List[int]:
+    """Slots empezando por uno al azar, para repartir la contención."""
+    start = random.randrange(STOCK_SLOTS)
+    return [(start + offset) % STOCK_SLOTS for offset in range(STOCK_SLOTS)]
+
+
+def _change_slot(session: Session, product_id, location, slot, delta, minimum=None):
+    """UPDATE relativo de un slot (opcionalmente solo si quantity >= minimum)."""
+    statement = (
+        update(InventoryStock)
+        .where(*_stock_filter(product_id, location), InventoryStock.slot == slot)
+        .values(quantity=InventoryStock.quantity + delta, updated_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+    if minimum is not None:
+        statement = statement.where(InventoryStock.quantity >= minimum)
+    return session.execute(statement).rowcount
+
+
+def take_stock(
+    session: Session, product_id: uuid.UUID, location: str, quantity: int
+) -> bool:
+    """
+    Descuenta `quantity` dentro de la transacción de `session`, sin
+    confirmarla. Devuelve False (sin descontar nada) si no alcanza.
+
+    Primero intenta un UPDATE condicional (quantity >= n) sobre un solo slot,
+    empezando por uno al azar: no hay lectura previa, así que dos cajas nunca
+    venden la misma unidad, y las ventas concurrentes de un mismo producto
+    suelen tocar filas distintas. Si ningún slot alcanza solo, bloquea todos
+    los slots en orden fijo (sin riesgo de deadlock) y reparte el descuento.
+    """
+    for slot in _slot_order():
+        if _change_slot(session, product_id, location, slot, -quantity, quantity):
+            return True
+
+    rows = session.execute(
+        select(InventoryStock.slot, InventoryStock.quantity)
+        .where(*_stock_filter(product_id, location))
+        .order_by(InventoryStock.slot)
+        .with_for_update()
+    ).all()
+    if sum(row.quantity for row in rows) < quantity:
+        return False
+    remaining = quantity
+    for row in rows:
+        taken = min(row.quantity, remaining)
+        if taken:
+            _change_slot(session, product_id, location, row.slot, -taken)
+            remaining -= taken
+        if not remaining:
+            break
+    return True
+
+
+def add_stock(
+    session: Session, product_id: uuid.UUID, location: str, quantity: int
+) -> None:
+    """Suma `quantity` a un slot al azar dentro de la transacción de `session`."""
+    slot = random.randrange(STOCK_SLOTS)
+    if _change_slot(session, product_id, location, slot, quantity):
+        return
+    # Primera entrada en este slot: crearlo (o sumar si otro lo creó antes)
+    try:
+        with session.begin_nested():
+            session.add(
+                InventoryStock(
+                    product_id=product_id,
+                    location=location,
+                    slot=slot,
+                    quantity=quantity,
+                )
+            )
+    except IntegrityError:
+        _change_slot(session, product_id, location, slot, quantity)
+
+
+def _available(session: Session, product_id: uuid.UUID, location: str) -> int:
+    return session.execute(
+        select(func.coalesce(func.sum(InventoryStock.quantity), 0)).where(
+            *_stock_filter(product_id, location)
+        )
+    ).scalar_one()
+
+
+def insufficient_stock_error(session, product_id, location, requested) -> HTTPException:
+    return HTTPException(
+        status_code=409,
+        detail={
+            "message": "Insufficient stock",
+            "product_id": str(product_id),
+            "location": location,
+            "requested": requested,
+            "available": _available(session, product_id, location),
+        },
+    )
+
+
+def merge_stock_items(items: Iterable[StockItem]) -> Dict[Tuple[str, str], int]:
+    """
+    Suma las cantidades por (producto, ubicación). Recorrer el resultado
+    ordenado da a todas las transacciones el mismo orden de bloqueo.
+    """
+    quantities: Dict[Tuple[str, str], int] = {}
+    for item in items:
+        key = (str(item.product_id), item.location)
+        quantities[key] = quantities.get(key, 0) + item.quantity
+    return quantities
+
+
+def _ensure_product(session: Session, product_id: uuid.UUID) -> None:
+    if session.get(Product, product_id) is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+
+
+def check_expired_stock(
+    session: Session, product_id: uuid.UUID, location: str
+) -> None:
+    """
+    Las unidades de lotes vencidos siguen en los slots hasta darlas de baja,
+    pero no se venden ni se reservan: tras descontar, los slots deben
+    seguir cubriéndolas. Responde 409 si no (la salida solo se cubría con
+    unidades vencidas). Así los lotes nunca suman más que el stock físico.
+    """
+    expired = expired_lot_units(session, product_id, location)
+    if expired and _available(session, product_id, location) < expired:
+        raise HTTPException(
+            status_code=409,
+            detail={
+                "message": "Insufficient unexpired stock",
+                "product_id": str(product_id),
+                "location": location,
+                "expired": expired,
+            },
+        )
+
+
+def record_outflow(
+    session: Session,
+    product_id: uuid.UUID,
+    location: str,
+    kind: MovementKind,
+    quantity: int,
+    reference: Optional[str] = None,
+    user_id: Optional[uuid.UUID] = None,
+    lot_code: Optional[str] = None,
+) -> List[LotAllocation]:
+    """
+    Registra la salida física de `quantity` unidades ya descontadas de los
+    slots: las asigna a los lotes (el lote `lot_code`, o FEFO si no se indica)
+    y agrega un movimiento por lote más uno por el resto sin lote. Responde
+    409 si el lote indicado no tiene suficientes unidades o si la salida
+    tomaría unidades vencidas (ver `check_expired_stock`).
+    """
+    if lot_code is not None:
+        allocation = take_from_lot(session, product_id, location, lot_code, quantity)
+        if allocation is None:
+            raise HTTPException(status_code=409, detail="Insufficient stock in lot")
+        allocations = [allocation]
+    else:
+        allocations = allocate_fefo(session, product_id, location, quantity)
+    check_expired_stock(session, product_id, location)
+    _record_lot_movements(
+        session, product_id, location, kind, -quantity, allocations, reference, user_id
+    )
+    return allocations
+
+
+def _record_lot_movements(
+    session: Session,
+    product_id: uuid.UUID,
+    location: str,
+    kind: MovementKind,
+    quantity: int,
+    allocations: Sequence[LotAllocation],
+    reference: Optional[str],
+    user_id: Optional[uuid.UUID],
+) -> None:
+    """Un movimiento por lote y otro por las unidades sin lote (con signo)."""
+    sign = -1 if quantity < 0 else 1
+    remaining = abs(quantity)
+    for allocation in allocations:
+        record_movement(
+            session,
+            product_id,
+            location,
+            kind,
+            sign * allocation.quantity,
+            reference,
+            user_id,
+            allocation.lot_code,
+        )
+        remaining -= allocation.quantity
+    if remaining:
+        record_movement(
+            session, product_id, location, kind, sign * remaining, reference, user_id
+        )
+
+
+def _stock_committed(keys: List[Tuple[uuid.UUID, str]]) -> None:
+    """Tras confirmar un cambio de stock: checkpoints y agregado."""
+    movements_committed(keys)
+    refresh_availability(product_id for product_id, _ in keys)
+
+
+def _reserved_by_location(
+    session: Session, product_id: uuid.UUID, location: Optional[str] = None
+) -> Dict[str, int]:
+    """Unidades apartadas por reservas activas, por ubicación."""
+    query = (
+        select(StockReservationItem.location, func.sum(StockReservationItem.quantity))
+        .join(
+            StockReservation,
+            StockReservation.id == StockReservationItem.reservation_id,
+        )
+        .where(
+            StockReservationItem.product_id == product_id,
+            StockReservation.status == ReservationStatus.ACTIVE.value,
+        )
+        .group_by(StockReservationItem.location)
+    )
+    if location is not None:
+        query = query.where(StockReservationItem.location == location)
+    return dict(session.execute(query).all())
+
+
+def _stock_response(session: Session, product_id: uuid.UUID, location: str) -> dict:
+    return {
+        "product_id": str(product_id),
+        "location": location,
+        "quantity": _available(session, product_id, location),
+    }
+
+
+def get_stock_service(
+    skip: int = 0, limit: int = 100, location: Optional[str] = None
+) -> List[dict]:
+    """
+    Servicio para listar las existencias por producto y ubicación.
+    """
+    query = (
+        select(
+            InventoryStock.product_id,
+            InventoryStock.location,
+            func.sum(InventoryStock.quantity).label("quantity"),
+            func.max(InventoryStock.updated_at).label("updated_at"),
+        )
+        .group_by(InventoryStock.product_id, InventoryStock.location)
+        .order_by(InventoryStock.product_id, InventoryStock.location)
+        .offset(skip)
+        .limit(limit)
+    )
+    if location is not None:
+        query = query.where(InventoryStock.location == location)
+    with Session(engine) as session:
+        return [
+            {
+                "product_id": str(row.product_id),
+                "location": row.location,
+                "quantity": row.quantity,
+                "updated_at": row.updated_at,
+            }
+            for row in session.execute(query)
+        ]
+
+
+def get_product_stock_service(
+    product_id: uuid.UUID, as_of: Optional[datetime] = None
+) -> dict:
+    """
+    Servicio para obtener las existencias de un producto por ubicación.
+
+    Sin `as_of` lee los saldos actuales: `locations` y `total` son lo
+    disponible, `reserved` lo apartado por reservas activas y `on_hand` el
+    stock físico (disponible + reservado). Con `as_of` reconstruye el stock
+    físico a esa fecha desde el libro de movimientos (checkpoint anterior +
+    movimientos posteriores).
+    """
+    with Session(engine) as session:
+        _ensure_product(session, product_id)
+        rows = session.execute(
+            select(
+                InventoryStock.location,
+                func.sum(InventoryStock.quantity).label("quantity"),
+            )
+            .where(InventoryStock.product_id == product_id)
+            .group_by(InventoryStock.location)
+            .order_by(InventoryStock.location)
+        )
+        locations = {row.location: row.quantity for row in rows}
+        if as_of is not None:
+            as_of = as_utc(as_of)
+            locations = {
+                location: stock_as_of(session, product_id, location, as_of)
+                for location in locations
+            }
+            return {
+                "product_id": str(product_id),
+                "as_of": as_of,
+                "locations": locations,
+                "total": sum(locations.values()),
+            }
+        reserved = _reserved_by_location(session, product_id)
+    total = sum(locations.values())
+    return {
+        "product_id": str(product_id),
+        "locations": locations,
+        "total": total,
+        "reserved": reserved,
+        "on_hand": total + sum(reserved.values()),
+    }
+
+
+def get_stock_movements_service(
+    product_id: uuid.UUID,
+    location: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    skip: int = 0,
+    limit: int = 100,
+) -> List[dict]:
+    """
+    Servicio para consultar el historial de movimientos de un producto.
+    """
+    with Session(engine) as session:
+        _ensure_product(session, product_id)
+        return get_movements(session, product_id, location, since, until, skip, limit)
+
+
+def set_stock_service(
+    product_id: uuid.UUID, stock: StockSet, user_id: Optional[uuid.UUID] = None
+) -> dict:
+    """
+    Servicio para fijar las existencias de un producto en una ubicación
+    (conteo físico). Bloquea los slots y reparte entre ellos lo contado menos
+    lo apartado por reservas activas, que sigue en el estante pero fuera de
+    los slots. Responde 409 si el conteo es menor que lo reservado.
+    """
+    with Session(engine) as session:
+        _ensure_product(session, product_id)
+        require_active_location(session, stock.location)
+        existing = dict(
+            session.execute(
+                select(InventoryStock.slot, InventoryStock.quantity)
+                .where(*_stock_filter(product_id, stock.location))
+                .order_by(InventoryStock.slot)
+                .with_for_update()
+            ).all()
+        )
+        # Leído tras bloquear los slots: una reserva en curso ya confirmó
+        reserved = _reserved_by_location(session, product_id, stock.location).get(
+            stock.location, 0
+        )
+        if stock.quantity < reserved:
+            raise HTTPException(
+                status_code=409,
+                detail={
+                    "message": "Count is below reserved stock",
+                    "product_id": str(product_id),
+                    "location": stock.location,
+                    "counted": stock.quantity,
+                    "reserved": reserved,
+                },
+            )
+        share, extra = divmod(stock.quantity - reserved, STOCK_SLOTS)
+        targets = {slot: share + (slot < extra) for slot in range(STOCK_SLOTS)}
+        # Slots de una configuración anterior con más slots
+        targets.update({slot: 0 for slot in existing if slot >= STOCK_SLOTS})
+        for slot, quantity in targets.items():
+            if slot in existing:
+                session.execute(
+                    update(InventoryStock)
+                    .where(
+                        *_stock_filter(product_id, stock.location),
+                        InventoryStock.slot == slot,
+                    )
+                    .values(quantity=quantity, updated_at=func.now())
+                    .execution_options(synchronize_session=False)
+                )
+            else:
+                session.add(
+                    InventoryStock(
+                        product_id=product_id,
+                        location=stock.location,
+                        slot=slot,
+                        quantity=quantity,
+                    )
+                )
+        difference = stock.quantity - (sum(existing.values()) + reserved)
+        if difference < 0:  # faltante del conteo: sale de los lotes por FEFO
+            record_outflow(
+                session,
+                product_id,
+                stock.location,
+                MovementKind.ADJUSTMENT,
+                -difference,
+                stock.reference,
+                user_id,
+            )
+        elif difference:
+            record_movement(
+                session,
+                product_id,
+                stock.location,
+                MovementKind.ADJUSTMENT,
+                difference,
+                stock.reference,
+                user_id,
+            )
+        session.commit()
+        if difference:
+            _stock_committed([(product_id, stock.location)])
+        return _stock_response(session, product_id, stock.location)
+
+
+def increment_stock_service(
+    product_id: uuid.UUID, change: StockChange, user_id: Optional[uuid.UUID] = None
+) -> dict:
+    """
+    Servicio para sumar existencias (entrada de mercancía). Con `lot_code`
+    las unidades entran a ese lote, que se crea con `expiry_date` si es nuevo.
+    """
+    with Session(engine) as session:
+        _ensure_product(session, product_id)
+        require_active_location(session, change.location)
+        # Primero las filas de stock y luego el lote, el mismo orden de
+        # bloqueo que las salidas y traslados (evita interbloqueos)
+        add_stock(session, product_id, change.location, change.quantity)
+        if change.lot_code is not None:
+            receive_lot(
+                session,
+                product_id,
+                change.location,
+                change.lot_code,
+                change.expiry_date,
+                change.quantity,
+            )
+        record_movement(
+            session,
+            product_id,
+            change.location,
+            MovementKind.RECEIPT,
+            change.quantity,
+            change.reference,
+            user_id,
+            change.lot_code,
+        )
+        session.commit()
+        _stock_committed([(product_id, change.location)])
+        return _stock_response(session, product_id, change.location)
+
+
+def decrement_stock_service(
+    product_id: uuid.UUID, change: StockChange, user_id: Optional[uuid.UUID] = None
+) -> dict:
+    """
+    Servicio para descontar existencias de un producto. Responde 409 si no
+    alcanzan (nunca deja el stock negativo). Las unidades salen de los lotes
+    que vencen primero, o del lote `lot_code` si se indica.
+    """
+    with Session(engine) as session:
+        if not take_stock(session, product_id, change.location, change.quantity):
+            session.rollback()
+            raise insufficient_stock_error(
+                session, product_id, change.location, change.quantity
+            )
+        record_outflow(
+            session,
+            product_id,
+            change.location,
+            MovementKind.SALE,
+            change.quantity,
+            change.reference,
+            user_id,
+            change.lot_code,
+        )
+        session.commit()
+        _stock_committed([(product_id, change.location)])
+        return _stock_response(session, product_id, change.location)
+
+
+def transfer_stock_service(
+    product_id: uuid.UUID, transfer: StockTransfer, user_id: Optional[uuid.UUID] = None
+) -> dict:
+    """
+    Servicio para trasladar existencias entre dos ubicaciones en una sola
+    transacción. Responde 409 si el origen no tiene suficientes. Los lotes
+    asignados en el origen (FEFO) llegan al destino con su vencimiento.
+    """
+    with Session(engine) as session:
+        _ensure_product(session, product_id)
+        require_active_location(session, transfer.to_location)
+        if not take_stock(
+            session, product_id, transfer.from_location, transfer.quantity
+        ):
+            session.rollback()
+            raise insufficient_stock_error(
+                session, product_id, transfer.from_location, transfer.quantity
+            )
+        add_stock(session, product_id, transfer.to_location, transfer.quantity)
+        allocations = record_outflow(
+            session,
+            product_id,
+            transfer.from_location,
+            MovementKind.TRANSFER_OUT,
+            transfer.quantity,
+            transfer.reference,
+            user_id,
+        )
+        for allocation in allocations:
+            receive_lot(
+                session,
+                product_id,
+                transfer.to_location,
+                allocation.lot_code,
+                allocation.expiry_date,
+                allocation.quantity,
+            )
+        _record_lot_movements(
+            session,
+            product_id,
+            transfer.to_location,
+            MovementKind.TRANSFER_IN,
+            transfer.quantity,
+            allocations,
+            transfer.reference,
+            user_id,
+        )
+        session.commit()
+        _stock_committed(
+            [
+                (product_id, transfer.from_location),
+                (product_id, transfer.to_location),
+            ]
+        )
+        return {
+            "product_id": str(product_id),
+            "from": _stock_response(session, product_id, transfer.from_location),
+            "to": _stock_response(session, product_id, transfer.to_location),
+        }
+
+
+def decrement_items_service(
+    request: StockDecrementRequest, user_id: Optional[uuid.UUID] = None
+) -> dict:
+    """
+    Servicio para descontar varios productos en una sola transacción
+    (checkout): se descuentan todos o ninguno. Los ítems se procesan en un
+    orden fijo para que dos ventas con los mismos productos no se bloqueen
+    mutuamente.
+    """
+    quantities = merge_stock_items(request.items)
+    touched = []
+    with Session(engine) as session:
+        for (product_id, location), quantity in sorted(quantities.items()):
+            product_uuid = uuid.UUID(product_id)
+            if not take_stock(session, product_uuid, location, quantity):
+                session.rollback()
+                raise insufficient_stock_error(
+                    session, product_uuid, location, quantity
+                )
+            record_outflow(
+                session,
+                product_uuid,
+                location,
+                MovementKind.SALE,
+                quantity,
+                request.reference,
+                user_id,
+            )
+            touched.append((product_uuid, location))
+        session.commit()
+    _stock_committed(touched)
+    return {
+        "message": "Stock decremented successfully",
+        "items": [
+            {"product_id": product_id, "location": location, "quantity": quantity}
+            for (product_id, location), quantity in sorted(quantities.items())
+        ],
+    }
@@ -0,0 +1,104 @@
+from typing import List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from config.settings import settings
+from database import engine
+from models_db import Location
+from schemas.inventory import LocationCreate, LocationKind, LocationUpdate
+
+LOCATION_FIELDS = ("code", "name", "kind", "address", "active")
+
+
+def location_to_dict(location: Location) -> dict:
+    return {field: getattr(location, field) for field in LOCATION_FIELDS}
+
+
+def ensure_default_location() -> bool:
+    """
+    Crea la ubicación por defecto (INVENTORY_DEFAULT_LOCATION) si no existe,
+    para que el stock registrado sin ubicación tenga a dónde ir.
+    Devuelve True si la creó.
+    """
+    with Session(engine) as session:
+        if session.get(Location, settings.INVENTORY_DEFAULT_LOCATION) is not None:
+            return False
+        session.add(
+            Location(
+                code=settings.INVENTORY_DEFAULT_LOCATION,
+                name="Bodega principal",
+                kind=LocationKind.WAREHOUSE.value,
+            )
+        )
+        try:
+            session.commit()
+        except IntegrityError:  # otro worker la creó al mismo tiempo
+            return False
+        return True
+
+
+def require_active_location(session: Session, code: str) -> Location:
+    """Ubicación `code`; 404 si no existe y 409 si está desactivada."""
+    location = session.get(Location, code)
+    if location is None:
+        raise HTTPException(status_code=404, detail="Location not found")
+    if not location.active:
+        raise HTTPException(status_code=409, detail="Location is inactive")
+    return location
+
+
+def get_locations_service(
+    kind: Optional[LocationKind] = None, include_inactive: bool = False
+) -> List[dict]:
+    """
+    Servicio para listar las tiendas y bodegas.
+    """
+    query = select(Location).order_by(Location.code)
+    if kind is not None:
+        query = query.where(Location.kind == kind.value)
+    if not include_inactive:
+        query = query.where(Location.active.is_(True))
+    with Session(engine) as session:
+        return [location_to_dict(location) for location in session.scalars(query)]
+
+
+def create_location_service(location: LocationCreate) -> dict:
+    """
+    Servicio para crear una tienda o bodega. Responde 409 si el código ya existe.
+    """
+    with Session(engine) as session:
+        new_location = Location(
+            code=location.code,
+            name=location.name,
+            kind=location.kind.value,
+            address=location.address,
+            active=True,
+        )
+        session.add(new_location)
+        try:
+            session.commit()
+        except IntegrityError:
+            session.rollback()
+            raise HTTPException(status_code=409, detail="Location already exists")
+        return location_to_dict(new_location)
+
+
+def update_location_service(code: str, location: LocationUpdate) -> dict:
+    """
+    Servicio para actualizar una tienda o bodega. Una ubicación desactivada
+    conserva su stock pero no recibe mercancía nueva.
+    """
+    with Session(engine) as session:
+        existing = session.get(Location, code)
+        if existing is None:
+            raise HTTPException(status_code=404, detail="Location not found")
+        updates = location.model_dump(mode="json", exclude_unset=True)
+        for field, value in updates.items():
+            if value is None and field != "address":
+                continue  # solo la dirección puede borrarse
+            setattr(existing, field, value)
+        session.commit()
+        return location_to_dict(existing)
@@ -0,0 +1,237 @@
+import uuid
+from datetime import date, timedelta
+from typing import List, NamedTuple, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from database import engine
+from models_db import InventoryLot, Product
+
+
+class LotAllocation(NamedTuple):
+    """Unidades tomadas de (o devueltas a) un lote."""
+
+    lot_code: str
+    expiry_date: date
+    quantity: int
+
+
+def _lot_filter(product_id: uuid.UUID, location: str) -> tuple:
+    return (
+        InventoryLot.product_id == product_id,
+        InventoryLot.location == location,
+    )
+
+
+def _change_lot(session: Session, lot_id: uuid.UUID, delta: int, minimum=None):
+    """UPDATE relativo de un lote (opcionalmente solo si quantity >= minimum)."""
+    statement = (
+        update(InventoryLot)
+        .where(InventoryLot.id == lot_id)
+        .values(quantity=InventoryLot.quantity + delta)
+        .execution_options(synchronize_session=False)
+    )
+    if minimum is not None:
+        statement = statement.where(InventoryLot.quantity >= minimum)
+    return session.execute(statement).rowcount
+
+
+def lot_to_dict(lot: InventoryLot) -> dict:
+    return {
+        "product_id": str(lot.product_id),
+        "location": lot.location,
+        "lot_code": lot.lot_code,
+        "expiry_date": lot.expiry_date,
+        "quantity": lot.quantity,
+        "received_at": lot.received_at,
+    }
+
+
+def receive_lot(
+    session: Session,
+    product_id: uuid.UUID,
+    location: str,
+    lot_code: str,
+    expiry_date: Optional[date],
+    quantity: int,
+) -> date:
+    """
+    Suma `quantity` a un lote dentro de la transacción de `session`,
+    creándolo si no existe (para eso hace falta `expiry_date`). Responde 409
+    si el lote ya existe con otro vencimiento. Devuelve el vencimiento.
+    """
+    lot_query = select(InventoryLot.id, InventoryLot.expiry_date).where(
+        *_lot_filter(product_id, location), InventoryLot.lot_code == lot_code
+    )
+    existing = session.execute(lot_query).one_or_none()
+    if existing is None:
+        if expiry_date is None:
+            raise HTTPException(
+                status_code=400, detail="expiry_date is required for a new lot"
+            )
+        try:
+            with session.begin_nested():
+                session.add(
+                    InventoryLot(
+                        id=uuid.uuid4(),
+                        product_id=product_id,
+                        location=location,
+                        lot_code=lot_code,
+                        expiry_date=expiry_date,
+                        quantity=quantity,
+                    )
+                )
+            return expiry_date
+        except IntegrityError:  # otro proceso creó el lote al mismo tiempo
+            existing = session.execute(lot_query).one()
+    if expiry_date is not None and expiry_date != existing.expiry_date:
+        raise HTTPException(
+            status_code=409, detail="Lot already exists with another expiry date"
+        )
+    _change_lot(session, existing.id, quantity)
+    return existing.expiry_date
+
+
+def take_from_lot(
+    session: Session,
+    product_id: uuid.UUID,
+    location: str,
+    lot_code: str,
+    quantity: int,
+) -> Optional[LotAllocation]:
+    """
+    Descuenta `quantity` de un lote determinado (p. ej. baja de un lote
+    vencido) con un UPDATE condicional. Devuelve None si no alcanza.
+    """
+    lot = session.execute(
+        select(InventoryLot.id, InventoryLot.expiry_date).where(
+            *_lot_filter(product_id, location), InventoryLot.lot_code == lot_code
+        )
+    ).one_or_none()
+    if lot is None or not _change_lot(session, lot.id, -quantity, quantity):
+        return None
+    return LotAllocation(lot_code, lot.expiry_date, quantity)
+
+
+def allocate_fefo(
+    session: Session, product_id: uuid.UUID, location: str, quantity: int
+) -> List[LotAllocation]:
+    """
+    Toma hasta `quantity` unidades de los lotes sin vencer, empezando por el
+    que vence primero (FEFO), dentro de la transacción de `session`.
+
+    Los lotes se leen con el índice (product_id, expiry_date) y se bloquean
+    en orden de vencimiento, así dos salidas simultáneas no toman la misma
+    unidad ni se bloquean mutuamente. Lo que los lotes no cubren sale del
+    stock sin lote y no se asigna; los lotes vencidos nunca se asignan (quien
+    llama verifica que no se hayan vendido sus unidades).
+    """
+    lots = session.execute(
+        select(
+            InventoryLot.id,
+            InventoryLot.lot_code,
+            InventoryLot.expiry_date,
+            InventoryLot.quantity,
+        )
+        .where(
+            *_lot_filter(product_id, location),
+            InventoryLot.expiry_date >= date.today(),
+            InventoryLot.quantity > 0,
+        )
+        .order_by(InventoryLot.expiry_date, InventoryLot.id)
+        .with_for_update()
+    ).all()
+    allocations = []
+    remaining = quantity
+    for lot in lots:
+        if not remaining:
+            break
+        taken = min(lot.quantity, remaining)
+        _change_lot(session, lot.id, -taken)
+        allocations.append(LotAllocation(lot.lot_code, lot.expiry_date, taken))
+        remaining -= taken
+    return allocations
+
+
+def expired_lot_units(session: Session, product_id: uuid.UUID, location: str) -> int:
+    """Unidades de lotes ya vencidos (rango del índice product_id, expiry_date)."""
+    return session.execute(
+        select(func.coalesce(func.sum(InventoryLot.quantity), 0)).where(
+            *_lot_filter(product_id, location),
+            InventoryLot.expiry_date < date.today(),
+        )
+    ).scalar_one()
+
+
+def get_product_lots_service(
+    product_id: uuid.UUID, location: Optional[str] = None
+) -> List[dict]:
+    """
+    Servicio para listar los lotes con existencias de un producto, en el
+    orden en que se asignan (primero el que vence antes).
+    """
+    query = (
+        select(InventoryLot)
+        .where(InventoryLot.product_id == product_id, InventoryLot.quantity > 0)
+        .order_by(
+            InventoryLot.expiry_date, InventoryLot.location, InventoryLot.lot_code
+        )
+    )
+    if location is not None:
+        query = query.where(InventoryLot.location == location)
+    with Session(engine) as session:
+        if session.get(Product, product_id) is None:
+            raise HTTPException(status_code=404, detail="Product not found")
+        return [lot_to_dict(lot) for lot in session.scalars(query)]
+
+
+def get_expiring_lots_service(
+    days: int,
+    location: Optional[str] = None,
+    include_expired: bool = False,
+    skip: int = 0,
+    limit: int = 100,
+) -> List[dict]:
+    """
+    Servicio para el reporte de lotes con existencias que vencen en los
+    próximos `days` días (con `include_expired`, también los ya vencidos),
+    del más próximo a vencer al más lejano.
+
+    El filtro es un rango sobre expiry_date y quantity > 0, que recorre solo
+    ese tramo del índice parcial inventory_lot_expiry_date_idx en lugar de
+    toda la tabla de lotes.
+    """
+    today = date.today()
+    conditions = [
+        InventoryLot.quantity > 0,
+        InventoryLot.expiry_date <= today + timedelta(days=days),
+    ]
+    if not include_expired:
+        conditions.append(InventoryLot.expiry_date >= today)
+    if location is not None:
+        conditions.append(InventoryLot.location == location)
+    query = (
+        select(InventoryLot, Product.name)
+        .join(Product, Product.id == InventoryLot.product_id)
+        .where(*conditions)
+        .order_by(
+            InventoryLot.expiry_date,
+            InventoryLot.product_id,
+            InventoryLot.location,
+            InventoryLot.lot_code,
+        )
+        .offset(skip)
+        .limit(limit)
+    )
+    with Session(engine) as session:
+        return [
+            {
+                **lot_to_dict(lot),
+                "product_name": name,
+                "days_left": (lot.expiry_date - today).days,
+            }
+            for lot, name in session.execute(query)
+        ]
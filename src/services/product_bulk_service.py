@@ -0,0 +1,365 @@
+import csv
+import io
+import json
+import logging
+import uuid
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from database import engine
+from models_db import (
+    InventoryLot,
+    InventoryStock,
+    Product,
+    ProductAttribute,
+    ProductAvailability,
+    StockReservationItem,
+)
+from schemas.product import (
+    ProductBulkDeleteRequest,
+    ProductBulkSelection,
+    ProductBulkUpdateRequest,
+    ProductCreate,
+    ProductFileFormat,
+)
+from services.catalog_events import notify_products_changed
+from services.catalog_version import (
+    PRODUCT_ENTITY,
+    next_catalog_version,
+    record_tombstones,
+)
+from services.product_service import PRODUCT_FIELDS, product_filters, product_to_dict
+from services.stock_ledger import product_movements_error, products_with_movements
+
+logger = logging.getLogger("mapo")
+
+# Filas validadas e insertadas por sentencia/transacción
+IMPORT_BATCH_SIZE = 1000
+
+# Máximo de errores por fila incluidos en la respuesta (el total siempre se informa)
+IMPORT_MAX_REPORTED_ERRORS = 100
+
+# Filas leídas del cursor del servidor y emitidas por chunk en la exportación
+EXPORT_BATCH_SIZE = 1000
+
+_INSERT_BY_DIALECT = {
+    "postgresql": postgresql_insert,
+    "sqlite": sqlite_insert,
+}
+
+
+def _iter_records(
+    file: BinaryIO, file_format: ProductFileFormat
+) -> Iterator[Tuple[int, object]]:
+    """
+    Recorre el archivo registro a registro sin cargarlo completo en memoria.
+    Devuelve pares (número de registro, datos crudos o excepción de parseo).
+    """
+    text_stream = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    if file_format == ProductFileFormat.CSV:
+        reader = csv.DictReader(text_stream)
+        for row_number, row in enumerate(reader, start=1):
+            yield row_number, row
+        return
+
+    row_number = 0
+    for line in text_stream:
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            yield row_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row_number, e
+
+
+def _clean_record(record: dict) -> dict:
+    """Normaliza valores vacíos de CSV/NDJSON a None."""
+    cleaned = {}
+    for key, value in record.items():
+        if key is None:
+            continue
+        if isinstance(value, str):
+            value = value.strip() or None
+        cleaned[key.strip()] = value
+    return cleaned
+
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(map(str, detail['loc']))}: {detail['msg']}"
+        for detail in error.errors()
+    )
+
+
+def _upsert_batch(session: Session, rows: List[dict]) -> None:
+    """
+    Inserta o actualiza un lote con un único INSERT ... ON CONFLICT (name)
+    DO UPDATE de varias filas. Todas las filas traen las mismas columnas y
+    solo esas se actualizan: una columna ausente del archivo no borra el
+    valor que ya tenía el producto.
+    """
+    insert = _INSERT_BY_DIALECT[engine.dialect.name]
+    version = next_catalog_version(session)
+    statement = insert(Product).values(
+        [{**row, "id": uuid.uuid4(), "version": version} for row in rows]
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[Product.name],
+        set_={
+            column: statement.excluded[column]
+            for column in [*rows[0], "version"]
+            if column != "name"
+        },
+    )
+    session.execute(statement)
+    session.commit()
+
+
+def import_products_service(file: BinaryIO, file_format: ProductFileFormat):
+    """
+    Servicio de importación masiva de productos desde CSV o NDJSON.
+
+    Valida las filas por lotes y hace upsert por nombre (restricción
+    product_pk_2), de modo que una fila repetida actualiza el producto en vez
+    de abortar la carga. La memoria usada depende del tamaño del lote, no del
+    archivo. Solo se actualizan las columnas presentes en el archivo (el
+    encabezado del CSV o las claves de cada registro NDJSON). Las filas
+    inválidas, o cuyo SKU o código de barras ya usa otro producto, se
+    informan con su número y no detienen el resto de la importación.
+    """
+    if engine.dialect.name not in _INSERT_BY_DIALECT:
+        raise HTTPException(
+            status_code=501,
+            detail=f"Bulk import not supported for {engine.dialect.name}",
+        )
+
+    summary = {"processed": 0, "upserted": 0, "failed": 0, "errors": []}
+
+    def add_error(row_number: int, error: str) -> None:
+        summary["failed"] += 1
+        if len(summary["errors"]) < IMPORT_MAX_REPORTED_ERRORS:
+            summary["errors"].append({"row": row_number, "error": error})
+
+    def flush(
+        session: Session,
+        batch: Dict[str, dict],
+        rows: List[Tuple[int, str]],
+    ):
+        rows_by_name: Dict[str, List[int]] = {}
+        for row_number, name in rows:
+            rows_by_name.setdefault(name, []).append(row_number)
+
+        def upsert(group: Dict[str, dict]) -> bool:
+            group_rows = [row for name in group for row in rows_by_name[name]]
+            try:
+                _upsert_batch(session, list(group.values()))
+                summary["upserted"] += len(group_rows)
+                return True
+            except IntegrityError:
+                session.rollback()
+                if len(group) > 1:
+                    return False
+                error = "SKU or barcode already in use"
+            except Exception:
+                session.rollback()
+                logger.exception("Error importando un lote de productos")
+                error = "Database error"
+            for row_number in group_rows:
+                add_error(row_number, error)
+            return True
+
+        # Una sentencia necesita una sola lista de columnas: se agrupan las
+        # filas según las columnas que traen
+        groups: Dict[Tuple[str, ...], Dict[str, dict]] = {}
+        for name, values in batch.items():
+            groups.setdefault(tuple(sorted(values)), {})[name] = values
+        for group in groups.values():
+            if not upsert(group):
+                # ON CONFLICT solo cubre el nombre: un SKU o código de barras
+                # repetido aborta el lote, que se reintenta fila por fila para
+                # informar solo las filas en conflicto
+                for name, values in group.items():
+                    upsert({name: values})
+
+    with Session(engine) as session:
+        # Un mismo nombre solo puede aparecer una vez por sentencia ON CONFLICT:
+        # dentro del lote se combinan sus filas y gana el último valor
+        batch: Dict[str, dict] = {}
+        batch_rows: List[Tuple[int, str]] = []
+        try:
+            for row_number, record in _iter_records(file, file_format):
+                summary["processed"] += 1
+                if isinstance(record, Exception):
+                    add_error(row_number, f"Invalid JSON: {record}")
+                    continue
+                if not isinstance(record, dict):
+                    add_error(row_number, "Each record must be an object")
+                    continue
+                try:
+                    product = ProductCreate(**_clean_record(record))
+                except ValidationError as e:
+                    add_error(row_number, _format_validation_error(e))
+                    continue
+
+                values = product.model_dump(exclude_unset=True)
+                batch[product.name] = {**batch.get(product.name, {}), **values}
+                batch_rows.append((row_number, product.name))
+                if len(batch_rows) >= IMPORT_BATCH_SIZE:
+                    flush(session, batch, batch_rows)
+                    batch, batch_rows = {}, []
+        except (UnicodeDecodeError, csv.Error) as e:
+            # Archivo corrupto: se conserva lo importado hasta este punto
+            add_error(summary["processed"] + 1, f"Invalid file: {e}")
+
+        if batch_rows:
+            flush(session, batch, batch_rows)
+
+    if summary["upserted"]:
+        notify_products_changed(bulk=True)
+
+    summary["errors_truncated"] = summary["failed"] > len(summary["errors"])
+    return summary
+
+
+def export_products_service(
+    file_format: ProductFileFormat,
+    category_ids: Optional[List[uuid.UUID]] = None,
+) -> Iterator[bytes]:
+    """
+    Servicio de exportación del catálogo en NDJSON o CSV.
+
+    Devuelve un generador de chunks de bytes para una respuesta streaming.
+    Las filas se leen con un cursor del lado del servidor (`yield_per`), por
+    lo que la memoria queda acotada por EXPORT_BATCH_SIZE y el primer chunk
+    se envía sin esperar a leer todo el catálogo.
+    """
+    columns = [getattr(Product, field) for field in PRODUCT_FIELDS]
+    statement = (
+        select(*columns)
+        .where(*product_filters(category_ids))
+        .order_by(Product.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+
+    def generate() -> Iterator[bytes]:
+        if file_format == ProductFileFormat.CSV:
+            yield (",".join(PRODUCT_FIELDS) + "\r\n").encode()
+
+        with Session(engine) as session:
+            for rows in session.execute(statement).partitions():
+                buffer = io.StringIO()
+                if file_format == ProductFileFormat.CSV:
+                    writer = csv.writer(buffer)
+                    for row in rows:
+                        writer.writerow(product_to_dict(row).values())
+                else:
+                    for row in rows:
+                        buffer.write(json.dumps(product_to_dict(row)))
+                        buffer.write("\n")
+                yield buffer.getvalue().encode()
+
+    return generate()
+
+
+def _selection_conditions(selection: ProductBulkSelection) -> list:
+    """
+    Condiciones WHERE para una selección masiva (ids y/o filtros).
+    Se exige al menos un criterio para evitar modificar todo el catálogo.
+    """
+    conditions = []
+    if selection.ids:
+        conditions.append(Product.id.in_(selection.ids))
+    if selection.filters:
+        conditions.extend(
+            product_filters(
+                selection.filters.category_id,
+                selection.filters.name_prefix,
+                selection.filters.has_image,
+            )
+        )
+    if not conditions:
+        raise HTTPException(
+            status_code=400, detail="Provide ids or at least one filter"
+        )
+    return conditions
+
+
+def bulk_update_products_service(request: ProductBulkUpdateRequest):
+    """
+    Servicio para aplicar el mismo cambio a muchos productos con un único
+    UPDATE. Devuelve la cantidad de filas afectadas. Responde 409 sin
+    modificar nada si el cambio viola una restricción de la tabla.
+    """
+    patch = request.patch.model_dump(exclude_unset=True)
+    if not patch:
+        raise HTTPException(status_code=400, detail="Patch has no fields to update")
+
+    conditions = _selection_conditions(request)
+    with Session(engine) as session:
+        try:
+            result = session.execute(
+                update(Product)
+                .where(*conditions)
+                .values(**patch, version=next_catalog_version(session))
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+        except IntegrityError:
+            session.rollback()
+            raise HTTPException(
+                status_code=409, detail="Patch violates a product constraint"
+            )
+
+    if result.rowcount:
+        notify_products_changed(bulk=True)
+    return {"message": "Products updated successfully", "updated": result.rowcount}
+
+
+def bulk_delete_products_service(request: ProductBulkDeleteRequest):
+    """
+    Servicio para eliminar muchos productos con un único DELETE.
+    Devuelve la cantidad de filas eliminadas. Responde 409 sin eliminar nada
+    si alguno tiene movimientos de inventario.
+    """
+    conditions = _selection_conditions(request)
+    with Session(engine) as session:
+        blocked = products_with_movements(
+            session, select(Product.id).where(*conditions)
+        )
+        if blocked:
+            raise product_movements_error(blocked)
+        for dependent in (
+            ProductAttribute,
+            InventoryStock,
+            InventoryLot,
+            ProductAvailability,
+            StockReservationItem,
+        ):
+            session.execute(
+                delete(dependent)
+                .where(dependent.product_id.in_(select(Product.id).where(*conditions)))
+                .execution_options(synchronize_session=False)
+            )
+        deleted_ids = session.execute(
+            delete(Product)
+            .where(*conditions)
+            .returning(Product.id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        if deleted_ids:
+            record_tombstones(
+                session, PRODUCT_ENTITY, deleted_ids, next_catalog_version(session)
+            )
+        session.commit()
+
+    if deleted_ids:
+        notify_products_changed(bulk=True)
+    return {"message": "Products deleted successfully", "deleted": len(deleted_ids)}
@@ -1,11 +1,100 @@
 import uuid
+from typing import List, Optional, Sequence
 
 from fastapi import HTTPException
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from database import engine
-from models_db import Product
-from schemas.product import ProductCreate, ProductUpdate
+from models_db import (
+    InventoryLot,
+    InventoryStock,
+    Product,
+    ProductAttribute,
+    ProductAvailability,
+    StockReservationItem,
+)
+from schemas.product import ProductCreate, ProductSort, ProductUpdate
+from services.catalog_cache import (
+    CATALOG_TAG,
+    PRODUCTS_TAG,
+    catalog_cache,
+    product_tag,
+)
+from services.catalog_events import notify_products_changed
+from services.catalog_version import (
+    PRODUCT_ENTITY,
+    next_catalog_version,
+    record_tombstones,
+)
+from services.image_service import thumbnail_url
+from services.stock_ledger import product_movements_error, products_with_movements
+
+# Campos que pueden pedirse con `fields=` (en orden de serialización)
+PRODUCT_FIELDS = (
+    "id",
+    "name",
+    "description",
+    "category_id",
+    "image_url",
+    "sku",
+    "barcode",
+)
+
+# Columnas de ordenamiento por clave permitida. Cada combinación de filtros
+# habitual queda cubierta por un índice (ver models_db.Product).
+PRODUCT_SORT_COLUMNS = {
+    ProductSort.NAME: (Product.name.asc(),),
+    ProductSort.NAME_DESC: (Product.name.desc(),),
+    ProductSort.CATEGORY: (Product.category_id.asc(), Product.name.asc()),
+}
+
+
+def product_to_dict(product, fields: Sequence[str] = PRODUCT_FIELDS) -> dict:
+    """
+    Serializa un producto (modelo o fila con columnas) a un diccionario.
+    Solo incluye los campos indicados en `fields`.
+    """
+    data = {}
+    for field in fields:
+        value = getattr(product, field)
+        data[field] = str(value) if isinstance(value, uuid.UUID) else value
+    return data
+
+
+def product_list_item(row, fields: Sequence[str] = PRODUCT_FIELDS) -> dict:
+    """
+    Serializa un producto para los listados: agrega `thumbnail_url` (miniatura
+    servida por /images) cuando se piden `id` e `image_url`.
+    """
+    data = product_to_dict(row, fields)
+    if "id" in data and "image_url" in data:
+        data["thumbnail_url"] = thumbnail_url(data["id"], data["image_url"])
+    return data
+
+
+def product_filters(
+    category_ids: Optional[List[uuid.UUID]] = None,
+    name_prefix: Optional[str] = None,
+    has_image: Optional[bool] = None,
+) -> list:
+    """
+    Construye las condiciones WHERE para filtrar productos.
+    """
+    conditions = []
+    if category_ids:
+        conditions.append(Product.category_id.in_(category_ids))
+    if name_prefix:
+        # Usa product_name_lower_idx (LIKE 'prefijo%')
+        conditions.append(
+            func.lower(Product.name).startswith(name_prefix.lower(), autoescape=True)
+        )
+    if has_image is True:
+        conditions.append(Product.image_url.isnot(None))
+    elif has_image is False:
+        conditions.append(Product.image_url.is_(None))
+    return conditions
 
 
 def create_product_service(product_data: ProductCreate):
@@ -20,48 +109,56 @@ def create_product_service(product_data: ProductCreate):
                 description=product_data.description,
                 category_id=product_data.category_id,
                 image_url=product_data.image_url,
+                sku=product_data.sku,
+                barcode=product_data.barcode,
+                version=next_catalog_version(session),
             )
             session.add(db_product)
             session.commit()
             session.refresh(db_product)
 
+            product = product_to_dict(db_product)
+            notify_products_changed(saved=[product])
             return {
                 "message": "Product created successfully",
-                "product": {
-                    "id": str(db_product.id),
-                    "name": db_product.name,
-                    "description": db_product.description,
-                    "category_id": (
-                        str(db_product.category_id) if db_product.category_id else None
-                    ),
-                    "image_url": db_product.image_url,
-                },
+                "product": product,
             }
     except Exception as e:
         print("Error creating product:", e)
         raise HTTPException(status_code=400, detail=f"Error creating product: {str(e)}")
 
 
-def get_products_service():
+@catalog_cache.cached(tags=lambda *args, **kwargs: (CATALOG_TAG,))
+def get_products_service(
+    category_ids: Optional[List[uuid.UUID]] = None,
+    name_prefix: Optional[str] = None,
+    has_image: Optional[bool] = None,
+    sort: ProductSort = ProductSort.NAME,
+    skip: int = 0,
+    limit: Optional[int] = None,
+    fields: Sequence[str] = PRODUCT_FIELDS,
+):
     """
-    Servicio para obtener todos los productos.
+    Servicio para obtener productos, con filtros y ordenamiento en el servidor.
+    Solo se seleccionan de la base de datos las columnas pedidas en `fields`.
     """
+    columns = [getattr(Product, field) for field in fields]
     with Session(engine) as session:
-        products = session.query(Product).all()
-        return [
-            {
-                "id": str(product.id),
-                "name": product.name,
-                "description": product.description,
-                "category_id": (
-                    str(product.category_id) if product.category_id else None
-                ),
-                "image_url": product.image_url,
-            }
-            for product in products
-        ]
+        query = (
+            session.query(*columns)
+            .filter(*product_filters(category_ids, name_prefix, has_image))
+            .order_by(*PRODUCT_SORT_COLUMNS[sort])
+        )
+        if skip:
+            query = query.offset(skip)
+        if limit is not None:
+            query = query.limit(limit)
+        return [product_list_item(row, fields) for row in query.all()]
 
 
+@catalog_cache.cached(
+    tags=lambda product_id: (product_tag(product_id), PRODUCTS_TAG)
+)
 def get_product_by_id_service(product_id: uuid.UUID):
     """
     Servicio para obtener un producto por ID.
@@ -71,13 +168,29 @@ def get_product_by_id_service(product_id: uuid.UUID):
         if not product:
             raise HTTPException(status_code=404, detail="Product not found")
 
-        return {
-            "id": str(product.id),
-            "name": product.name,
-            "description": product.description,
-            "category_id": (str(product.category_id) if product.category_id else None),
-            "image_url": product.image_url,
-        }
+        return product_to_dict(product)
+
+
+def get_products_by_ids_service(
+    product_ids: List[uuid.UUID], fields: Sequence[str] = PRODUCT_FIELDS
+):
+    """
+    Servicio para obtener varios productos por ID con un solo query (IN).
+    Devuelve los productos en el orden pedido, con `None` en las posiciones
+    no encontradas, y la lista de ids faltantes.
+    """
+    unique_ids = list(dict.fromkeys(product_ids))
+    columns = [getattr(Product, field) for field in fields]
+    with Session(engine) as session:
+        rows = session.query(*columns).filter(Product.id.in_(unique_ids)).all()
+
+    found = {row.id: product_to_dict(row, fields) for row in rows}
+    return {
+        "products": [found.get(product_id) for product_id in product_ids],
+        "missing": [
+            str(product_id) for product_id in unique_ids if product_id not in found
+        ],
+    }
 
 
 def update_product_service(product_id: uuid.UUID, product_data: ProductUpdate):
@@ -96,33 +209,53 @@ def update_product_service(product_id: uuid.UUID, product_data: ProductUpdate):
             if hasattr(product, field):
                 setattr(product, field, value)
 
-        session.commit()
+        try:
+            # El autoflush de next_catalog_version ya puede violar las únicas
+            product.version = next_catalog_version(session)
+            session.commit()
+        except IntegrityError:
+            session.rollback()
+            raise HTTPException(
+                status_code=409,
+                detail="A product with this name, SKU or barcode already exists",
+            )
         session.refresh(product)
 
+        updated = product_to_dict(product)
+        notify_products_changed(saved=[updated])
         return {
             "message": "Product updated successfully",
-            "product": {
-                "id": str(product.id),
-                "name": product.name,
-                "description": product.description,
-                "category_id": (
-                    str(product.category_id) if product.category_id else None
-                ),
-                "image_url": product.image_url,
-            },
+            "product": updated,
         }
 
 
 def delete_product_service(product_id: uuid.UUID):
     """
-    Servicio para eliminar un producto.
+    Servicio para eliminar un producto. Responde 409 si el producto tiene
+    movimientos de inventario: el libro de movimientos no se borra.
     """
     with Session(engine) as session:
         product = session.query(Product).filter(Product.id == product_id).first()
         if not product:
             raise HTTPException(status_code=404, detail="Product not found")
+        if products_with_movements(session, [product_id]):
+            raise product_movements_error([product_id])
 
+        for dependent in (
+            ProductAttribute,
+            InventoryStock,
+            InventoryLot,
+            ProductAvailability,
+            StockReservationItem,
+        ):
+            session.query(dependent).filter(
+                dependent.product_id == product_id
+            ).delete(synchronize_session=False)
         session.delete(product)
+        record_tombstones(
+            session, PRODUCT_ENTITY, [product_id], next_catalog_version(session)
+        )
         session.commit()
+        notify_products_changed(deleted_ids=[str(product_id)])
 
         return {"message": "Product deleted successfully"}
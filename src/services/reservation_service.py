@@ -0,0 +1,248 @@
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from config.settings import settings
+from database import engine
+from models_db import StockReservation, StockReservationItem
+from schemas.inventory import MovementKind, ReservationCreate, ReservationStatus
+from services.availability_service import refresh_availability
+from services.inventory_service import (
+    add_stock,
+    check_expired_stock,
+    insufficient_stock_error,
+    merge_stock_items,
+    record_outflow,
+    take_stock,
+)
+from services.stock_ledger import as_utc, movements_committed, utc_now
+from utils.expiry_scheduler import ExpiryScheduler
+
+# Vencimientos cargados de la base por recorrido
+_REFILL_LIMIT = 1000
+
+
+def reservation_to_dict(reservation: StockReservation) -> dict:
+    return {
+        "id": str(reservation.id),
+        "status": reservation.status,
+        "reference": reservation.reference,
+        "expires_at": as_utc(reservation.expires_at),
+        "created_at": as_utc(reservation.created_at),
+        "items": [
+            {
+                "product_id": str(item.product_id),
+                "location": item.location,
+                "quantity": item.quantity,
+            }
+            for item in reservation.items
+        ],
+    }
+
+
+def _transition(
+    session: Session, reservation_id: uuid.UUID, status: ReservationStatus, *conditions
+) -> bool:
+    """
+    Pasa una reserva activa a `status` con un solo UPDATE condicional: de
+    varios intentos simultáneos (confirmar, liberar, vencer) gana uno.
+    """
+    result = session.execute(
+        update(StockReservation)
+        .where(
+            StockReservation.id == reservation_id,
+            StockReservation.status == ReservationStatus.ACTIVE.value,
+            *conditions,
+        )
+        .values(status=status.value)
+        .execution_options(synchronize_session=False)
+    )
+    return bool(result.rowcount)
+
+
+def _transition_error(session: Session, reservation_id: uuid.UUID) -> HTTPException:
+    reservation = session.get(StockReservation, reservation_id)
+    if reservation is None:
+        return HTTPException(status_code=404, detail="Reservation not found")
+    if reservation.status == ReservationStatus.ACTIVE.value:
+        return HTTPException(status_code=409, detail="Reservation expired")
+    return HTTPException(
+        status_code=409, detail=f"Reservation is {reservation.status}"
+    )
+
+
+def _return_stock(
+    reservation_id: uuid.UUID, status: ReservationStatus, *conditions
+) -> Optional[dict]:
+    """
+    Cierra una reserva activa devolviendo sus unidades al stock. Devuelve
+    None si la reserva ya no estaba activa (o no cumple `conditions`).
+    """
+    with Session(engine) as session:
+        if not _transition(session, reservation_id, status, *conditions):
+            session.rollback()
+            return None
+        reservation = session.get(StockReservation, reservation_id)
+        for item in reservation.items:
+            add_stock(session, item.product_id, item.location, item.quantity)
+        data = reservation_to_dict(reservation)
+        session.commit()
+    reservation_expiry.cancel(str(reservation_id))
+    refresh_availability(uuid.UUID(item["product_id"]) for item in data["items"])
+    return data
+
+
+def expire_reservation(key: str) -> bool:
+    """Vence una reserva si sigue activa y su plazo ya pasó (idempotente)."""
+    return (
+        _return_stock(
+            uuid.UUID(key),
+            ReservationStatus.EXPIRED,
+            StockReservation.expires_at <= utc_now(),
+        )
+        is not None
+    )
+
+
+def _due_reservations(horizon: datetime) -> List[Tuple[datetime, str]]:
+    """Reservas activas que vencen hasta `horizon` (rango del índice)."""
+    with Session(engine) as session:
+        rows = session.execute(
+            select(StockReservation.id, StockReservation.expires_at)
+            .where(
+                StockReservation.status == ReservationStatus.ACTIVE.value,
+                StockReservation.expires_at <= horizon,
+            )
+            .order_by(StockReservation.expires_at)
+            .limit(_REFILL_LIMIT)
+        )
+        return [(as_utc(row.expires_at), str(row.id)) for row in rows]
+
+
+# Vencimientos de este worker en un min-heap; la recarga periódica desde el
+# índice (status, expires_at) cubre las reservas de otros workers y las que
+# quedaron pendientes tras un reinicio
+reservation_expiry = ExpiryScheduler(
+    expire_reservation,
+    refill=_due_reservations,
+    refill_interval=settings.RESERVATION_REFILL_SECONDS,
+    name="reservation-expiry",
+)
+
+
+def start_reservation_expiry() -> None:
+    reservation_expiry.start()
+
+
+def reserve_stock_service(
+    request: ReservationCreate, user_id: Optional[uuid.UUID] = None
+) -> dict:
+    """
+    Servicio para reservar stock por un tiempo limitado (carrito o pedido
+    pendiente): se reservan todos los ítems o ninguno.
+
+    Las unidades salen del stock disponible con el mismo descuento atómico de
+    las ventas, así dos reservas nunca toman la misma unidad; mientras la
+    reserva está activa el disponible es el stock físico menos lo reservado.
+    """
+    quantities = merge_stock_items(request.items)
+    reservation_id = uuid.uuid4()
+    now = utc_now()
+    expires_at = now + timedelta(seconds=request.ttl_seconds)
+    with Session(engine) as session:
+        for (product_id, location), quantity in sorted(quantities.items()):
+            product_uuid = uuid.UUID(product_id)
+            if not take_stock(session, product_uuid, location, quantity):
+                session.rollback()
+                raise insufficient_stock_error(
+                    session, product_uuid, location, quantity
+                )
+            check_expired_stock(session, product_uuid, location)
+        reservation = StockReservation(
+            id=reservation_id,
+            status=ReservationStatus.ACTIVE.value,
+            reference=request.reference,
+            user_id=user_id,
+            expires_at=expires_at,
+            created_at=now,
+        )
+        session.add(reservation)
+        session.flush()
+        session.add_all(
+            StockReservationItem(
+                reservation_id=reservation_id,
+                product_id=uuid.UUID(product_id),
+                location=location,
+                quantity=quantity,
+            )
+            for (product_id, location), quantity in sorted(quantities.items())
+        )
+        session.flush()
+        data = reservation_to_dict(reservation)
+        session.commit()
+    reservation_expiry.schedule(str(reservation_id), expires_at)
+    refresh_availability(uuid.UUID(product_id) for product_id, _ in quantities)
+    return data
+
+
+def get_reservation_service(reservation_id: uuid.UUID) -> dict:
+    """
+    Servicio para obtener una reserva.
+    """
+    with Session(engine) as session:
+        reservation = session.get(StockReservation, reservation_id)
+        if reservation is None:
+            raise HTTPException(status_code=404, detail="Reservation not found")
+        return reservation_to_dict(reservation)
+
+
+def confirm_reservation_service(
+    reservation_id: uuid.UUID, user_id: Optional[uuid.UUID] = None
+) -> dict:
+    """
+    Servicio para confirmar una reserva (el pedido se pagó): sus unidades se
+    registran como venta y salen de los lotes que vencen primero. Responde
+    409 si ya venció o no está activa.
+    """
+    with Session(engine) as session:
+        if not _transition(
+            session,
+            reservation_id,
+            ReservationStatus.CONFIRMED,
+            StockReservation.expires_at > utc_now(),
+        ):
+            session.rollback()
+            raise _transition_error(session, reservation_id)
+        reservation = session.get(StockReservation, reservation_id)
+        for item in reservation.items:
+            record_outflow(
+                session,
+                item.product_id,
+                item.location,
+                MovementKind.SALE,
+                item.quantity,
+                reservation.reference,
+                user_id,
+            )
+        data = reservation_to_dict(reservation)
+        keys = [(item.product_id, item.location) for item in reservation.items]
+        session.commit()
+    reservation_expiry.cancel(str(reservation_id))
+    movements_committed(keys)
+    return data
+
+
+def release_reservation_service(reservation_id: uuid.UUID) -> dict:
+    """
+    Servicio para liberar una reserva (carrito abandonado o pedido
+    cancelado): sus unidades vuelven a estar disponibles.
+    """
+    data = _return_stock(reservation_id, ReservationStatus.RELEASED)
+    if data is None:
+        with Session(engine) as session:
+            raise _transition_error(session, reservation_id)
+    return data
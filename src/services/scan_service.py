@@ -0,0 +1,136 @@
+import threading
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from database import engine
+from models_db import Product
+from services.catalog_cache import SharedIndexVersion
+from services.catalog_events import on_products_changed
+from services.product_service import PRODUCT_FIELDS, product_to_dict
+
+
+class _ScanIndex:
+    """
+    Índice en memoria código -> producto para la lectura en caja.
+
+    Guarda el producto ya serializado, así una lectura es una búsqueda en un
+    dict sin consultas a la base de datos. El código de barras tiene
+    prioridad sobre el SKU si un mismo código es ambas cosas.
+    """
+
+    def __init__(self):
+        self.by_barcode: Dict[str, dict] = {}
+        self.by_sku: Dict[str, dict] = {}
+        self.products: Dict[str, dict] = {}
+
+    def upsert(self, product: dict) -> None:
+        self.remove(product["id"])
+        if not product.get("barcode") and not product.get("sku"):
+            return
+        self.products[product["id"]] = product
+        if product.get("barcode"):
+            self.by_barcode[product["barcode"]] = product
+        if product.get("sku"):
+            self.by_sku[product["sku"]] = product
+
+    def remove(self, product_id: str) -> None:
+        previous = self.products.pop(product_id, None)
+        if previous is None:
+            return
+        if self.by_barcode.get(previous.get("barcode")) is previous:
+            del self.by_barcode[previous["barcode"]]
+        if self.by_sku.get(previous.get("sku")) is previous:
+            del self.by_sku[previous["sku"]]
+
+    def lookup(self, code: str) -> Optional[dict]:
+        return self.by_barcode.get(code) or self.by_sku.get(code)
+
+
+_scan_index = _ScanIndex()
+_index_loaded = False
+_index_lock = threading.Lock()
+# Escrituras recibidas; una carga concurrente con escrituras queda como no cargada
+_generation = 0
+# Escrituras de otros workers (el índice es por proceso)
+_index_version = SharedIndexVersion()
+
+
+def load_scan_index() -> int:
+    """
+    Carga (o recarga) el índice de códigos desde la base de datos. Se llama
+    al iniciar la aplicación y cuando otro worker escribió productos.
+    Devuelve la cantidad de productos con código.
+    """
+    global _scan_index, _index_loaded
+    generation = _generation
+    version = _index_version.current()
+    index = _ScanIndex()
+    with Session(engine) as session:
+        rows = session.query(
+            *[getattr(Product, field) for field in PRODUCT_FIELDS]
+        ).filter(or_(Product.barcode.isnot(None), Product.sku.isnot(None)))
+        for row in rows.yield_per(1000):
+            index.upsert(product_to_dict(row))
+    with _index_lock:
+        _scan_index = index
+        _index_loaded = generation == _generation
+        _index_version.loaded(version)
+    return len(index.products)
+
+
+def _ensure_index_loaded() -> _ScanIndex:
+    if not _index_loaded or not _index_version.is_current():
+        load_scan_index()
+    return _scan_index
+
+
+@on_products_changed
+def _sync_scan_index(saved: List[dict], deleted_ids: List[str], bulk: bool):
+    """
+    Mantiene el índice al día con las escrituras de productos de este
+    worker. Las escrituras masivas lo marcan para recargarse completo en la
+    próxima lectura, igual que las de otros workers (ver SharedIndexVersion).
+    """
+    global _index_loaded, _generation
+    with _index_lock:
+        _generation += 1
+        if not _index_loaded:
+            return
+        if bulk:
+            _index_loaded = False
+            return
+        for product in saved:
+            _scan_index.upsert(product)
+        for product_id in deleted_ids:
+            _scan_index.remove(product_id)
+        _index_version.applied()
+
+
+def scan_product_service(code: str) -> dict:
+    """
+    Servicio para obtener un producto por código de barras o SKU.
+    """
+    product = _ensure_index_loaded().lookup(code.strip())
+    if product is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return product
+
+
+def scan_products_service(codes: List[str]) -> dict:
+    """
+    Servicio para resolver varios códigos en una sola petición (checkout de
+    varios ítems). Los códigos repetidos se resuelven una vez.
+    """
+    index = _ensure_index_loaded()
+    found = {}
+    missing = []
+    for code in dict.fromkeys(code.strip() for code in codes):
+        product = index.lookup(code)
+        if product is None:
+            missing.append(code)
+        else:
+            found[code] = product
+    return {"products": found, "missing": missing}
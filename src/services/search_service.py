@@ -0,0 +1,158 @@
+import threading
+import uuid
+from typing import List, Sequence
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from database import engine
+from models_db import PRODUCT_SEARCH_CONFIG, Product, product_search_vector
+from services.catalog_cache import SharedIndexVersion
+from services.catalog_events import on_products_changed
+from services.product_service import PRODUCT_FIELDS, product_to_dict
+from utils.search_index import ProductSearchIndex
+
+# Índice en memoria usado cuando la base de datos no es PostgreSQL (SQLite)
+product_search_index = ProductSearchIndex()
+_index_loaded = False
+_index_lock = threading.Lock()
+# Escrituras de otros workers (el índice es por proceso)
+_index_version = SharedIndexVersion()
+
+
+def _use_postgres() -> bool:
+    return engine.dialect.name == "postgresql"
+
+
+def _ensure_index_loaded() -> ProductSearchIndex:
+    """
+    Construye el índice en memoria desde la base de datos la primera vez que
+    se usa, y lo reconstruye si otro worker escribió productos. Las
+    escrituras de este worker lo mantienen actualizado.
+
+    La reconstrucción llena un índice nuevo y recién al terminar reemplaza
+    al anterior: una búsqueda concurrente nunca ve un índice a medio cargar.
+    """
+    global product_search_index, _index_loaded
+    if _index_loaded and _index_version.is_current():
+        return product_search_index
+    with _index_lock:
+        if _index_loaded and _index_version.is_current():
+            return product_search_index
+        version = _index_version.current()
+        index = ProductSearchIndex()
+        with Session(engine) as session:
+            rows = session.query(Product.id, Product.name, Product.description)
+            for row in rows.yield_per(1000):
+                index.upsert(str(row.id), row.name, row.description)
+        product_search_index = index
+        _index_loaded = True
+        _index_version.loaded(version)
+        return index
+
+
+@on_products_changed
+def _sync_search_index(saved: List[dict], deleted_ids: List[str], bulk: bool):
+    """
+    Mantiene el índice en memoria al día con las escrituras de productos.
+    Si no está cargado no hace nada: se construirá completo al primer uso.
+    """
+    global _index_loaded
+    with _index_lock:
+        if not _index_loaded:
+            return
+        if bulk:
+            _index_loaded = False
+            return
+        for product in saved:
+            product_search_index.upsert(
+                product["id"], product["name"], product["description"]
+            )
+        for product_id in deleted_ids:
+            product_search_index.remove(product_id)
+        _index_version.applied()
+
+
+def _get_products_in_order(
+    session: Session, product_ids: List[str], fields: Sequence[str]
+) -> List[dict]:
+    columns = [getattr(Product, field) for field in fields]
+    rows = (
+        session.query(*columns)
+        .filter(Product.id.in_([uuid.UUID(product_id) for product_id in product_ids]))
+        .all()
+    )
+    by_id = {str(row.id): product_to_dict(row, fields) for row in rows}
+    return [by_id[product_id] for product_id in product_ids if product_id in by_id]
+
+
+def search_products_service(
+    query: str, limit: int = 20, fields: Sequence[str] = PRODUCT_FIELDS
+) -> List[dict]:
+    """
+    Servicio de búsqueda full-text sobre nombre y descripción.
+    En PostgreSQL rankea con tsvector (índice GIN) más similitud por trigramas
+    del nombre; en otros motores usa el índice invertido en memoria.
+    """
+    with Session(engine) as session:
+        if _use_postgres():
+            ts_query = func.plainto_tsquery(PRODUCT_SEARCH_CONFIG, query)
+            rank = func.ts_rank(product_search_vector, ts_query) + func.similarity(
+                Product.name, query
+            )
+            columns = [getattr(Product, field) for field in fields]
+            rows = (
+                session.query(*columns)
+                .filter(
+                    or_(
+                        product_search_vector.op("@@")(ts_query),
+                        Product.name.op("%")(query),
+                    )
+                )
+                .order_by(rank.desc(), Product.name)
+                .limit(limit)
+                .all()
+            )
+            return [product_to_dict(row, fields) for row in rows]
+
+        index = _ensure_index_loaded()
+        product_ids = [product_id for product_id, _ in index.search(query, limit)]
+        return _get_products_in_order(session, product_ids, fields)
+
+
+def autocomplete_products_service(prefix: str, limit: int = 10) -> List[dict]:
+    """
+    Servicio de autocompletado de nombres de producto (búsqueda mientras se
+    escribe). Devuelve solo `id` y `name`.
+    """
+    if not _use_postgres():
+        index = _ensure_index_loaded()
+        return [
+            {"id": product_id, "name": name}
+            for product_id, name in index.autocomplete(prefix, limit)
+        ]
+
+    with Session(engine) as session:
+        # Prefijo del nombre completo (product_name_lower_idx)
+        rows = (
+            session.query(Product.id, Product.name)
+            .filter(func.lower(Product.name).startswith(prefix.lower(), autoescape=True))
+            .order_by(Product.name)
+            .limit(limit)
+            .all()
+        )
+        if len(rows) < limit:
+            # Completar con coincidencias dentro del nombre (product_name_trgm_idx)
+            found = [row.id for row in rows]
+            pattern = (
+                prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            )
+            rows += (
+                session.query(Product.id, Product.name)
+                .filter(Product.name.ilike(f"%{pattern}%", escape="\\"))
+                .filter(Product.id.notin_(found))
+                .order_by(Product.name)
+                .limit(limit - len(rows))
+                .all()
+            )
+        return [{"id": str(row.id), "name": row.name} for row in rows]
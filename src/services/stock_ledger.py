@@ -0,0 +1,253 @@
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import event, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from config.settings import settings
+from database import engine
+from models_db import StockCheckpoint, StockMovement
+from schemas.inventory import MovementKind
+
+CHECKPOINT_INTERVAL = max(settings.STOCK_CHECKPOINT_INTERVAL, 1)
+CHECKPOINT_DELAY = timedelta(seconds=settings.STOCK_CHECKPOINT_DELAY_SECONDS)
+
+# Antigüedad máxima de un movimiento al confirmar su transacción. Con la
+# mitad de CHECKPOINT_DELAY, todo movimiento con created_at <= as_of de un
+# checkpoint ya estaba confirmado cuando ese checkpoint leyó el libro; si no,
+# quedaría fuera de todos los intervalos y el saldo histórico no cuadraría.
+MOVEMENT_MAX_AGE = CHECKPOINT_DELAY / 2
+
+# Clave en session.info con el created_at del primer movimiento pendiente
+_PENDING_SINCE = "stock_movements_pending_since"
+
+# Movimientos registrados por este worker desde el último checkpoint de cada
+# (producto, ubicación)
+_uncheckpointed: Dict[Tuple[uuid.UUID, str], int] = {}
+_uncheckpointed_lock = threading.Lock()
+
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def as_utc(moment: datetime) -> datetime:
+    """Fecha en UTC; las fechas sin zona se toman como UTC."""
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc)
+
+
+def record_movement(
+    session: Session,
+    product_id: uuid.UUID,
+    location: str,
+    kind: MovementKind,
+    quantity: int,
+    reference: Optional[str] = None,
+    user_id: Optional[uuid.UUID] = None,
+    lot_code: Optional[str] = None,
+) -> None:
+    """
+    Agrega un movimiento al libro dentro de la transacción de `session`.
+    Tras confirmarla hay que llamar a `movements_committed` con su
+    (producto, ubicación). La confirmación falla con 503 si pasa más de
+    MOVEMENT_MAX_AGE desde el primer movimiento de la transacción.
+    """
+    created_at = utc_now()
+    session.info.setdefault(_PENDING_SINCE, created_at)
+    movement = StockMovement(
+        id=uuid.uuid4(),
+        product_id=product_id,
+        location=location,
+        kind=kind.value,
+        quantity=quantity,
+        reference=reference,
+        lot_code=lot_code,
+        user_id=user_id,
+        created_at=created_at,
+    )
+    session.add(movement)
+
+
+@event.listens_for(Session, "before_commit")
+def _check_pending_movements(session: Session) -> None:
+    pending_since = session.info.pop(_PENDING_SINCE, None)
+    if pending_since is not None and utc_now() - pending_since > MOVEMENT_MAX_AGE:
+        raise HTTPException(
+            status_code=503, detail="Stock transaction took too long, retry"
+        )
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_movements(session: Session) -> None:
+    session.info.pop(_PENDING_SINCE, None)
+
+
+def movements_committed(keys: Iterable[Tuple[uuid.UUID, str]]) -> None:
+    """
+    Cuenta los movimientos confirmados y crea un checkpoint de saldo cada
+    CHECKPOINT_INTERVAL movimientos de un mismo producto y ubicación. Así la
+    consulta histórica nunca recorre más de unos pocos intervalos.
+    """
+    due = []
+    with _uncheckpointed_lock:
+        for key in keys:
+            count = _uncheckpointed.get(key, 0) + 1
+            if count >= CHECKPOINT_INTERVAL:
+                _uncheckpointed.pop(key, None)
+                due.append(key)
+            else:
+                _uncheckpointed[key] = count
+    for product_id, location in due:
+        create_checkpoint(product_id, location)
+
+
+def _latest_checkpoint(
+    session: Session, product_id: uuid.UUID, location: str, moment: datetime
+) -> Optional[StockCheckpoint]:
+    return session.execute(
+        select(StockCheckpoint)
+        .where(
+            StockCheckpoint.product_id == product_id,
+            StockCheckpoint.location == location,
+            StockCheckpoint.as_of <= moment,
+        )
+        .order_by(StockCheckpoint.as_of.desc())
+        .limit(1)
+    ).scalar_one_or_none()
+
+
+def _movements_between(
+    session: Session,
+    product_id: uuid.UUID,
+    location: str,
+    start: Optional[datetime],
+    end: datetime,
+) -> Tuple[int, int]:
+    """(cantidad de movimientos, suma) en el intervalo (start, end]."""
+    conditions = [
+        StockMovement.product_id == product_id,
+        StockMovement.location == location,
+        StockMovement.created_at <= end,
+    ]
+    if start is not None:
+        conditions.append(StockMovement.created_at > start)
+    count, total = session.execute(
+        select(func.count(), func.coalesce(func.sum(StockMovement.quantity), 0)).where(
+            *conditions
+        )
+    ).one()
+    return count, total
+
+
+def create_checkpoint(product_id: uuid.UUID, location: str) -> Optional[int]:
+    """
+    Guarda el saldo de un producto en una ubicación al momento actual menos
+    CHECKPOINT_DELAY: los movimientos más recientes pueden pertenecer a
+    transacciones aún sin confirmar y quedan para el siguiente checkpoint
+    (las anteriores ya confirmaron o fallaron, ver MOVEMENT_MAX_AGE).
+    Devuelve el saldo guardado, o None si no hubo movimientos desde el
+    checkpoint anterior.
+    """
+    as_of = utc_now() - CHECKPOINT_DELAY
+    with Session(engine) as session:
+        previous = _latest_checkpoint(session, product_id, location, as_of)
+        count, delta = _movements_between(
+            session, product_id, location, previous.as_of if previous else None, as_of
+        )
+        if not count:
+            return None
+        balance = (previous.balance if previous else 0) + delta
+        session.add(
+            StockCheckpoint(
+                product_id=product_id, location=location, as_of=as_of, balance=balance
+            )
+        )
+        try:
+            session.commit()
+        except IntegrityError:  # otro worker guardó el mismo instante
+            session.rollback()
+            return None
+        return balance
+
+
+def stock_as_of(
+    session: Session, product_id: uuid.UUID, location: str, moment: datetime
+) -> int:
+    """Saldo a una fecha: el checkpoint anterior más los movimientos siguientes."""
+    checkpoint = _latest_checkpoint(session, product_id, location, moment)
+    _, delta = _movements_between(
+        session, product_id, location, checkpoint.as_of if checkpoint else None, moment
+    )
+    return (checkpoint.balance if checkpoint else 0) + delta
+
+
+def products_with_movements(
+    session: Session, product_ids, limit: int = 20
+) -> List[uuid.UUID]:
+    """
+    Productos de `product_ids` (lista o subconsulta) con movimientos en el
+    libro, que por eso no pueden eliminarse. Devuelve hasta `limit`.
+    """
+    return list(
+        session.scalars(
+            select(StockMovement.product_id)
+            .distinct()
+            .where(StockMovement.product_id.in_(product_ids))
+            .limit(limit)
+        )
+    )
+
+
+def product_movements_error(product_ids: List[uuid.UUID]) -> HTTPException:
+    return HTTPException(
+        status_code=409,
+        detail={
+            "message": "Products with stock movements cannot be deleted",
+            "product_ids": [str(product_id) for product_id in product_ids],
+        },
+    )
+
+
+def movement_to_dict(movement: StockMovement) -> dict:
+    return {
+        "id": str(movement.id),
+        "product_id": str(movement.product_id),
+        "location": movement.location,
+        "kind": movement.kind,
+        "quantity": movement.quantity,
+        "reference": movement.reference,
+        "lot_code": movement.lot_code,
+        "user_id": str(movement.user_id) if movement.user_id else None,
+        "created_at": movement.created_at,
+    }
+
+
+def get_movements(
+    session: Session,
+    product_id: uuid.UUID,
+    location: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    skip: int = 0,
+    limit: int = 100,
+) -> List[dict]:
+    """Movimientos de un producto, del más reciente al más antiguo."""
+    query = select(StockMovement).where(StockMovement.product_id == product_id)
+    if location is not None:
+        query = query.where(StockMovement.location == location)
+    if since is not None:
+        query = query.where(StockMovement.created_at >= as_utc(since))
+    if until is not None:
+        query = query.where(StockMovement.created_at <= as_utc(until))
+    query = (
+        query.order_by(StockMovement.created_at.desc(), StockMovement.id)
+        .offset(skip)
+        .limit(limit)
+    )
+    return [movement_to_dict(movement) for movement in session.scalars(query)]
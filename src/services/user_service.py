@@ -1,7 +1,9 @@
 # from utils.auth import split_full_name  # Comentado - no se usa sin Google login
+from typing import Sequence
+
 import pyrebase
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, contains_eager, load_only
 
 from config.permissions import PermissionManager
 
@@ -14,6 +16,9 @@ from schemas.user import SignUpSchema
 
 firebaseConfig = settings.get_firebase_web_config()
 
+# Campos que pueden pedirse con `fields=` en el listado de usuarios
+USER_FIELDS = ("id", "email", "uid", "person")
+
 firebase = pyrebase.initialize_app(firebaseConfig)
 auth = firebase.auth()
 
@@ -116,13 +121,45 @@ def create_user_service(user_data: SignUpSchema):
 #         raise HTTPException(status_code=401, detail="Token inválido")
 
 
-def get_users_service():
+def _user_to_dict(user, fields: Sequence[str] = USER_FIELDS) -> dict:
+    """
+    Serializa un usuario (y opcionalmente su persona) a un diccionario.
+    """
+    data = {}
+    for field in fields:
+        if field == "person":
+            data["person"] = {
+                "id": str(user.person.id),
+                "name": user.person.name,
+                "last_name": user.person.last_name,
+                "document_type": user.person.document_type,
+                "document_number": user.person.document_number,
+            }
+        elif field == "id":
+            data["id"] = str(user.id)
+        else:
+            data[field] = getattr(user, field)
+    return data
+
+
+def get_users_service(fields: Sequence[str] = USER_FIELDS):
     """
     Servicio para obtener todos los usuarios con sus datos de persona.
+    Solo se consultan las columnas pedidas en `fields`; la persona se carga
+    en el mismo query (un solo JOIN) únicamente si se solicita.
     """
+    columns = [getattr(User, field) for field in fields if field != "person"]
     with Session(engine) as session:
-        users = session.query(User).join(Person).all()
-        return users
+        if "person" in fields:
+            users = (
+                session.query(User)
+                .join(Person)
+                .options(load_only(*columns), contains_eager(User.person))
+                .all()
+            )
+        else:
+            users = session.query(*columns).all()
+        return [_user_to_dict(user, fields) for user in users]
 
 
 def get_user_by_id_service(user_id: str):
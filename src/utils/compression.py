@@ -0,0 +1,228 @@
+import gzip
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él solo se negocia gzip
+    brotli = None
+
+# Tipos de contenido que vale la pena comprimir
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "text/",
+)
+
+
+def select_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Elige la codificación según Accept-Encoding (con pesos q).
+    Prefiere brotli si está instalado y el cliente lo acepta.
+    """
+    accepted = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name] = quality
+
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    wildcard = accepted.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoding in candidates:
+        quality = accepted.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class _CompressedBodyCache:
+    """LRU de cuerpos ya comprimidos, por (ETag, codificación)."""
+
+    def __init__(self, max_entries: int):
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str]) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def set(self, key: Tuple[str, str], body: bytes) -> None:
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+
+class CompressionMiddleware:
+    """
+    Middleware ASGI de compresión gzip/brotli.
+
+    Las respuestas menores a `minimum_size` se envían sin comprimir. Si la
+    respuesta trae ETag (recursos cacheables del catálogo) el cuerpo
+    comprimido se guarda por (ETag, codificación), así que cada versión se
+    comprime una sola vez. Las respuestas en streaming se comprimen por chunk.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 500,
+        cache_entries: int = 256,
+        gzip_level: int = 6,
+        brotli_quality: int = 5,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.cache = _CompressedBodyCache(cache_entries)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = select_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    def compressor(self, encoding: str):
+        if encoding == "br":
+            return _BrotliStream(self.brotli_quality)
+        return _GzipStream(self.gzip_level)
+
+
+class _GzipStream:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def process(self, chunk: bytes) -> bytes:
+        return self._compressor.compress(chunk) + self._compressor.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliStream:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def process(self, chunk: bytes) -> bytes:
+        return self._compressor.process(chunk) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _CompressionResponder:
+    """Intercepta los mensajes de una respuesta y decide si comprimirla."""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.downstream = send
+        self.start: Optional[Message] = None
+        self.passthrough = False
+        self.stream = None
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Copia de los headers: los de arriba pueden ser una lista
+            # compartida (p. ej. una respuesta de la micro-caché)
+            self.start = {**message, "headers": list(message.get("headers", []))}
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._flush_start()
+            await self.downstream(message)
+            return
+        if self.stream is not None:
+            await self._send_stream_chunk(message)
+            return
+
+        headers = MutableHeaders(raw=self.start["headers"])
+        if not self._is_compressible(headers):
+            self.passthrough = True
+            await self._flush_start()
+            await self.downstream(message)
+            return
+
+        headers.add_vary_header("Accept-Encoding")
+        body = message.get("body", b"")
+        if message.get("more_body", False):
+            # Streaming: tamaño desconocido, se comprime por chunk
+            self.stream = self.middleware.compressor(self.encoding)
+            headers["Content-Encoding"] = self.encoding
+            if "content-length" in headers:
+                del headers["content-length"]
+            await self._send_stream_chunk(message)
+            return
+
+        if len(body) < self.middleware.minimum_size:
+            await self._flush_start()
+            await self.downstream(message)
+            return
+
+        etag = headers.get("etag")
+        compressed = None
+        if etag:
+            compressed = self.middleware.cache.get((etag, self.encoding))
+        if compressed is None:
+            compressed = self.middleware.compress(body, self.encoding)
+            if etag:
+                self.middleware.cache.set((etag, self.encoding), compressed)
+        headers["Content-Encoding"] = self.encoding
+        headers["Content-Length"] = str(len(compressed))
+        await self._flush_start()
+        await self.downstream({"type": "http.response.body", "body": compressed})
+
+    async def _send_stream_chunk(self, message: Message) -> None:
+        await self._flush_start()
+        more_body = message.get("more_body", False)
+        data = self.stream.process(message.get("body", b""))
+        if not more_body:
+            data += self.stream.finish()
+        await self.downstream(
+            {"type": "http.response.body", "body": data, "more_body": more_body}
+        )
+
+    async def _flush_start(self) -> None:
+        if self.start is not None:
+            await self.downstream(self.start)
+            self.start = None
+
+    def _is_compressible(self, headers: MutableHeaders) -> bool:
+        if "content-encoding" in headers or self.start["status"] < 200:
+            return False
+        if self.start["status"] in (204, 304):
+            return False
+        content_type = headers.get("content-type", "")
+        return content_type.startswith(COMPRESSIBLE_TYPES)
@@ -0,0 +1,135 @@
+import heapq
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from utils.logging_config import log_error
+
+# Fuente de vencimientos pendientes (p. ej. un índice en la base de datos):
+# recibe el horizonte y devuelve pares (vencimiento, clave) hasta él
+RefillSource = Callable[[datetime], Iterable[Tuple[datetime, str]]]
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class ExpiryScheduler:
+    """
+    Vencimientos en un min-heap atendido por un thread.
+
+    El thread duerme hasta el vencimiento más próximo y llama a `on_expire`
+    con cada clave vencida: cada vencimiento cuesta un push y un pop del
+    heap, sin recorrer lo que aún no vence. Cancelar es perezoso (la entrada
+    se descarta al salir del heap) y reprogramar una clave solo cuenta su
+    último vencimiento.
+
+    Con `refill`, cada `refill_interval` segundos pide a la fuente los
+    vencimientos hasta el siguiente recorrido y los agrega: así también
+    vencen las claves creadas por otros procesos o que quedaron pendientes
+    tras un reinicio. `on_expire` debe ser idempotente.
+    """
+
+    def __init__(
+        self,
+        on_expire: Callable[[str], None],
+        refill: Optional[RefillSource] = None,
+        refill_interval: float = 30.0,
+        name: str = "expiry-scheduler",
+    ):
+        self._on_expire = on_expire
+        self._refill = refill
+        self._refill_interval = refill_interval
+        self._name = name
+        self._heap: List[Tuple[datetime, str]] = []
+        self._deadlines: Dict[str, datetime] = {}
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def schedule(self, key: str, deadline: datetime) -> None:
+        with self._condition:
+            if self._deadlines.get(key) == deadline:
+                return
+            self._deadlines[key] = deadline
+            heapq.heappush(self._heap, (deadline, key))
+            if self._heap[0] == (deadline, key):
+                self._condition.notify()
+
+    def cancel(self, key: str) -> None:
+        with self._condition:
+            self._deadlines.pop(key, None)
+
+    def pop_due(self, now: Optional[datetime] = None) -> List[str]:
+        """Quita y devuelve las claves vencidas a `now`."""
+        now = now or _utc_now()
+        due = []
+        with self._condition:
+            while self._heap and self._heap[0][0] <= now:
+                deadline, key = heapq.heappop(self._heap)
+                if self._deadlines.get(key) == deadline:
+                    del self._deadlines[key]
+                    due.append(key)
+        return due
+
+    def refill_now(self) -> None:
+        if self._refill is None:
+            return
+        horizon = _utc_now() + timedelta(seconds=2 * self._refill_interval)
+        for deadline, key in self._refill(horizon):
+            self.schedule(key, deadline)
+
+    def run_due(self, now: Optional[datetime] = None) -> int:
+        """Atiende las claves vencidas. Devuelve cuántas se atendieron."""
+        due = self.pop_due(now)
+        for key in due:
+            try:
+                self._on_expire(key)
+            except Exception as e:  # un fallo no detiene a las demás
+                log_error(e, f"{self._name}: error expiring {key}")
+        return len(due)
+
+    def start(self) -> None:
+        with self._condition:
+            if self._thread is not None:
+                return
+            self._stopped = False
+            self._thread = threading.Thread(
+                target=self._run, name=self._name, daemon=True
+            )
+        self._thread.start()
+
+    def stop(self) -> None:
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        next_refill = 0.0
+        while True:
+            now = _utc_now()
+            if self._refill is not None and now.timestamp() >= next_refill:
+                try:
+                    self.refill_now()
+                except Exception as e:
+                    log_error(e, f"{self._name}: error loading deadlines")
+                next_refill = now.timestamp() + self._refill_interval
+            self.run_due(now)
+
+            with self._condition:
+                if self._stopped:
+                    return
+                waits = []
+                if self._refill is not None:
+                    waits.append(next_refill - _utc_now().timestamp())
+                if self._heap:
+                    waits.append((self._heap[0][0] - _utc_now()).total_seconds())
+                timeout = min(waits) if waits else None
+                if timeout is None or timeout > 0:
+                    self._condition.wait(timeout)
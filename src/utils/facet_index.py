@@ -0,0 +1,165 @@
+import heapq
+import threading
+from typing import Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+# Filtros de una consulta: atributo -> valores aceptados (OR dentro del
+# atributo, AND entre atributos)
+FacetFilters = Mapping[str, Sequence[str]]
+
+
+def _popcount_bin(bitmap: int) -> int:
+    return bin(bitmap).count("1")
+
+
+# int.bit_count (Python 3.10+) cuenta en C sin crear el string binario
+_popcount = getattr(int, "bit_count", _popcount_bin)
+
+
+def _iter_bits(bitmap: int) -> Iterator[int]:
+    """Posiciones de los bits encendidos, de menor a mayor."""
+    bits = bin(bitmap)[:1:-1]
+    position = bits.find("1")
+    while position != -1:
+        yield position
+        position = bits.find("1", position + 1)
+
+
+class FacetIndex:
+    """
+    Índice de facetas en memoria con un bitmap por (atributo, valor).
+
+    Cada producto ocupa una posición de bit; los bitmaps son enteros de
+    Python, así que intersecciones, uniones y conteos de una consulta con
+    varios filtros se resuelven con operaciones bit a bit sin recorrer los
+    productos. Las posiciones liberadas se reutilizan. Es seguro para usar
+    desde varios threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._bitmaps: Dict[Tuple[str, str], int] = {}
+        self._slots: Dict[str, int] = {}
+        self._doc_ids: List[Optional[str]] = []
+        self._names: List[Optional[str]] = []
+        self._attributes: Dict[str, Dict[str, str]] = {}
+        self._free_slots: List[int] = []
+        self._all = 0
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.__init__()
+
+    def upsert(self, doc_id: str, name: str, attributes: Mapping[str, str]) -> None:
+        """Agrega o reemplaza los atributos de un producto."""
+        with self._lock:
+            slot = self._slots.get(doc_id)
+            if slot is None:
+                slot = self._allocate(doc_id)
+            else:
+                self._unset_attributes(doc_id, slot)
+            self._names[slot] = name
+            self._attributes[doc_id] = dict(attributes)
+            bit = 1 << slot
+            for attribute, value in attributes.items():
+                key = (attribute, value)
+                self._bitmaps[key] = self._bitmaps.get(key, 0) | bit
+
+    def remove(self, doc_id: str) -> None:
+        """Elimina un producto del índice (no falla si no existe)."""
+        with self._lock:
+            slot = self._slots.pop(doc_id, None)
+            if slot is None:
+                return
+            self._unset_attributes(doc_id, slot)
+            self._attributes.pop(doc_id, None)
+            self._doc_ids[slot] = None
+            self._names[slot] = None
+            self._all &= ~(1 << slot)
+            self._free_slots.append(slot)
+
+    def attributes(self, doc_id: str) -> Dict[str, str]:
+        with self._lock:
+            return dict(self._attributes.get(doc_id, {}))
+
+    def search(
+        self,
+        filters: FacetFilters,
+        facet_attributes: Sequence[str],
+        skip: int = 0,
+        limit: int = 20,
+    ) -> Tuple[int, List[str], Dict[str, Dict[str, int]]]:
+        """
+        Aplica los filtros y devuelve (total, ids de la página ordenados por
+        nombre, conteos por faceta).
+
+        Los conteos de cada atributo ignoran el filtro de ese mismo atributo
+        (facetas disyuntivas), para que la interfaz pueda mostrar cuántos
+        productos agregaría elegir otro valor.
+        """
+        with self._lock:
+            per_attribute = {
+                attribute: self._union(attribute, values)
+                for attribute, values in filters.items()
+                if values
+            }
+            result = self._intersect(per_attribute.values())
+
+            facets = {}
+            for attribute in facet_attributes:
+                base = self._intersect(
+                    bitmap
+                    for other, bitmap in per_attribute.items()
+                    if other != attribute
+                )
+                counts = {}
+                for (key_attribute, value), bitmap in self._bitmaps.items():
+                    if key_attribute != attribute:
+                        continue
+                    count = _popcount(bitmap & base)
+                    if count:
+                        counts[value] = count
+                facets[attribute] = dict(sorted(counts.items()))
+
+            page = heapq.nsmallest(
+                skip + limit, _iter_bits(result), key=self._names.__getitem__
+            )[skip:]
+            return _popcount(result), [self._doc_ids[slot] for slot in page], facets
+
+    def _union(self, attribute: str, values: Sequence[str]) -> int:
+        bitmap = 0
+        for value in values:
+            bitmap |= self._bitmaps.get((attribute, value), 0)
+        return bitmap
+
+    def _intersect(self, bitmaps) -> int:
+        result = self._all
+        for bitmap in bitmaps:
+            result &= bitmap
+            if not result:
+                break
+        return result
+
+    def _allocate(self, doc_id: str) -> int:
+        if self._free_slots:
+            slot = self._free_slots.pop()
+            self._doc_ids[slot] = doc_id
+        else:
+            slot = len(self._doc_ids)
+            self._doc_ids.append(doc_id)
+            self._names.append(None)
+        self._slots[doc_id] = slot
+        self._all |= 1 << slot
+        return slot
+
+    def _unset_attributes(self, doc_id: str, slot: int) -> None:
+        mask = ~(1 << slot)
+        for attribute, value in self._attributes.get(doc_id, {}).items():
+            key = (attribute, value)
+            bitmap = self._bitmaps.get(key, 0) & mask
+            if bitmap:
+                self._bitmaps[key] = bitmap
+            else:
+                self._bitmaps.pop(key, None)
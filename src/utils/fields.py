@@ -0,0 +1,30 @@
+from typing import List, Optional, Sequence
+
+from fastapi import HTTPException
+
+
+def parse_fields(
+    fields: Optional[str],
+    allowed: Sequence[str],
+    required: Sequence[str] = ("id",),
+) -> List[str]:
+    """
+    Interpreta el parámetro `fields=` (lista separada por comas) de un endpoint.
+
+    Valida cada campo contra la lista blanca del recurso y devuelve los campos
+    seleccionados en el orden de `allowed`, incluyendo siempre los `required`.
+    Si no se envía el parámetro se devuelven todos los campos permitidos.
+    """
+    if fields is None:
+        return list(allowed)
+
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    invalid = sorted(requested - set(allowed))
+    if invalid:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid fields: {invalid}. Allowed: {list(allowed)}",
+        )
+
+    requested.update(required)
+    return [field for field in allowed if field in requested]
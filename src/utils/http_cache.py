@@ -0,0 +1,95 @@
+import hashlib
+from typing import Callable, Iterable, Optional
+
+from fastapi import HTTPException, Request, Response
+
+from utils.tag_cache import SharedTagVersions
+
+# Políticas de Cache-Control por tipo de recurso. Con ETag el cliente
+# revalida barato (304) al vencer max-age.
+CATALOG_CACHE_CONTROL = "public, max-age=30, must-revalidate"
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(versions: SharedTagVersions, tags: Iterable[str], *extra: str) -> str:
+    """
+    ETag débil derivado de los tags del recurso y sus versiones (y de datos
+    extra como el query string), sin leer ni serializar el recurso.
+    """
+    tags = tuple(tags)
+    seed = repr((tags, versions.snapshot(tags), extra)).encode()
+    return f'W/"{hashlib.sha1(seed).hexdigest()[:20]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Compara If-None-Match con el ETag (comparación débil, RFC 9110)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    weak = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == weak:
+            return True
+    return False
+
+
+def conditional_get(
+    versions: SharedTagVersions,
+    tags: Callable[[Request], Iterable[str]],
+    cache_control: str = CATALOG_CACHE_CONTROL,
+):
+    """
+    Dependencia para GET condicionales.
+
+    Calcula el ETag a partir de las versiones de los tags que devuelve
+    `tags(request)` y del query string. Si coincide con If-None-Match corta
+    la petición con 304 antes de ejecutar el endpoint (sin consultas a la
+    base de datos ni serialización); si no, agrega ETag y Cache-Control a la
+    respuesta.
+    """
+
+    def dependency(request: Request, response: Response):
+        check_not_modified(versions, tags(request), request, response, cache_control)
+
+    return dependency
+
+
+def check_not_modified(
+    versions: SharedTagVersions,
+    tags: Iterable[str],
+    request: Request,
+    response: Response,
+    cache_control: str = CATALOG_CACHE_CONTROL,
+    *extra: str,
+) -> None:
+    """
+    Corta la petición con 304 si If-None-Match coincide con el ETag de
+    `tags`, la ruta, el query string y `extra`; si no, agrega ETag y
+    Cache-Control a la respuesta. Para dependencias que ya resolvieron
+    datos propios (p. ej. el usuario) y no pueden usar `conditional_get`.
+    """
+    etag = make_etag(
+        versions, tags, request.url.path, str(request.query_params), *extra
+    )
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(status_code=304, headers=headers)
+    response.headers.update(headers)
+
+
+def raw_json_response(body, response: Response) -> Response:
+    """
+    Respuesta JSON con un cuerpo ya serializado (bytes o memoryview), sin
+    pasar por la validación ni el encoder de FastAPI. Copia el ETag y el
+    Cache-Control que dejó `conditional_get` en `response`.
+    """
+    headers = {
+        name: response.headers[name]
+        for name in ("etag", "cache-control")
+        if name in response.headers
+    }
+    return Response(content=body, media_type="application/json", headers=headers)
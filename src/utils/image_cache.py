@@ -0,0 +1,172 @@
+import hashlib
+import os
+import threading
+import time
+from typing import Optional
+
+# Fracción del límite a la que se baja al desalojar, para no desalojar en
+# cada escritura al estar justo en el borde
+_EVICT_TARGET = 0.9
+
+
+class ContentAddressedCache:
+    """
+    Caché en disco direccionada por contenido, con tamaño acotado.
+
+    Cada objeto se guarda una sola vez bajo el sha256 de sus bytes
+    (`objects/ab/abcd...`), así dos URLs con la misma imagen comparten el
+    archivo. Las referencias (`refs/<clave>`) apuntan de una clave lógica,
+    p. ej. URL + tamaño, al digest del objeto. Las escrituras son atómicas
+    (archivo temporal + os.replace), por lo que varios workers pueden usar el
+    mismo directorio.
+
+    Al superar `max_bytes` se desalojan los archivos menos usados (los
+    aciertos actualizan el mtime) junto con las referencias que apuntaban a
+    ellos. Una referencia cuyo objeto ya no está cuenta como fallo. Con
+    `max_bytes=None` no se desaloja nada (almacenamiento permanente).
+    """
+
+    def __init__(self, root: str, max_bytes: Optional[int]):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._objects = os.path.join(root, "objects")
+        self._refs = os.path.join(root, "refs")
+        os.makedirs(self._objects, exist_ok=True)
+        os.makedirs(self._refs, exist_ok=True)
+        self._lock = threading.Lock()
+        # Bytes escritos por este worker desde el último recorrido completo
+        self._written = 0
+
+    @staticmethod
+    def key(*parts: str) -> str:
+        """Clave de referencia estable a partir de sus partes."""
+        return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+    def object_path(self, digest: str) -> str:
+        return os.path.join(self._objects, digest[:2], digest)
+
+    def get(self, key: str) -> Optional[str]:
+        """Digest del objeto referenciado por `key`, o None si no está."""
+        try:
+            with open(os.path.join(self._refs, key)) as file:
+                digest = file.read().strip()
+        except FileNotFoundError:
+            return None
+        path = self.object_path(digest)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return digest
+
+    def read(self, digest: str) -> Optional[bytes]:
+        try:
+            with open(self.object_path(digest), "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    def temp_path(self) -> str:
+        """Ruta temporal en el mismo sistema de archivos (para os.replace)."""
+        return os.path.join(
+            self._objects,
+            f"{os.getpid()}.{threading.get_ident()}.{time.monotonic_ns()}.tmp",
+        )
+
+    def put(self, key: str, data: bytes) -> str:
+        """Guarda `data` y lo referencia con `key`. Devuelve su digest."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.object_path(digest)
+        if os.path.exists(path):
+            os.utime(path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._write_atomic(path, data)
+        self._write_atomic(os.path.join(self._refs, key), digest.encode())
+        self._account(len(data))
+        return digest
+
+    def adopt(self, temp_path: str, digest: str) -> bool:
+        """
+        Incorpora un archivo ya escrito (p. ej. una subida en streaming) cuyo
+        sha256 es `digest`, sin volver a leerlo. Devuelve False si el contenido
+        ya estaba guardado (el archivo temporal se descarta).
+        """
+        path = self.object_path(digest)
+        if os.path.exists(path):
+            os.remove(temp_path)
+            os.utime(path)
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        size = os.path.getsize(temp_path)
+        os.replace(temp_path, path)
+        self._account(size)
+        return True
+
+    def _account(self, size: int) -> None:
+        if self.max_bytes is None:
+            return
+        with self._lock:
+            self._written += size
+            over_limit = self._written > self.max_bytes * (1 - _EVICT_TARGET)
+        if over_limit:
+            self.evict()
+
+    def evict(self) -> int:
+        """
+        Recorre la caché y borra los objetos más antiguos hasta quedar bajo
+        el límite, y luego las referencias a objetos borrados. Devuelve la
+        cantidad de bytes liberados.
+        """
+        if self.max_bytes is None:
+            return 0
+        with self._lock:
+            self._written = 0
+        entries = []
+        total = 0
+        for directory, _, names in os.walk(self._objects):
+            for name in names:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+        if total <= self.max_bytes:
+            return 0
+
+        freed = 0
+        target = self.max_bytes * _EVICT_TARGET
+        for _, size, path in sorted(entries):
+            if total - freed <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            freed += size
+        if freed:
+            self._remove_dangling_refs()
+        return freed
+
+    def _remove_dangling_refs(self) -> None:
+        """Borra las referencias cuyo objeto ya no existe."""
+        for entry in os.scandir(self._refs):
+            if entry.name.endswith(".tmp"):
+                continue
+            try:
+                with open(entry.path) as file:
+                    digest = file.read().strip()
+                if not os.path.exists(self.object_path(digest)):
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                continue
+
+    def _write_atomic(self, path: str, data: bytes) -> None:
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.{time.monotonic_ns()}.tmp"
+        with open(temp_path, "wb") as file:
+            file.write(data)
+        os.replace(temp_path, path)
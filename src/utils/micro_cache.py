@@ -0,0 +1,182 @@
+import asyncio
+import re
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from utils.http_cache import etag_matches
+
+# (status, headers crudos, cuerpo); los headers en tupla porque se comparten
+# entre respuestas y los middlewares de afuera pueden editar la lista enviada
+CachedResponse = Tuple[int, Tuple[Tuple[bytes, bytes], ...], bytes]
+
+
+class MicroCacheMiddleware:
+    """
+    Micro-caché ASGI para GET públicos y anónimos.
+
+    Guarda respuestas completas durante `ttl` segundos (típicamente menos de
+    uno a unos pocos) y agrupa los misses concurrentes de una misma clave en
+    una sola ejecución (single-flight): el primer request ejecuta el endpoint
+    y los demás esperan y comparten su respuesta. Así una invalidación del
+    catálogo o un worker recién iniciado no disparan decenas de consultas
+    idénticas.
+
+    La clave es ruta + query string + `version_key()` (versiones del catálogo),
+    sin headers de autenticación ni Origin: solo deben registrarse en `paths`
+    rutas cuya respuesta no depende del usuario, y los middlewares que varían
+    según el request (CORS) deben ir por fuera. Solo se guardan respuestas 200 sin
+    streaming, sin Set-Cookie y sin Cache-Control private/no-store.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        paths: Sequence[str],
+        ttl: float = 1.0,
+        max_entries: int = 1024,
+        version_key: Callable[[], Hashable] = lambda: None,
+    ):
+        self.app = app
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.version_key = version_key
+        self._paths = re.compile("|".join(f"(?:{path})" for path in paths))
+        self._entries: "OrderedDict[Hashable, Tuple[float, CachedResponse]]" = (
+            OrderedDict()
+        )
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            self.ttl <= 0
+            or scope["type"] != "http"
+            or scope["method"] != "GET"
+            or not self._paths.fullmatch(scope["path"])
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        key = (scope["path"], scope["query_string"], self.version_key())
+        if_none_match = Headers(scope=scope).get("if-none-match")
+
+        cached = self._get(key)
+        if cached is not None:
+            await self._send_cached(cached, if_none_match, send)
+            return
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            cached = await asyncio.shield(in_flight)
+            if cached is not None:
+                await self._send_cached(cached, if_none_match, send)
+                return
+            # El líder no obtuvo una respuesta cacheable: ejecutar normalmente
+            await self.app(scope, receive, send)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        cached = None
+        try:
+            cached = await self._run_leader(scope, receive, send)
+            if cached is not None:
+                self._set(key, cached)
+        finally:
+            # Los que esperan se liberan siempre, aunque el líder falle
+            del self._in_flight[key]
+            future.set_result(cached)
+
+    async def _run_leader(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> Optional[CachedResponse]:
+        """
+        Ejecuta el endpoint sin headers condicionales, acumulando la respuesta.
+        Devuelve la respuesta si es cacheable (ya enviada al cliente del líder).
+        """
+        headers = [
+            (name, value)
+            for name, value in scope["headers"]
+            if name != b"if-none-match"
+        ]
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        start: Optional[Message] = None
+        body: List[bytes] = []
+        streaming = False
+
+        async def capture(message: Message) -> None:
+            nonlocal start, streaming
+            if streaming:
+                await send(message)
+            elif message["type"] == "http.response.start":
+                start = message
+            elif message["type"] == "http.response.body":
+                body.append(message.get("body", b""))
+                if message.get("more_body", False):
+                    # Streaming: no se cachea, se reenvía tal cual
+                    streaming = True
+                    await send(start)
+                    await send({**message, "body": b"".join(body)})
+            else:
+                await send(message)
+
+        await self.app({**scope, "headers": headers}, receive, capture)
+        if streaming or start is None:
+            return None
+
+        response = (start["status"], tuple(start["headers"]), b"".join(body))
+        await self._send_cached(response, if_none_match, send)
+        return response if self._is_cacheable(response) else None
+
+    async def _send_cached(
+        self, response: CachedResponse, if_none_match: Optional[str], send: Send
+    ) -> None:
+        status, headers, body = response
+        etag = Headers(raw=headers).get("etag")
+        if status == 200 and etag and etag_matches(if_none_match, etag):
+            not_modified = [
+                (name, value)
+                for name, value in headers
+                if name in (b"etag", b"cache-control", b"vary")
+            ]
+            await send(
+                {"type": "http.response.start", "status": 304, "headers": not_modified}
+            )
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await send(
+            {"type": "http.response.start", "status": status, "headers": list(headers)}
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    def _is_cacheable(self, response: CachedResponse) -> bool:
+        status, headers, _ = response
+        if status != 200:
+            return False
+        parsed = Headers(raw=headers)
+        cache_control = parsed.get("cache-control", "").lower()
+        return (
+            "set-cookie" not in parsed
+            and "private" not in cache_control
+            and "no-store" not in cache_control
+        )
+
+    def _get(self, key: Hashable) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, response = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return response
+
+    def _set(self, key: Hashable, response: CachedResponse) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
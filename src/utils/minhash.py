@@ -0,0 +1,269 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy es opcional: sin él no hay detección de duplicados
+    np = None
+
+from utils.search_index import tokenize
+
+# Las permutaciones son hashing multiply-shift: los 32 bits altos de
+# a * h + b en aritmética módulo 2^64 (sin divisiones, más rápido que mod p)
+_SHIFT = np.uint64(32) if np is not None else None
+
+# Productos por lote al calcular firmas en bloque (acota la memoria temporal)
+_BATCH_SIZE = 512
+
+
+def normalize_text(text: str) -> bytes:
+    """Texto en minúsculas, sin tildes ni puntuación, como bytes UTF-8."""
+    return " ".join(tokenize(text)).encode()
+
+
+def _shingle_values(
+    texts: Sequence[str], size: int
+) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    n-gramas de bytes de varios textos normalizados, como enteros, calculados
+    de una vez sobre el buffer concatenado. Un texto más corto que `size` es
+    un único shingle (vacío: el shingle 0). Devuelve (valores, shingles por texto).
+    """
+    encoded = [normalize_text(text) for text in texts]
+    buffer = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+    grams = np.zeros(max(len(buffer) - size + 1, 0), dtype=np.uint64)
+    for offset in range(size):
+        grams = (grams << np.uint64(8)) | buffer[offset : offset + len(grams)]
+
+    parts = []
+    start = 0
+    for data in encoded:
+        if len(data) >= size:
+            parts.append(grams[start : start + len(data) - size + 1])
+        else:
+            parts.append(np.array([int.from_bytes(data, "big")], dtype=np.uint64))
+        start += len(data)
+    counts = np.fromiter((len(part) for part in parts), dtype=np.int64, count=len(parts))
+    return np.concatenate(parts), counts
+
+
+class MinHashLSH:
+    """
+    Índice MinHash + LSH para encontrar textos casi duplicados.
+
+    Cada texto se resume en `num_perm` mínimos de permutaciones aleatorias de
+    sus shingles (la fracción de mínimos iguales estima la similitud de
+    Jaccard). La firma se parte en `bands` bandas: dos textos son candidatos
+    si coinciden en al menos una banda completa, así una consulta solo compara
+    contra unos pocos candidatos en lugar de contra todo el índice. Con 16
+    bandas de 4 filas el umbral efectivo ronda una similitud de 0.5.
+
+    Las firmas se calculan vectorizadas con numpy. Es seguro para usar desde
+    varios threads.
+    """
+
+    def __init__(
+        self, num_perm: int = 64, bands: int = 16, shingle_size: int = 3, seed: int = 1
+    ):
+        if np is None:
+            raise RuntimeError("numpy is required for MinHashLSH")
+        if not 1 <= shingle_size <= 8:
+            raise ValueError("shingle_size must be between 1 and 8")
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        # `a` impar para que la multiplicación sea una biyección módulo 2^64
+        self._a = rng.integers(0, 2**64, size=(num_perm, 1), dtype=np.uint64) | 1
+        self._b = rng.integers(0, 2**64, size=(num_perm, 1), dtype=np.uint64)
+        self._band_mix = rng.integers(0, 2**64, size=self.rows, dtype=np.uint64) | 1
+        self._lock = threading.RLock()
+        self.clear()
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def clear(self) -> None:
+        with self._lock:
+            # Capacidad que se duplica al llenarse: agregar no copia todo
+            self._signatures = np.zeros((1024, self.num_perm), dtype=np.uint32)
+            self._doc_ids: List[Optional[str]] = []
+            self._positions: Dict[str, int] = {}
+            # Filas de documentos eliminados o reemplazados, para reutilizar
+            self._free_positions: List[int] = []
+            self._buckets: List[Dict[int, Set[int]]] = [
+                {} for _ in range(self.bands)
+            ]
+
+    def signatures(self, texts: Sequence[str]) -> "np.ndarray":
+        """Firmas MinHash de varios textos, calculadas por lotes."""
+        result = np.empty((len(texts), self.num_perm), dtype=np.uint32)
+        for start in range(0, len(texts), _BATCH_SIZE):
+            batch = texts[start : start + _BATCH_SIZE]
+            values, counts = _shingle_values(batch, self.shingle_size)
+            permuted = (self._a * values + self._b) >> _SHIFT
+            offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+            result[start : start + len(batch)] = np.minimum.reduceat(
+                permuted, offsets, axis=1
+            ).T
+        return result
+
+    def signature(self, text: str) -> "np.ndarray":
+        return self.signatures([text])[0]
+
+    def _band_keys(self, signatures: "np.ndarray") -> List[List[int]]:
+        """
+        Clave de cada banda de cada firma: un hash de 64 bits de sus filas.
+        Una colisión solo agrega un candidato, que luego se descarta al
+        comparar las firmas completas.
+        """
+        bands = signatures.reshape(len(signatures), self.bands, self.rows)
+        return (bands.astype(np.uint64) * self._band_mix).sum(axis=2).tolist()
+
+    def add_many(self, items: Iterable[Tuple[str, str]]) -> None:
+        """
+        Agrega o reemplaza varios (id, texto) de una vez. Las filas liberadas
+        por eliminaciones y reemplazos se reutilizan antes de crecer, así el
+        arreglo de firmas no crece con cada edición.
+        """
+        items = list(dict(items).items())  # un id repetido: gana el último
+        if not items:
+            return
+        new_signatures = self.signatures([text for _, text in items])
+        with self._lock:
+            for doc_id, _ in items:
+                self._remove_locked(doc_id)
+            reused = min(len(items), len(self._free_positions))
+            positions = [self._free_positions.pop() for _ in range(reused)]
+            start = len(self._doc_ids)
+            needed = start + len(items) - reused
+            if needed > len(self._signatures):
+                grown = np.zeros(
+                    (max(needed, 2 * len(self._signatures)), self.num_perm),
+                    dtype=np.uint32,
+                )
+                grown[:start] = self._signatures[:start]
+                self._signatures = grown
+            positions.extend(range(start, needed))
+            self._doc_ids.extend([None] * (needed - start))
+            self._signatures[positions] = new_signatures
+            band_keys = self._band_keys(new_signatures)
+            for offset, (doc_id, _) in enumerate(items):
+                position = positions[offset]
+                self._doc_ids[position] = doc_id
+                self._positions[doc_id] = position
+                for buckets, key in zip(self._buckets, band_keys[offset]):
+                    buckets.setdefault(key, set()).add(position)
+
+    def add(self, doc_id: str, text: str) -> None:
+        self.add_many([(doc_id, text)])
+
+    def remove(self, doc_id: str) -> None:
+        with self._lock:
+            self._remove_locked(doc_id)
+
+    def _remove_locked(self, doc_id: str) -> None:
+        position = self._positions.pop(doc_id, None)
+        if position is None:
+            return
+        # La fila se quita de los buckets y queda libre para otro documento
+        self._doc_ids[position] = None
+        band_keys = self._band_keys(self._signatures[position : position + 1])[0]
+        for buckets, key in zip(self._buckets, band_keys):
+            bucket = buckets.get(key)
+            if bucket is not None:
+                bucket.discard(position)
+                if not bucket:
+                    del buckets[key]
+        self._free_positions.append(position)
+
+    def query(
+        self, text: str, threshold: float = 0.5, exclude: Optional[str] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Documentos con similitud estimada >= threshold, de mayor a menor.
+        Solo se comparan las firmas de los candidatos de LSH.
+        """
+        signature = self.signature(text)
+        with self._lock:
+            candidates: Set[int] = set()
+            band_keys = self._band_keys(signature[np.newaxis])[0]
+            for buckets, key in zip(self._buckets, band_keys):
+                candidates.update(buckets.get(key, ()))
+            if not candidates:
+                return []
+            positions = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+            similarity = (self._signatures[positions] == signature).mean(axis=1)
+            doc_ids = [self._doc_ids[position] for position in positions]
+        matches = [
+            (doc_id, float(score))
+            for doc_id, score in zip(doc_ids, similarity)
+            if score >= threshold and doc_id != exclude
+        ]
+        matches.sort(key=lambda match: (-match[1], match[0]))
+        return matches
+
+    def clusters(self, threshold: float = 0.5) -> List[List[Tuple[str, float]]]:
+        """
+        Agrupa los documentos casi duplicados (componentes conexas de los pares
+        candidatos con similitud >= threshold). Cada grupo trae la similitud de
+        sus miembros con el primero; los grupos van de mayor a menor.
+        """
+        with self._lock:
+            parent = {}
+
+            def find(position: int) -> int:
+                root = position
+                while parent.get(root, root) != root:
+                    root = parent[root]
+                while parent.get(position, position) != root:
+                    parent[position], position = root, parent[position]
+                return root
+
+            compared = set()
+            for buckets in self._buckets:
+                for bucket in buckets.values():
+                    if len(bucket) < 2:
+                        continue
+                    members = sorted(bucket)
+                    for index, position in enumerate(members[:-1]):
+                        others = [
+                            other
+                            for other in members[index + 1 :]
+                            if (position, other) not in compared
+                            and find(position) != find(other)
+                        ]
+                        if not others:
+                            continue
+                        compared.update((position, other) for other in others)
+                        similarity = (
+                            self._signatures[others] == self._signatures[position]
+                        ).mean(axis=1)
+                        for other, score in zip(others, similarity):
+                            if score >= threshold:
+                                parent[find(other)] = find(position)
+
+            groups: Dict[int, List[int]] = {}
+            for position in set(parent) | set(parent.values()):
+                groups.setdefault(find(position), []).append(position)
+
+            result = []
+            for members in groups.values():
+                if len(members) < 2:
+                    continue
+                members.sort(key=lambda position: self._doc_ids[position])
+                first = members[0]
+                similarity = (
+                    self._signatures[members] == self._signatures[first]
+                ).mean(axis=1)
+                result.append(
+                    [
+                        (self._doc_ids[position], float(score))
+                        for position, score in zip(members, similarity)
+                    ]
+                )
+        result.sort(key=lambda group: (-len(group), group[0][0]))
+        return result
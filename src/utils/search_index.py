@@ -0,0 +1,238 @@
+import heapq
+import re
+import threading
+import unicodedata
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+# Peso de un término según dónde aparece en el producto
+NAME_WEIGHT = 3
+DESCRIPTION_WEIGHT = 1
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """
+    Normaliza un texto (minúsculas, sin tildes) y lo divide en términos.
+    """
+    if not text:
+        return []
+    normalized = unicodedata.normalize("NFKD", text.lower())
+    normalized = "".join(char for char in normalized if not unicodedata.combining(char))
+    return _TOKEN_RE.findall(normalized)
+
+
+class _TrieNode:
+    __slots__ = ("children", "terminal")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.terminal = False
+
+
+class ProductSearchIndex:
+    """
+    Índice invertido en memoria con un trie de prefijos sobre los términos.
+
+    Cada término apunta a los productos que lo contienen con un peso
+    (nombre > descripción). El trie permite expandir el último término de la
+    consulta como prefijo, de modo que búsqueda y autocompletado no recorren
+    todo el catálogo. Es seguro para usar desde varios threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._root = _TrieNode()
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._terms_by_doc: Dict[str, Set[str]] = {}
+        self._names: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._root = _TrieNode()
+            self._postings = {}
+            self._terms_by_doc = {}
+            self._names = {}
+
+    def upsert(self, doc_id: str, name: str, description: Optional[str]) -> None:
+        """Agrega o reemplaza un producto en el índice."""
+        name_terms = set(tokenize(name))
+        description_terms = set(tokenize(description))
+        weights = {
+            term: NAME_WEIGHT * (term in name_terms)
+            + DESCRIPTION_WEIGHT * (term in description_terms)
+            for term in name_terms | description_terms
+        }
+
+        with self._lock:
+            self._remove_locked(doc_id)
+            self._names[doc_id] = name
+            self._terms_by_doc[doc_id] = set(weights)
+            for term, weight in weights.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = {}
+                    self._insert_term(term)
+                postings[doc_id] = weight
+
+    def remove(self, doc_id: str) -> None:
+        """Elimina un producto del índice (no falla si no existe)."""
+        with self._lock:
+            self._remove_locked(doc_id)
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[str, int]]:
+        """
+        Busca productos que contengan todos los términos de la consulta.
+        El último término se interpreta como prefijo. Devuelve pares
+        (id, puntaje) ordenados por relevancia y luego por nombre.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        with self._lock:
+            # Términos exactos primero, del menos al más frecuente
+            exact_terms = sorted(
+                set(terms[:-1]), key=lambda term: len(self._postings.get(term, ()))
+            )
+            scores: Optional[Dict[str, int]] = None
+            for term in exact_terms:
+                postings = self._postings.get(term, {})
+                if scores is None:
+                    scores = dict(postings)
+                else:
+                    scores = {
+                        doc_id: score + postings[doc_id]
+                        for doc_id, score in scores.items()
+                        if doc_id in postings
+                    }
+                if not scores:
+                    return []
+
+            prefix = terms[-1]
+            if scores is None:
+                scores = self._term_scores(prefix)
+            else:
+                # Los candidatos ya están acotados por los términos exactos:
+                # revisar sus términos es más barato que expandir el prefijo
+                candidates, scores = scores, {}
+                for doc_id, score in candidates.items():
+                    weight = self._prefix_weight(doc_id, prefix)
+                    if weight:
+                        scores[doc_id] = score + weight
+
+            return heapq.nsmallest(
+                limit, scores.items(), key=lambda item: (-item[1], self._names[item[0]])
+            )
+
+    def autocomplete(self, query: str, limit: int = 10) -> List[Tuple[str, str]]:
+        """
+        Sugerencias de nombres para búsqueda mientras se escribe.
+        Solo considera términos del nombre. Recorre el trie en orden y se
+        detiene al reunir `limit` productos. Devuelve pares (id, nombre).
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        with self._lock:
+            required: Optional[Set[str]] = None
+            for term in terms[:-1]:
+                docs = {
+                    doc_id
+                    for doc_id, weight in self._postings.get(term, {}).items()
+                    if weight >= NAME_WEIGHT
+                }
+                required = docs if required is None else required & docs
+                if not required:
+                    return []
+
+            prefix = terms[-1]
+            if required is not None:
+                matches = [
+                    doc_id
+                    for doc_id in required
+                    if self._prefix_weight(doc_id, prefix) >= NAME_WEIGHT
+                ]
+                matches = heapq.nsmallest(limit, matches, key=self._names.__getitem__)
+                return [(doc_id, self._names[doc_id]) for doc_id in matches]
+
+            results: Dict[str, str] = {}
+            for term in self._iter_terms(prefix):
+                for doc_id, weight in self._postings[term].items():
+                    if weight < NAME_WEIGHT or doc_id in results:
+                        continue
+                    results[doc_id] = self._names[doc_id]
+                    if len(results) >= limit:
+                        return list(results.items())
+            return list(results.items())
+
+    def _term_scores(self, prefix: str) -> Dict[str, int]:
+        """Mejor peso por producto entre todos los términos con ese prefijo."""
+        scores: Dict[str, int] = {}
+        for term in self._iter_terms(prefix):
+            for doc_id, weight in self._postings[term].items():
+                if weight > scores.get(doc_id, 0):
+                    scores[doc_id] = weight
+        return scores
+
+    def _prefix_weight(self, doc_id: str, prefix: str) -> int:
+        """Mejor peso de un producto entre sus términos con ese prefijo."""
+        return max(
+            (
+                self._postings[term][doc_id]
+                for term in self._terms_by_doc.get(doc_id, ())
+                if term.startswith(prefix)
+            ),
+            default=0,
+        )
+
+    def _iter_terms(self, prefix: str) -> Iterator[str]:
+        node = self._root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return
+        stack = [(node, prefix)]
+        while stack:
+            current, term = stack.pop()
+            if current.terminal:
+                yield term
+            for char in sorted(current.children, reverse=True):
+                stack.append((current.children[char], term + char))
+
+    def _insert_term(self, term: str) -> None:
+        node = self._root
+        for char in term:
+            node = node.children.setdefault(char, _TrieNode())
+        node.terminal = True
+
+    def _delete_term(self, term: str) -> None:
+        path = [self._root]
+        for char in term:
+            node = path[-1].children.get(char)
+            if node is None:
+                return
+            path.append(node)
+        path[-1].terminal = False
+        # Podar los nodos que quedaron sin términos
+        for depth in range(len(term), 0, -1):
+            node = path[depth]
+            if node.terminal or node.children:
+                break
+            del path[depth - 1].children[term[depth - 1]]
+
+    def _remove_locked(self, doc_id: str) -> None:
+        terms: Iterable[str] = self._terms_by_doc.pop(doc_id, ())
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+                self._delete_term(term)
+        self._names.pop(doc_id, None)
@@ -0,0 +1,235 @@
+import functools
+import mmap
+import os
+import random
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from enum import Enum
+from typing import Any, Callable, Hashable, Iterable, Optional, Tuple
+
+from fastapi import HTTPException
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos
+    fcntl = None
+
+_COUNTER = struct.Struct("<Q")
+
+
+class SharedTagVersions:
+    """
+    Contadores de versión por tag, compartidos entre los workers de la misma
+    máquina a través de un archivo mapeado en memoria (mmap).
+
+    Invalidar un tag es incrementar su contador; cada worker compara los
+    contadores guardados con su entrada de caché contra los actuales, así que
+    no hace falta ningún mensaje entre procesos. Los tags se reparten en
+    `slots` posiciones por hash: una colisión solo provoca invalidaciones de
+    más, nunca datos viejos. La primera posición guarda un epoch aleatorio que
+    cambia si el archivo se vuelve a crear. Sin `path` los contadores son
+    locales al proceso.
+    """
+
+    def __init__(self, path: Optional[str] = None, slots: int = 4096):
+        self._slots = slots
+        self._lock = threading.Lock()
+        size = _COUNTER.size * (slots + 1)
+        self._fd = None
+        if path is None:
+            self._buffer = bytearray(size)
+            _COUNTER.pack_into(self._buffer, 0, random.getrandbits(63))
+            return
+
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        with self._file_lock():
+            if os.fstat(self._fd).st_size < size:
+                os.ftruncate(self._fd, size)
+                os.pwrite(self._fd, _COUNTER.pack(random.getrandbits(63)), 0)
+        self._buffer = mmap.mmap(self._fd, size)
+
+    def _slot_offset(self, tag: str) -> int:
+        slot = zlib.crc32(tag.encode()) % self._slots
+        return _COUNTER.size * (slot + 1)
+
+    def snapshot(self, tags: Iterable[str]) -> Tuple[int, ...]:
+        """Epoch y versión actual de cada tag (lectura sin bloqueo)."""
+        buffer = self._buffer
+        return (_COUNTER.unpack_from(buffer, 0)[0],) + tuple(
+            _COUNTER.unpack_from(buffer, self._slot_offset(tag))[0] for tag in tags
+        )
+
+    def bump(self, tags: Iterable[str]) -> None:
+        """Incrementa la versión de los tags (invalida sus entradas en todos los workers)."""
+        offsets = {self._slot_offset(tag) for tag in tags}
+        with self._lock, self._file_lock():
+            for offset in offsets:
+                version = _COUNTER.unpack_from(self._buffer, offset)[0]
+                _COUNTER.pack_into(self._buffer, offset, version + 1)
+
+    def _file_lock(self):
+        return _FileLock(self._fd)
+
+
+class _FileLock:
+    """Bloqueo exclusivo del archivo de contadores (no hace nada sin fcntl)."""
+
+    def __init__(self, fd: Optional[int]):
+        self._fd = fd if fcntl is not None else None
+
+    def __enter__(self):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+
+    def __exit__(self, *exc_info):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+
+class _CachedHTTPError:
+    """404 cacheado; se vuelve a lanzar como una excepción nueva en cada acierto."""
+
+    __slots__ = ("status_code", "detail")
+
+    def __init__(self, error: HTTPException):
+        self.status_code = error.status_code
+        self.detail = error.detail
+
+    def raise_error(self):
+        raise HTTPException(status_code=self.status_code, detail=self.detail)
+
+
+def _freeze(value: Any) -> Hashable:
+    """Convierte argumentos (listas, dicts) en una clave de caché hashable."""
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+class TagCache:
+    """
+    Caché LRU con TTL para resultados de servicios, invalidable por tag.
+
+    Cada entrada guarda los tags de los que depende y sus versiones al momento
+    de calcularse; es válida mientras no expire y ningún tag haya cambiado.
+    Las versiones se toman antes de ejecutar la función, así un resultado que
+    se calculó en paralelo con una invalidación nunca se sirve. Los 404 se
+    cachean (caché negativa) con un TTL más corto.
+
+    Los valores cacheados se comparten entre llamadas: no deben modificarse.
+    """
+
+    def __init__(
+        self,
+        versions: SharedTagVersions,
+        max_entries: int = 10000,
+        ttl: float = 60.0,
+        negative_ttl: float = 10.0,
+        enabled: bool = True,
+    ):
+        self._versions = versions
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._negative_ttl = negative_ttl
+        self.enabled = enabled
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def invalidate(self, *tags: str) -> None:
+        """Invalida las entradas con alguno de los tags, en todos los workers."""
+        self._versions.bump(tags)
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """Devuelve (encontrado, valor)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at, tags, snapshot = entry
+                if expires_at > time.monotonic() and (
+                    self._versions.snapshot(tags) == snapshot
+                ):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        tags: Tuple[str, ...],
+        snapshot: Tuple[int, ...],
+        ttl: float,
+    ) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl, tags, snapshot)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def cached(
+        self,
+        tags: Callable[..., Iterable[str]],
+        is_negative: Callable[[Any], bool] = lambda value: False,
+    ):
+        """
+        Decorador para cachear una función de servicio.
+
+        `tags` recibe los mismos argumentos que la función y devuelve los tags
+        del resultado. `is_negative` marca resultados de "no encontrado" que
+        no son excepciones (p. ej. diccionarios de error) para el TTL corto.
+        """
+
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+
+                key = (func.__module__, func.__qualname__, _freeze(args), _freeze(kwargs))
+                found, value = self.get(key)
+                if found:
+                    if isinstance(value, _CachedHTTPError):
+                        value.raise_error()
+                    return value
+
+                entry_tags = tuple(tags(*args, **kwargs))
+                snapshot = self._versions.snapshot(entry_tags)
+                try:
+                    value = func(*args, **kwargs)
+                except HTTPException as e:
+                    if e.status_code == 404:
+                        self.set(
+                            key,
+                            _CachedHTTPError(e),
+                            entry_tags,
+                            snapshot,
+                            self._negative_ttl,
+                        )
+                    raise
+                ttl = self._negative_ttl if is_negative(value) else self._ttl
+                self.set(key, value, entry_tags, snapshot, ttl)
+                return value
+
+            wrapper.uncached = func
+            return wrapper
+
+        return decorator
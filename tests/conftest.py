@@ -1,5 +1,6 @@
 import os
 import sys
+import uuid
 
 import pytest
 from fastapi.testclient import TestClient
@@ -40,3 +41,77 @@ def test_product_data():
         "category": "Test Category",
         "image_url": "https://example.com/image.jpg",
     }
+
+
+@pytest.fixture
+def db_products():
+    """Inserta productos de prueba en la base de datos y los elimina al final"""
+    from sqlalchemy.orm import Session
+
+    from database import engine
+    from models_db import Product
+    from services.catalog_events import notify_products_changed
+
+    category_id = uuid.uuid4()
+    suffix = uuid.uuid4().hex[:8]
+    products = [
+        Product(
+            id=uuid.uuid4(),
+            name=f"Chunky perro adulto {suffix}",
+            description="Alimento para perro adulto",
+            category_id=category_id,
+            image_url="https://example.com/chunky.jpg",
+        ),
+        Product(
+            id=uuid.uuid4(),
+            name=f"Chunky gato {suffix}",
+            description="Alimento para gato",
+            category_id=category_id,
+            image_url=None,
+        ),
+        Product(
+            id=uuid.uuid4(),
+            name=f"Simparica TRIO {suffix}",
+            description="Antiparasitario",
+            category_id=uuid.uuid4(),
+            image_url="https://example.com/simparica.jpg",
+        ),
+    ]
+    with Session(engine, expire_on_commit=False) as session:
+        session.add_all(products)
+        session.commit()
+    # Escrituras directas: invalidar los índices en memoria
+    notify_products_changed(bulk=True)
+
+    yield {"category_id": category_id, "suffix": suffix, "products": products}
+
+    with Session(engine) as session:
+        session.query(Product).filter(
+            Product.id.in_([product.id for product in products])
+        ).delete(synchronize_session=False)
+        session.commit()
+    notify_products_changed(bulk=True)
+
+
+@pytest.fixture
+def db_category(db_products):
+    """Crea la categoría de los productos de prueba y la elimina al final"""
+    from sqlalchemy.orm import Session
+
+    from database import engine
+    from models_db import Category
+
+    category = Category(
+        id=db_products["category_id"],
+        name=f"Alimentos {db_products['suffix']}",
+        description="Comida para mascotas",
+    )
+    with Session(engine, expire_on_commit=False) as session:
+        session.add(category)
+        session.commit()
+
+    yield category
+
+    with Session(engine) as session:
+        session.query(Category).filter(Category.id == category.id).delete()
+        session.commit()
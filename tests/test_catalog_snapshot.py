@@ -0,0 +1,111 @@
+import json
+import uuid
+from unittest.mock import patch
+
+import pytest
+
+
+@pytest.fixture
+def unordered_categories(db_products):
+    """Categorías insertadas fuera del orden por nombre; se eliminan al final"""
+    from sqlalchemy.orm import Session
+
+    from database import engine
+    from models_db import Category
+
+    suffix = db_products["suffix"]
+    categories = [
+        Category(id=uuid.uuid4(), name=f"{prefix} {suffix}", version=0)
+        for prefix in ("Zeta", "Alfa", "Mu")
+    ]
+    with Session(engine) as session:
+        for category in categories:
+            session.add(category)
+            session.flush()
+        session.commit()
+        ids = [category.id for category in categories]
+    yield ids
+    with Session(engine) as session:
+        session.query(Category).filter(Category.id.in_(ids)).delete(
+            synchronize_session=False
+        )
+        session.commit()
+
+
+class TestCatalogSnapshot:
+    """Test the shared memory-mapped catalog snapshot"""
+
+    def test_snapshot_matches_product_listing(
+        self, tmp_path, db_products, unordered_categories
+    ):
+        """Test that the snapshot holds the same JSON as the listings"""
+        from services.catalog_snapshot import CatalogSnapshot, build_catalog_snapshot
+        from services.category_service import get_categories
+        from services.product_service import get_products_service
+
+        path = str(tmp_path / "snapshot.bin")
+        assert build_catalog_snapshot(path) is not None
+
+        snapshot = CatalogSnapshot(path)
+        body = snapshot.products_json()
+        assert isinstance(body, memoryview)
+        assert json.loads(bytes(body)) == get_products_service.uncached()
+        categories = get_categories.uncached()
+        assert json.loads(bytes(snapshot.categories_json())) == categories
+        seeded_ids = {str(category_id) for category_id in unordered_categories}
+        seeded = [c["name"] for c in categories if c["id"] in seeded_ids]
+        assert seeded == sorted(seeded)
+
+    def test_stale_snapshot_is_not_served(self, tmp_path, db_products):
+        """Test that a catalog invalidation makes the snapshot stale"""
+        from services.catalog_cache import CATALOG_TAG, tag_versions
+        from services.catalog_snapshot import CatalogSnapshot, build_catalog_snapshot
+
+        path = str(tmp_path / "snapshot.bin")
+        build_catalog_snapshot(path)
+        snapshot = CatalogSnapshot(path)
+        assert snapshot.products_json() is not None
+
+        tag_versions.bump([CATALOG_TAG])
+        with patch.object(CatalogSnapshot, "_rebuild_in_background") as rebuild:
+            assert snapshot.products_json() is None
+        rebuild.assert_called_once()
+
+        # La reconstrucción reemplaza el archivo y el lector cambia al nuevo
+        old_view = snapshot._mapping
+        build_catalog_snapshot(path)
+        assert snapshot.products_json() is not None
+        assert snapshot._mapping is not old_view
+
+    def test_missing_snapshot(self, tmp_path):
+        """Test that a missing or disabled snapshot falls back to the database"""
+        from services.catalog_snapshot import CatalogSnapshot
+
+        disabled = CatalogSnapshot(str(tmp_path / "snapshot.bin"), enabled=False)
+        assert disabled.products_json() is None
+
+        snapshot = CatalogSnapshot(str(tmp_path / "snapshot.bin"))
+        with patch.object(CatalogSnapshot, "_rebuild_in_background") as rebuild:
+            assert snapshot.products_json() is None
+        rebuild.assert_called_once()
+
+    def test_endpoint_serves_snapshot(self, client, tmp_path, db_products):
+        """Test that the unfiltered product listing is served from the snapshot"""
+        from services.catalog_snapshot import CatalogSnapshot, build_catalog_snapshot
+
+        path = str(tmp_path / "snapshot.bin")
+        build_catalog_snapshot(path)
+        snapshot = CatalogSnapshot(path)
+        expected = json.loads(bytes(snapshot.products_json()))
+
+        with patch("routers.product.catalog_snapshot", snapshot), patch(
+            "routers.product.get_products_service"
+        ) as service:
+            service.return_value = []
+            response = client.get("/products/")
+            filtered = client.get("/products/", params={"limit": 1})
+        assert response.status_code == 200
+        assert response.json() == expected
+        assert "etag" in response.headers
+        service.assert_called_once()
+        assert filtered.status_code == 200
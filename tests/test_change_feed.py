@@ -0,0 +1,72 @@
+class TestCatalogChangeFeed:
+    """Test the incremental catalog change feed"""
+
+    def _current_version(self):
+        from sqlalchemy.orm import Session
+
+        from database import engine
+        from services.catalog_version import current_catalog_version
+
+        with Session(engine) as session:
+            return current_catalog_version(session)
+
+    def test_changes_since_version(self, client, db_products):
+        """Test that only writes after `since` are returned, plus deletes"""
+        from schemas.product import ProductBulkDeleteRequest, ProductBulkUpdateRequest
+        from services.product_bulk_service import (
+            bulk_delete_products_service,
+            bulk_update_products_service,
+        )
+
+        dog, cat, _ = db_products["products"]
+        since = self._current_version()
+
+        category = client.post(
+            "/category/", json={"name": f"Feed {db_products['suffix']}"}
+        ).json()
+        try:
+            bulk_update_products_service(
+                ProductBulkUpdateRequest(ids=[dog.id], patch={"description": "Nuevo"})
+            )
+            bulk_delete_products_service(ProductBulkDeleteRequest(ids=[cat.id]))
+
+            response = client.get("/products/changes", params={"since": since})
+            assert response.status_code == 200
+            data = response.json()
+            assert data["version"] == since + 3
+            assert data["has_more"] is False
+            products = [
+                dict(zip(data["products"]["columns"], row))
+                for row in data["products"]["rows"]
+            ]
+            assert [(p["id"], p["description"]) for p in products] == [
+                (str(dog.id), "Nuevo")
+            ]
+            assert data["categories"]["rows"][0][0] == category["id"]
+            assert data["deleted"]["products"] == [str(cat.id)]
+
+            # Páginas cortadas por versión
+            first = client.get(
+                "/products/changes", params={"since": since, "limit": 1}
+            ).json()
+            assert (first["version"], first["has_more"]) == (since + 1, True)
+            assert first["products"]["rows"] == []
+            second = client.get(
+                "/products/changes", params={"since": first["version"]}
+            ).json()
+            assert second["version"] == since + 3
+            assert second["categories"]["rows"] == []
+        finally:
+            client.delete(f"/category/{category['id']}")
+
+        deleted = client.get(
+            "/products/changes", params={"since": since + 3}
+        ).json()["deleted"]
+        assert deleted["categories"] == [category["id"]]
+
+    def test_unknown_version_requires_full_sync(self, client):
+        """Test that a version ahead of the catalog is rejected"""
+        response = client.get(
+            "/products/changes", params={"since": self._current_version() + 1000}
+        )
+        assert response.status_code == 409
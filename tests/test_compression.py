@@ -0,0 +1,103 @@
+
+class TestCompressionMiddleware:
+    """Test gzip/brotli negotiation and compressed body caching"""
+
+    def test_select_encoding(self):
+        """Test Accept-Encoding negotiation with q-values"""
+        from src.utils import compression
+
+        assert compression.select_encoding("gzip;q=0") is None
+        assert compression.select_encoding("identity") is None
+        assert compression.select_encoding("gzip, deflate") == "gzip"
+        assert compression.select_encoding("*") in ("br", "gzip")
+
+    def _app(self, body: bytes, headers=None, chunks=None):
+        from starlette.applications import Starlette
+        from starlette.responses import Response, StreamingResponse
+        from starlette.routing import Route
+
+        from src.utils.compression import CompressionMiddleware
+
+        calls = []
+
+        async def endpoint(request):
+            calls.append(1)
+            if chunks:
+                return StreamingResponse(iter(chunks), media_type="application/x-ndjson")
+            return Response(body, media_type="application/json", headers=headers)
+
+        app = Starlette(routes=[Route("/", endpoint)])
+        app.add_middleware(CompressionMiddleware, minimum_size=100)
+        return app
+
+    def test_small_responses_are_not_compressed(self):
+        """Test the minimum size threshold"""
+        from starlette.testclient import TestClient
+
+        client = TestClient(self._app(b'{"ok": true}'))
+        response = client.get("/", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+
+    def test_gzip_and_cached_by_etag(self, monkeypatch):
+        """Test that the body is compressed once per ETag"""
+        from starlette.testclient import TestClient
+
+        from src.utils import compression
+
+        body = b'{"items": "' + b"x" * 2000 + b'"}'
+        app = self._app(body, headers={"ETag": 'W/"v1"'})
+        client = TestClient(app)
+
+        compress_calls = []
+        original = compression.gzip.compress
+        monkeypatch.setattr(
+            compression.gzip,
+            "compress",
+            lambda data, **kwargs: compress_calls.append(1) or original(data, **kwargs),
+        )
+        for _ in range(3):
+            response = client.get(
+                "/", headers={"Accept-Encoding": "gzip"}, follow_redirects=False
+            )
+            assert response.headers["content-encoding"] == "gzip"
+            assert response.headers["vary"] == "Accept-Encoding"
+            assert response.content == body  # httpx descomprime
+            assert int(response.headers["content-length"]) < len(body)
+        assert len(compress_calls) == 1
+
+    def test_upstream_headers_are_not_modified(self):
+        """Test that a shared start-message headers list is copied, not edited"""
+        from starlette.testclient import TestClient
+
+        from src.utils.compression import CompressionMiddleware
+
+        body = b'{"items": "' + b"x" * 2000 + b'"}'
+        shared = [(b"content-type", b"application/json")]
+
+        async def app(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": shared})
+            await send({"type": "http.response.body", "body": body})
+
+        client = TestClient(CompressionMiddleware(app, minimum_size=100))
+        for _ in range(2):
+            response = client.get("/", headers={"Accept-Encoding": "gzip"})
+            assert response.headers["content-encoding"] == "gzip"
+            assert response.headers["vary"] == "Accept-Encoding"
+            assert response.content == body
+        assert shared == [(b"content-type", b"application/json")]
+
+    def test_streaming_responses_are_compressed_per_chunk(self):
+        """Test streaming compression of exports"""
+        from starlette.testclient import TestClient
+
+        chunks = [b'{"id": %d}\n' % i * 50 for i in range(5)]
+        client = TestClient(self._app(b"", chunks=chunks))
+        response = client.get("/", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.content == b"".join(chunks)
+
+    def test_catalog_endpoint_is_compressed(self, client, db_products):
+        """Test the middleware is installed on the API"""
+        response = client.get("/products/", headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert "Accept-Encoding" in response.headers["vary"]
@@ -0,0 +1,108 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+
+class TestConditionalGet:
+    """Test ETag / If-None-Match handling"""
+
+    def test_product_not_modified_skips_database(self, client, db_products):
+        """Test that a matching ETag returns 304 without touching the DB"""
+        from sqlalchemy import event
+
+        from database import engine
+
+        product = db_products["products"][0]
+        response = client.get(f"/products/{product.id}")
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+        assert etag.startswith('W/"')
+        assert "max-age" in response.headers["cache-control"]
+
+        statements = []
+
+        def count_statement(*args):
+            statements.append(args)
+
+        event.listen(engine, "before_cursor_execute", count_statement)
+        try:
+            response = client.get(
+                f"/products/{product.id}", headers={"If-None-Match": etag}
+            )
+        finally:
+            event.remove(engine, "before_cursor_execute", count_statement)
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+        assert statements == []
+
+    def test_write_changes_etag(self, client, db_products):
+        """Test that product writes change the product and list ETags"""
+        from schemas.product import ProductBulkUpdateRequest
+        from services.product_bulk_service import bulk_update_products_service
+
+        product = db_products["products"][0]
+        item_etag = client.get(f"/products/{product.id}").headers["etag"]
+        list_etag = client.get("/products/").headers["etag"]
+        assert client.get("/products/", params={"limit": 1}).headers["etag"] != list_etag
+
+        bulk_update_products_service(
+            ProductBulkUpdateRequest(ids=[product.id], patch={"description": "Otra"})
+        )
+        response = client.get(
+            f"/products/{product.id}", headers={"If-None-Match": item_etag}
+        )
+        assert response.status_code == 200
+        assert response.json()["description"] == "Otra"
+        response = client.get("/products/", headers={"If-None-Match": list_etag})
+        assert response.status_code == 200
+
+    def test_categories_not_modified(self, client):
+        """Test conditional GET on the category list"""
+        etag = client.get("/category/").headers["etag"]
+        response = client.get("/category/", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+    def test_permissions_etag_is_private_and_per_user(self, client):
+        """Test conditional GET on /users/me/permissions"""
+        from constants.role import RoleEnum
+        from src.main import app
+        from utils.auth import get_user_with_permissions
+
+        role = next(iter(RoleEnum))
+        user = SimpleNamespace(
+            id="1",
+            uid="u-1",
+            roles=[role],
+            active_role=None,
+            effective_roles=[role],
+            permissions={},
+        )
+        app.dependency_overrides[get_user_with_permissions] = lambda: user
+        try:
+            with patch("routers.user.get_current_user") as verify_token:
+                response = client.get("/users/me/permissions")
+                assert response.headers["cache-control"] == "private, no-cache"
+                etag = response.headers["etag"]
+                response = client.get(
+                    "/users/me/permissions", headers={"If-None-Match": etag}
+                )
+                assert response.status_code == 304
+                # El usuario se resuelve una sola vez (la dependencia)
+                verify_token.assert_not_called()
+
+            # El rol activo vive en memoria del worker: cambia el ETag
+            user.active_role = role
+            response = client.get(
+                "/users/me/permissions", headers={"If-None-Match": etag}
+            )
+            assert response.status_code == 200
+            assert response.json()["active_role"] == role.value
+
+            user.uid = "u-2"
+            response = client.get(
+                "/users/me/permissions",
+                headers={"If-None-Match": response.headers["etag"]},
+            )
+            assert response.status_code == 200
+        finally:
+            app.dependency_overrides.pop(get_user_with_permissions, None)
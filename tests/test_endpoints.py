@@ -1,3 +1,4 @@
+import uuid
 from unittest.mock import Mock, patch
 
 import pytest
@@ -23,6 +24,37 @@ class TestUserEndpoints:
         response = client.get("/users/")
         assert response.status_code == 401  # Unauthorized
 
+    def test_get_users_response_model(self, client):
+        """Test the user list is validated and sparse fields stay omitted"""
+        from src.main import app
+        from utils.auth import get_current_user
+
+        person = {
+            "id": str(uuid.uuid4()),
+            "name": "Ana",
+            "last_name": "Pérez",
+            "document_type": "CC",
+            "document_number": "123",
+        }
+        full = {
+            "id": str(uuid.uuid4()),
+            "email": "a@b.co",
+            "uid": "u-1",
+            "person": person,
+        }
+        sparse = {"id": full["id"], "email": full["email"]}
+        app.dependency_overrides[get_current_user] = lambda: {"uid": "u-1"}
+        try:
+            with patch("routers.user.get_users_service", return_value=[full]):
+                assert client.get("/users/").json() == [full]
+            with patch("routers.user.get_users_service", return_value=[sparse]):
+                assert client.get("/users/?fields=email").json() == [sparse]
+        finally:
+            app.dependency_overrides.pop(get_current_user, None)
+
+        schema = client.get("/openapi.json").json()
+        assert "UserListItem" in schema["components"]["schemas"]
+
     def test_switch_role_endpoint_unauthorized(self, client):
         """Test that switch role endpoint requires authorization"""
         response = client.post("/users/switch-role")
@@ -43,6 +75,94 @@ class TestProductEndpoints:
         # This might be unauthorized or return empty list
         assert response.status_code in [200, 401]
 
+    def test_get_products_filters_by_category_and_image(self, client, db_products):
+        """Test server-side filtering of the product list"""
+        response = client.get(
+            "/products/",
+            params={"category_id": str(db_products["category_id"]), "has_image": True},
+        )
+        assert response.status_code == 200
+        names = [product["name"] for product in response.json()]
+        assert names == [db_products["products"][0].name]
+
+    def test_get_products_name_prefix_and_sort(self, client, db_products):
+        """Test case-insensitive name prefix filter with descending sort"""
+        response = client.get(
+            "/products/",
+            params={
+                "category_id": str(db_products["category_id"]),
+                "name_prefix": "chunky",
+                "sort": "-name",
+            },
+        )
+        assert response.status_code == 200
+        names = [product["name"] for product in response.json()]
+        assert names == sorted(names, reverse=True)
+        assert len(names) == 2
+
+    def test_get_products_invalid_sort(self, client):
+        """Test that only whitelisted sort keys are accepted"""
+        response = client.get("/products/", params={"sort": "description"})
+        assert response.status_code == 422
+
+    def test_get_products_sparse_fields(self, client, db_products):
+        """Test that fields= trims the product payload"""
+        response = client.get(
+            "/products/",
+            params={"category_id": str(db_products["category_id"]), "fields": "name"},
+        )
+        assert response.status_code == 200
+        for product in response.json():
+            assert set(product) == {"id", "name"}
+
+    def test_get_products_invalid_fields(self, client):
+        """Test that fields outside the whitelist are rejected"""
+        response = client.get("/products/", params={"fields": "id,password"})
+        assert response.status_code == 400
+
+    def test_batch_get_products_keeps_order_and_misses(self, client, db_products):
+        """Test batch lookup returns request order with explicit misses"""
+        first, second, _ = db_products["products"]
+        missing_id = "00000000-0000-0000-0000-000000000000"
+        response = client.post(
+            "/products/batch-get",
+            json={"ids": [str(second.id), missing_id, str(first.id)]},
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["products"][0]["name"] == second.name
+        assert data["products"][1] is None
+        assert data["products"][2]["name"] == first.name
+        assert data["missing"] == [missing_id]
+
+    def test_batch_get_products_requires_ids(self, client):
+        """Test that an empty batch is rejected"""
+        response = client.post("/products/batch-get", json={"ids": []})
+        assert response.status_code == 422
+
+    def test_search_products_ranks_name_matches(self, client, db_products):
+        """Test full-text search over name and description"""
+        response = client.get(
+            "/products/search", params={"q": f"chunky {db_products['suffix']}"}
+        )
+        assert response.status_code == 200
+        names = {product["name"] for product in response.json()}
+        assert db_products["products"][0].name in names
+        assert db_products["products"][2].name not in names
+
+    def test_autocomplete_products(self, client, db_products):
+        """Test type-ahead suggestions by name prefix"""
+        response = client.get(
+            "/products/autocomplete", params={"q": f"simparica {db_products['suffix']}"}
+        )
+        assert response.status_code == 200
+        assert response.json() == [
+            {
+                "id": str(db_products["products"][2].id),
+                "name": db_products["products"][2].name,
+            }
+        ]
+
     def test_create_product_endpoint_unauthorized(self, client):
         """Test that create product endpoint requires authorization"""
         response = client.post("/products/")
@@ -56,3 +176,164 @@ class TestProductEndpoints:
             401,
             422,
         ]  # Not found, unauthorized, or validation error
+
+    def test_facet_products(self, client, db_products):
+        """Test faceted filtering with bitmap counts"""
+        from models_db import ProductAttribute
+        from schemas.product import ProductAttributesUpdate
+        from services.facet_service import set_product_attributes_service
+        from sqlalchemy.orm import Session
+
+        from database import engine
+
+        dog, cat, antiparasitic = db_products["products"]
+        brand = f"marca {db_products['suffix']}"
+        client.get("/products/facets")  # cargar el índice antes de escribir
+        set_product_attributes_service(
+            dog.id, ProductAttributesUpdate(species="Perro", brand=brand)
+        )
+        set_product_attributes_service(
+            cat.id, ProductAttributesUpdate(species="gato", brand=brand)
+        )
+        try:
+            response = client.get(
+                "/products/facets", params={"brand": brand, "species": "perro"}
+            )
+            assert response.status_code == 200
+            data = response.json()
+            assert data["total"] == 1
+            assert data["products"][0]["id"] == str(dog.id)
+            assert data["facets"]["species"]["gato"] >= 1
+            assert data["facets"]["brand"][brand] == 1
+
+            assert client.get(f"/products/{cat.id}/attributes").json() == {
+                "species": "gato",
+                "brand": brand,
+            }
+        finally:
+            with Session(engine) as session:
+                session.query(ProductAttribute).filter(
+                    ProductAttribute.product_id.in_([dog.id, cat.id])
+                ).delete(synchronize_session=False)
+                session.commit()
+
+
+class TestCategoryEndpoints:
+    """Test category-related endpoints"""
+
+    def test_list_categories_sparse_fields(self, client):
+        """Test that categories accept a sparse fieldset"""
+        response = client.get("/category/", params={"fields": "name"})
+        assert response.status_code == 200
+        for category in response.json():
+            assert set(category) == {"id", "name"}
+
+    def test_list_categories_invalid_fields(self, client):
+        """Test that invalid category fields are rejected"""
+        response = client.get("/category/", params={"fields": "products"})
+        assert response.status_code == 400
+
+    def test_categories_with_products_and_counts(self, client, db_category):
+        """Test the category catalog embeds products and counts"""
+        from sqlalchemy import event
+
+        from database import engine
+
+        statements = []
+
+        def count_statement(*args):
+            statements.append(args)
+
+        event.listen(engine, "before_cursor_execute", count_statement)
+        try:
+            response = client.get(
+                "/category/with-products", params={"include_counts": True}
+            )
+        finally:
+            event.remove(engine, "before_cursor_execute", count_statement)
+
+        assert response.status_code == 200
+        category = next(c for c in response.json() if c["id"] == str(db_category.id))
+        assert category["product_count"] == 2
+        assert len(category["products"]) == 2
+        # categorías + productos (IN) + conteos, sin importar cuántas categorías
+        assert len(statements) == 3
+
+    def test_category_products(self, client, db_category):
+        """Test products of one category are returned as plain dicts"""
+        response = client.get(f"/category/{db_category.id}/products")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["category"] == db_category.name
+        assert {product["category_id"] for product in data["products"]} == {
+            str(db_category.id)
+        }
+
+    def test_category_hierarchy(self, client, db_category):
+        """Test subcategories, breadcrumb, subtree products and moves"""
+        from services.category_service import ensure_category_closure
+
+        ensure_category_closure()
+        suffix = db_category.name.rsplit(" ", 1)[-1]
+        created = []
+
+        def create(name, parent_id=None):
+            response = client.post(
+                "/category/", json={"name": f"{name} {suffix}", "parent_id": parent_id}
+            )
+            assert response.status_code == 200
+            created.append(response.json()["id"])
+            return response.json()["id"]
+
+        try:
+            root = create("Mascotas")
+            dogs = create("Perros", root)
+            puppies = create("Cachorros", dogs)
+
+            breadcrumb = client.get(f"/category/{puppies}/breadcrumb").json()
+            assert [c["id"] for c in breadcrumb] == [root, dogs, puppies]
+
+            tree = client.get("/category/tree").json()
+            node = next(c for c in tree if c["id"] == root)
+            assert node["children"][0]["id"] == dogs
+            assert node["children"][0]["children"][0]["id"] == puppies
+
+            # Mover la categoría de los productos bajo "Cachorros"
+            category_id = str(db_category.id)
+            response = client.put(
+                f"/category/{category_id}/move", json={"parent_id": puppies}
+            )
+            assert response.status_code == 200
+            assert response.json()["parent_id"] == puppies
+            products = client.get(
+                f"/category/{root}/products", params={"include_subcategories": True}
+            ).json()["products"]
+            assert len(products) == 2
+            assert client.get(f"/category/{root}/products").json()["products"] == []
+
+            # No se puede mover un nodo dentro de su propio subárbol
+            response = client.put(f"/category/{root}/move", json={"parent_id": puppies})
+            assert response.status_code == 400
+
+            # Mover "Cachorros" a la raíz desengancha también a sus descendientes
+            client.put(f"/category/{puppies}/move", json={"parent_id": None})
+            breadcrumb = client.get(f"/category/{category_id}/breadcrumb").json()
+            assert [c["id"] for c in breadcrumb] == [puppies, category_id]
+            products = client.get(
+                f"/category/{root}/products", params={"include_subcategories": True}
+            ).json()["products"]
+            assert products == []
+
+            assert client.delete(f"/category/{puppies}").status_code == 409
+            client.put(f"/category/{category_id}/move", json={"parent_id": None})
+        finally:
+            for category_id in reversed(created):
+                client.delete(f"/category/{category_id}")
+
+    def test_create_category_unknown_parent(self, client):
+        """Test that a subcategory needs an existing parent"""
+        response = client.post(
+            "/category/",
+            json={"name": f"Huérfana {uuid.uuid4().hex[:8]}", "parent_id": str(uuid.uuid4())},
+        )
+        assert response.json()["error"] == "not_found"
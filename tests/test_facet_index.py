@@ -0,0 +1,79 @@
+class TestFacetIndex:
+    """Test the in-memory bitmap index used for faceted filtering"""
+
+    def _build_index(self):
+        from src.utils.facet_index import FacetIndex
+
+        index = FacetIndex()
+        index.upsert("1", "Chunky perro adulto", {"species": "perro", "brand": "chunky"})
+        index.upsert("2", "Chunky gato", {"species": "gato", "brand": "chunky"})
+        index.upsert("3", "Simparica TRIO", {"species": "perro", "brand": "zoetis"})
+        index.upsert("4", "Bolsa sin atributos", {})
+        return index
+
+    def test_filters_intersect_attributes_and_union_values(self):
+        """Test AND between attributes and OR between values"""
+        index = self._build_index()
+        total, ids, _ = index.search({"species": ["perro"], "brand": ["chunky"]}, ())
+        assert (total, ids) == (1, ["1"])
+        total, ids, _ = index.search({"species": ["perro", "gato"]}, ())
+        assert (total, ids) == (3, ["2", "1", "3"])
+
+    def test_facet_counts_ignore_own_filter(self):
+        """Test disjunctive facet counts for the current result set"""
+        index = self._build_index()
+        total, _, facets = index.search({"species": ["perro"]}, ("species", "brand"))
+        assert total == 2
+        assert facets["species"] == {"gato": 1, "perro": 2}
+        assert facets["brand"] == {"chunky": 1, "zoetis": 1}
+
+    def test_no_filters_returns_every_product_paginated(self):
+        """Test pagination by name over the whole catalog"""
+        index = self._build_index()
+        total, ids, _ = index.search({}, (), skip=1, limit=2)
+        assert (total, ids) == (4, ["2", "1"])
+
+    def test_update_and_remove_reuse_slots(self):
+        """Test incremental updates keep bitmaps consistent"""
+        index = self._build_index()
+        index.upsert("2", "Chunky gato", {"species": "gato", "brand": "otra"})
+        index.remove("1")
+        assert index.search({"brand": ["chunky"]}, ())[0] == 0
+        index.upsert("5", "Agility gold", {"brand": "chunky"})
+        assert index.search({"brand": ["chunky"]}, ())[1] == ["5"]
+        assert len(index) == 4
+
+
+def test_facet_index_reloads_after_writes_in_other_workers(db_products):
+    """Test that attributes written by another worker reach the bitmaps"""
+    from sqlalchemy.orm import Session
+
+    from database import engine
+    from models_db import ProductAttribute
+    from services.catalog_cache import PRODUCT_ATTRIBUTES_TAG, tag_versions
+    from services import facet_service
+    from services.facet_service import facet_search_service
+
+    product = db_products["products"][0]
+    brand = f"marca-{db_products['suffix']}"
+    facet_search_service({})  # índice cargado en este worker
+    old_index = facet_service.product_facet_index
+    old_size = len(old_index)
+    with Session(engine) as session:
+        session.add(
+            ProductAttribute(product_id=product.id, attribute="brand", value=brand)
+        )
+        session.commit()
+    try:
+        tag_versions.bump([PRODUCT_ATTRIBUTES_TAG])
+        result = facet_search_service({"brand": [brand]})
+        assert [item["id"] for item in result["products"]] == [str(product.id)]
+        # Se reconstruye en un índice nuevo; el anterior no se vacía en uso
+        assert facet_service.product_facet_index is not old_index
+        assert len(old_index) == old_size
+    finally:
+        with Session(engine) as session:
+            session.query(ProductAttribute).filter(
+                ProductAttribute.product_id == product.id
+            ).delete()
+            session.commit()
@@ -0,0 +1,35 @@
+import pytest
+
+
+class TestParseFields:
+    """Test sparse fieldset parsing"""
+
+    def test_defaults_to_all_allowed_fields(self):
+        """Test that no fields parameter returns the full whitelist"""
+        from src.utils.fields import parse_fields
+
+        assert parse_fields(None, ("id", "name", "description")) == [
+            "id",
+            "name",
+            "description",
+        ]
+
+    def test_keeps_whitelist_order_and_required(self):
+        """Test that selected fields follow whitelist order and include id"""
+        from src.utils.fields import parse_fields
+
+        assert parse_fields(" description ,name", ("id", "name", "description")) == [
+            "id",
+            "name",
+            "description",
+        ]
+
+    def test_rejects_unknown_fields(self):
+        """Test that unknown fields raise a 400 error"""
+        from fastapi import HTTPException
+
+        from src.utils.fields import parse_fields
+
+        with pytest.raises(HTTPException) as exc_info:
+            parse_fields("id,secret", ("id", "name"))
+        assert exc_info.value.status_code == 400
@@ -0,0 +1,323 @@
+import io
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+from PIL import Image
+
+
+def _png(width=800, height=600):
+    output = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 30, 30)).save(output, format="PNG")
+    return output.getvalue()
+
+
+@pytest.fixture
+def origin():
+    """Origen local que sirve una imagen y cuenta las descargas"""
+    body = _png()
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(self.path)
+            if self.path == "/internal.png":
+                self.send_response(302)
+                self.send_header("Location", "http://10.0.0.1/internal.png")
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    # El origen local es la única dirección "pública" durante la prueba
+    with patch(
+        "services.image_service._is_public_address",
+        side_effect=lambda address: address == "127.0.0.1",
+    ):
+        yield {"url": f"{base_url}/chunky.png", "base_url": base_url, "hits": hits}
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def image_product(db_products, origin):
+    """Producto de prueba cuya imagen apunta al origen local"""
+    from sqlalchemy.orm import Session
+
+    from database import engine
+    from models_db import Product
+
+    product = db_products["products"][0]
+    with Session(engine) as session:
+        session.query(Product).filter(Product.id == product.id).update(
+            {"image_url": origin["url"]}
+        )
+        session.commit()
+    return product
+
+
+class TestImageCache:
+    """Test the content-addressed disk cache"""
+
+    def test_identical_content_is_stored_once(self, tmp_path):
+        """Test that two keys with the same bytes share one object"""
+        from utils.image_cache import ContentAddressedCache
+
+        cache = ContentAddressedCache(str(tmp_path), max_bytes=1024 * 1024)
+        first = cache.put(cache.key("a"), b"imagen")
+        second = cache.put(cache.key("b"), b"imagen")
+        assert first == second
+        assert cache.get(cache.key("a")) == cache.get(cache.key("b")) == first
+        assert cache.read(first) == b"imagen"
+        assert cache.get(cache.key("c")) is None
+
+    def test_eviction_removes_least_recently_used(self, tmp_path):
+        """Test that going over the size limit evicts the oldest objects"""
+        from utils.image_cache import ContentAddressedCache
+
+        cache = ContentAddressedCache(str(tmp_path), max_bytes=250)
+        old = cache.put(cache.key("old"), b"o" * 100)
+        os.utime(cache.object_path(old), (time.time() - 60, time.time() - 60))
+        cache.put(cache.key("new"), b"n" * 100)
+        cache.put(cache.key("newest"), b"w" * 100)
+
+        assert cache.get(cache.key("old")) is None
+        assert cache.get(cache.key("new")) is not None
+        assert cache.get(cache.key("newest")) is not None
+        # La referencia se borra junto con su objeto
+        assert sorted(os.listdir(tmp_path / "refs")) == sorted(
+            [cache.key("new"), cache.key("newest")]
+        )
+
+
+class TestThumbnailEndpoint:
+    """Test the thumbnail proxy endpoint"""
+
+    def test_thumbnail_is_generated_once(self, client, tmp_path, origin, image_product):
+        """Test that the origin is fetched once and thumbnails are cached"""
+        from utils.image_cache import ContentAddressedCache
+
+        cache = ContentAddressedCache(str(tmp_path), max_bytes=1024 * 1024)
+        with patch("services.image_service.image_cache", cache):
+            response = client.get(f"/images/products/{image_product.id}/sm")
+            assert response.status_code == 200
+            assert response.headers["content-type"] == "image/webp"
+            with Image.open(io.BytesIO(response.content)) as thumbnail:
+                assert max(thumbnail.size) == 160
+
+            again = client.get(f"/images/products/{image_product.id}/sm")
+            larger = client.get(f"/images/products/{image_product.id}/lg")
+
+        assert again.content == response.content
+        assert larger.status_code == 200
+        assert len(origin["hits"]) == 1
+
+    def test_cache_headers_and_range(self, client, tmp_path, origin, image_product):
+        """Test immutable caching, conditional GET and Range requests"""
+        from services.image_service import image_version
+        from utils.image_cache import ContentAddressedCache
+
+        cache = ContentAddressedCache(str(tmp_path), max_bytes=1024 * 1024)
+        url = f"/images/products/{image_product.id}/md"
+        with patch("services.image_service.image_cache", cache):
+            unversioned = client.get(url)
+            versioned = client.get(url, params={"v": image_version(origin["url"])})
+            not_modified = client.get(
+                url, headers={"If-None-Match": versioned.headers["etag"]}
+            )
+            partial = client.get(url, headers={"Range": "bytes=0-9"})
+
+        assert "immutable" not in unversioned.headers["cache-control"]
+        assert "immutable" in versioned.headers["cache-control"]
+        assert not_modified.status_code == 304
+        assert partial.status_code == 206
+        assert partial.headers["content-range"] == (
+            f"bytes 0-9/{len(versioned.content)}"
+        )
+        assert partial.content == versioned.content[:10]
+
+    def test_origin_must_be_public(self, origin):
+        """Test that internal hosts are not fetched, even through a redirect"""
+        from fastapi import HTTPException
+
+        from services.image_service import _fetch_source
+
+        for url in (
+            "http://10.0.0.1/chunky.png",
+            "file:///etc/passwd",
+            f"{origin['base_url']}/internal.png",
+        ):
+            with pytest.raises(HTTPException) as error:
+                _fetch_source(url)
+            assert error.value.status_code == 404
+        assert origin["hits"] == ["/internal.png"]
+
+    def test_fetch_connects_to_the_validated_address(self, origin):
+        """Test that a DNS answer changing after validation is not used"""
+        import socket
+
+        from services.image_service import _fetch_source
+
+        port = origin["base_url"].rsplit(":", 1)[1]
+        answers = iter(["127.0.0.1", "127.0.0.2"])
+        resolve = socket.getaddrinfo
+
+        def rebinding_getaddrinfo(host, *args, **kwargs):
+            if host != "rebind.test":
+                return resolve(host, *args, **kwargs)
+            address = next(answers)
+            return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", (address, 0))]
+
+        with patch("socket.getaddrinfo", side_effect=rebinding_getaddrinfo):
+            data = _fetch_source(f"http://rebind.test:{port}/chunky.png")
+        assert data == _png()
+        assert origin["hits"] == ["/chunky.png"]
+
+    def test_decompression_bomb_is_rejected(self):
+        """Test that oversized images fail with 502 instead of a server error"""
+        from fastapi import HTTPException
+
+        from services.image_service import _render_thumbnail
+
+        with patch("PIL.Image.MAX_IMAGE_PIXELS", 1000):
+            with pytest.raises(HTTPException) as error:
+                _render_thumbnail(_png(), "sm")
+        assert error.value.status_code == 502
+
+    def test_missing_image(self, client, db_products):
+        """Test that products without image_url return 404"""
+        product = db_products["products"][1]
+        response = client.get(f"/images/products/{product.id}/sm")
+        assert response.status_code == 404
+        response = client.get(f"/images/products/{product.id}/huge")
+        assert response.status_code == 404
+
+    def test_listing_references_thumbnail(self, client, db_products):
+        """Test that product listings include the thumbnail URL"""
+        response = client.get(
+            "/products/", params={"name_prefix": "Chunky", "limit": 1000}
+        )
+        products = {
+            product["id"]: product
+            for product in response.json()
+            if product["id"] in {str(p.id) for p in db_products["products"]}
+        }
+        with_image = products[str(db_products["products"][0].id)]
+        assert with_image["thumbnail_url"].startswith(
+            f"/images/products/{with_image['id']}/sm?v="
+        )
+        assert products[str(db_products["products"][1].id)]["thumbnail_url"] is None
+
+
+
+@pytest.fixture
+def image_stores(tmp_path):
+    """Caché de miniaturas y almacenamiento de subidas en directorios temporales"""
+    from utils.image_cache import ContentAddressedCache
+
+    cache = ContentAddressedCache(str(tmp_path / "cache"), max_bytes=1024 * 1024)
+    assets = ContentAddressedCache(str(tmp_path / "assets"), max_bytes=None)
+    with patch("services.image_service.image_cache", cache), patch(
+        "services.image_service.asset_store", assets
+    ):
+        yield cache, assets
+
+
+class TestImageUpload:
+    """Test local image uploads"""
+
+    def _upload(self, data):
+        from services.image_service import store_image_service
+
+        with patch("services.image_service.UPLOAD_CHUNK_SIZE", 1024):
+            return store_image_service(io.BytesIO(data))
+
+    def test_upload_is_deduplicated(self, image_stores):
+        """Test that uploading the same image twice stores it once"""
+        cache, assets = image_stores
+        data = _png(400, 300)
+
+        first = self._upload(data)
+        second = self._upload(data)
+
+        assert first["created"] is True
+        assert second["created"] is False
+        assert first["image_url"] == second["image_url"]
+        assert first["image_url"] == f"/images/assets/{first['digest']}"
+        assert first["media_type"] == "image/png"
+        assert assets.read(first["digest"]) == data
+        # Las miniaturas se generan al subir
+        assert cache.get(cache.key(first["image_url"], "sm")) is not None
+
+    def test_upload_rejects_non_images(self, image_stores):
+        """Test that non-image uploads are rejected"""
+        from fastapi import HTTPException
+
+        with pytest.raises(HTTPException) as error:
+            self._upload(b"no es una imagen" * 100)
+        assert error.value.status_code == 415
+        _, assets = image_stores
+        assert not any(
+            name for _, _, names in os.walk(assets.root) for name in names
+        )
+
+    def test_asset_endpoint(self, client, image_stores, db_products):
+        """Test serving uploaded assets and their thumbnails"""
+        from sqlalchemy.orm import Session
+
+        from database import engine
+        from models_db import Product
+
+        upload = self._upload(_png(400, 300))
+        url = upload["image_url"]
+
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/png"
+        assert "immutable" in response.headers["cache-control"]
+        not_modified = client.get(url, headers={"If-None-Match": response.headers["etag"]})
+        assert not_modified.status_code == 304
+        assert client.get(url, headers={"Range": "bytes=0-7"}).content == (
+            b"\x89PNG\r\n\x1a\n"
+        )
+        assert client.get("/images/assets/" + "0" * 64).status_code == 404
+
+        product = db_products["products"][1]
+        with Session(engine) as session:
+            session.query(Product).filter(Product.id == product.id).update(
+                {"image_url": url}
+            )
+            session.commit()
+        thumbnail = client.get(f"/images/products/{product.id}/md")
+        assert thumbnail.status_code == 200
+        assert thumbnail.headers["content-type"] == "image/webp"
+
+    def test_upload_endpoint_is_synchronous(self):
+        """Test the upload copy runs in the threadpool, not on the event loop"""
+        import inspect
+
+        from routers.product import upload_product_image
+
+        assert not inspect.iscoroutinefunction(upload_product_image)
+
+    def test_upload_requires_authentication(self, client, db_products):
+        """Test that uploading a product image requires authentication"""
+        product = db_products["products"][0]
+        response = client.post(
+            f"/products/{product.id}/image",
+            files={"file": ("foto.png", _png(), "image/png")},
+        )
+        assert response.status_code in (401, 403)
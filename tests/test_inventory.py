@@ -0,0 +1,716 @@
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+
+
+@pytest.fixture
+def stocked_product():
+    """Producto temporal con inventario, eliminado al final (tienda B-1 incluida)"""
+    from sqlalchemy.orm import Session
+
+    from database import engine
+    from models_db import (
+        InventoryLot,
+        InventoryStock,
+        Location,
+        Product,
+        ProductAvailability,
+        StockCheckpoint,
+        StockMovement,
+        StockReservation,
+        StockReservationItem,
+    )
+
+    product_id = uuid.uuid4()
+    with Session(engine) as session:
+        session.merge(
+            Location(code="B-1", name="Tienda B-1", kind="store", active=True)
+        )
+        session.add(
+            Product(id=product_id, name="Producto de inventario", description="Test")
+        )
+        session.commit()
+    yield product_id
+    with Session(engine) as session:
+        reservation_ids = (
+            session.query(StockReservationItem.reservation_id)
+            .filter(StockReservationItem.product_id == product_id)
+            .subquery()
+        )
+        session.query(StockReservation).filter(
+            StockReservation.id.in_(reservation_ids.select())
+        ).delete(synchronize_session=False)
+        for dependent in (
+            StockReservationItem,
+            InventoryStock,
+            InventoryLot,
+            StockMovement,
+            StockCheckpoint,
+            ProductAvailability,
+        ):
+            session.query(dependent).filter(dependent.product_id == product_id).delete()
+        session.query(Product).filter(Product.id == product_id).delete()
+        session.commit()
+
+
+def test_set_increment_and_decrement(stocked_product):
+    """El stock se fija, suma y descuenta; la lectura suma los slots"""
+    from schemas.inventory import StockChange, StockSet
+    from services.inventory_service import (
+        decrement_stock_service,
+        get_product_stock_service,
+        increment_stock_service,
+        set_stock_service,
+    )
+
+    assert set_stock_service(stocked_product, StockSet(quantity=10))["quantity"] == 10
+    assert (
+        increment_stock_service(stocked_product, StockChange(quantity=5))["quantity"]
+        == 15
+    )
+    # Más de lo que tiene cualquier slot por separado
+    assert (
+        decrement_stock_service(stocked_product, StockChange(quantity=12))["quantity"]
+        == 3
+    )
+    increment_stock_service(stocked_product, StockChange(quantity=2, location="B-1"))
+
+    stock = get_product_stock_service(stocked_product)
+    assert stock["locations"] == {"B-1": 2, "MAIN": 3}
+    assert stock["total"] == 5
+
+
+def test_decrement_insufficient_stock(stocked_product):
+    """Pedir más de lo disponible responde 409 y no descuenta nada"""
+    from schemas.inventory import StockChange, StockSet
+    from services.inventory_service import (
+        decrement_stock_service,
+        get_product_stock_service,
+        set_stock_service,
+    )
+
+    set_stock_service(stocked_product, StockSet(quantity=3))
+    with pytest.raises(HTTPException) as error:
+        decrement_stock_service(stocked_product, StockChange(quantity=4))
+    assert error.value.status_code == 409
+    assert error.value.detail["available"] == 3
+    assert get_product_stock_service(stocked_product)["total"] == 3
+
+
+def test_batch_decrement_is_all_or_nothing(stocked_product):
+    """Si un ítem del lote no alcanza, no se descuenta ninguno"""
+    from schemas.inventory import StockDecrementRequest, StockSet
+    from services.inventory_service import (
+        decrement_items_service,
+        get_product_stock_service,
+        set_stock_service,
+    )
+
+    set_stock_service(stocked_product, StockSet(quantity=5))
+    set_stock_service(stocked_product, StockSet(quantity=1, location="B-1"))
+    request = StockDecrementRequest(
+        items=[
+            {"product_id": stocked_product, "quantity": 4},
+            {"product_id": stocked_product, "quantity": 2, "location": "B-1"},
+        ]
+    )
+    with pytest.raises(HTTPException) as error:
+        decrement_items_service(request)
+    assert error.value.status_code == 409
+    assert error.value.detail["location"] == "B-1"
+    assert get_product_stock_service(stocked_product)["total"] == 6
+
+    request.items[1].quantity = 1
+    decrement_items_service(request)
+    assert get_product_stock_service(stocked_product)["locations"] == {
+        "B-1": 0,
+        "MAIN": 1,
+    }
+
+
+def test_concurrent_decrements_never_oversell(stocked_product):
+    """Ventas concurrentes del mismo producto nunca venden más de lo que hay"""
+    from schemas.inventory import StockChange, StockSet
+    from services.inventory_service import (
+        decrement_stock_service,
+        get_product_stock_service,
+        set_stock_service,
+    )
+
+    set_stock_service(stocked_product, StockSet(quantity=20))
+    sold = []
+
+    def buy():
+        for _ in range(10):
+            try:
+                decrement_stock_service(stocked_product, StockChange(quantity=1))
+                sold.append(1)
+            except HTTPException as error:
+                assert error.status_code == 409
+
+    threads = [threading.Thread(target=buy) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(sold) == 20
+    assert get_product_stock_service(stocked_product)["total"] == 0
+
+
+def test_movements_are_recorded(stocked_product):
+    """Cada operación deja su movimiento en el libro, con signo"""
+    from schemas.inventory import StockChange, StockSet, StockTransfer
+    from services.inventory_service import (
+        decrement_stock_service,
+        get_product_stock_service,
+        get_stock_movements_service,
+        increment_stock_service,
+        set_stock_service,
+        transfer_stock_service,
+    )
+
+    increment_stock_service(stocked_product, StockChange(quantity=5, reference="FAC-1"))
+    decrement_stock_service(stocked_product, StockChange(quantity=2))
+    set_stock_service(stocked_product, StockSet(quantity=10))
+    transfer_stock_service(
+        stocked_product,
+        StockTransfer(quantity=4, from_location="MAIN", to_location="B-1"),
+    )
+
+    movements = get_stock_movements_service(stocked_product)
+    assert [(m["kind"], m["location"], m["quantity"]) for m in reversed(movements)] == [
+        ("receipt", "MAIN", 5),
+        ("sale", "MAIN", -2),
+        ("adjustment", "MAIN", 7),
+        ("transfer_out", "MAIN", -4),
+        ("transfer_in", "B-1", 4),
+    ]
+    assert movements[-1]["reference"] == "FAC-1"
+    assert get_product_stock_service(stocked_product)["locations"] == {
+        "B-1": 4,
+        "MAIN": 6,
+    }
+    # El saldo reconstruido desde el libro coincide con el actual
+    latest = movements[0]["created_at"]
+    stock = get_product_stock_service(stocked_product, as_of=latest)
+    assert stock["locations"] == {"B-1": 4, "MAIN": 6}
+
+
+def test_products_with_movements_cannot_be_deleted(stocked_product):
+    """Eliminar un producto con movimientos responde 409 y conserva el libro"""
+    from schemas.inventory import StockChange
+    from schemas.product import ProductBulkDeleteRequest
+    from services.inventory_service import (
+        get_stock_movements_service,
+        increment_stock_service,
+    )
+    from services.product_bulk_service import bulk_delete_products_service
+    from services.product_service import delete_product_service
+
+    increment_stock_service(stocked_product, StockChange(quantity=3))
+    for attempt in (
+        lambda: delete_product_service(stocked_product),
+        lambda: bulk_delete_products_service(
+            ProductBulkDeleteRequest(ids=[stocked_product])
+        ),
+    ):
+        with pytest.raises(HTTPException) as error:
+            attempt()
+        assert error.value.status_code == 409
+        assert error.value.detail["product_ids"] == [str(stocked_product)]
+    assert len(get_stock_movements_service(stocked_product)) == 1
+
+
+def test_stock_as_of_uses_checkpoint(stocked_product):
+    """El saldo histórico parte del checkpoint anterior y suma lo posterior"""
+    from sqlalchemy.orm import Session
+
+    from database import engine
+    from models_db import StockCheckpoint, StockMovement
+    from services.stock_ledger import create_checkpoint, stock_as_of, utc_now
+
+    now = utc_now()
+
+    def add_movement(quantity, age):
+        with Session(engine) as session:
+            session.add(
+                StockMovement(
+                    id=uuid.uuid4(),
+                    product_id=stocked_product,
+                    location="MAIN",
+                    kind="adjustment",
+                    quantity=quantity,
+                    created_at=now - age,
+                )
+            )
+            session.commit()
+
+    add_movement(10, timedelta(hours=3))
+    add_movement(-3, timedelta(hours=2))
+    assert create_checkpoint(stocked_product, "MAIN") == 7
+    assert create_checkpoint(stocked_product, "MAIN") is None
+    add_movement(5, timedelta(seconds=1))
+
+    with Session(engine) as session:
+        def balance(age):
+            return stock_as_of(session, stocked_product, "MAIN", now - age)
+
+        assert balance(timedelta(0)) == 12
+        assert balance(timedelta(minutes=150)) == 10
+        assert balance(timedelta(hours=4)) == 0
+
+        # Los movimientos anteriores al checkpoint ya no se recorren
+        session.query(StockCheckpoint).filter(
+            StockCheckpoint.product_id == stocked_product
+        ).update({"balance": 100})
+        session.commit()
+        assert balance(timedelta(0)) == 105
+
+
+def test_late_movement_cannot_predate_checkpoint(stocked_product):
+    """Un movimiento que confirma después de un checkpoint que cubre su
+    created_at se rechaza, así el saldo histórico sigue cuadrando con el libro"""
+    from unittest.mock import patch
+
+    from sqlalchemy import func
+    from sqlalchemy.orm import Session
+
+    from database import engine
+    from models_db import StockMovement
+    from schemas.inventory import MovementKind
+    from services import stock_ledger
+
+    with Session(engine) as session:
+        stock_ledger.record_movement(
+            session, stocked_product, "MAIN", MovementKind.RECEIPT, 4
+        )
+        session.commit()
+
+    with Session(engine) as session:
+        stock_ledger.record_movement(
+            session, stocked_product, "MAIN", MovementKind.RECEIPT, 6
+        )
+        # La transacción se demora: entre tanto otro worker guarda un
+        # checkpoint cuyo as_of ya cubre el movimiento pendiente
+        later = stock_ledger.utc_now() + stock_ledger.CHECKPOINT_DELAY * 2
+        with patch.object(stock_ledger, "utc_now", return_value=later):
+            assert stock_ledger.create_checkpoint(stocked_product, "MAIN") == 4
+            with pytest.raises(HTTPException) as exc_info:
+                session.commit()
+        assert exc_info.value.status_code == 503
+
+    with Session(engine) as session:
+        total = session.query(func.sum(StockMovement.quantity)).filter(
+            StockMovement.product_id == stocked_product
+        ).scalar()
+        balance = stock_ledger.stock_as_of(session, stocked_product, "MAIN", later)
+        assert balance == total == 4
+
+
+def test_availability_aggregate(stocked_product):
+    """La disponibilidad agregada sigue al stock, con filtro por tipo de ubicación"""
+    from schemas.inventory import AvailabilityRequest, StockChange, StockTransfer
+    from services.availability_service import get_availability_service
+    from services.inventory_service import (
+        decrement_stock_service,
+        increment_stock_service,
+        transfer_stock_service,
+    )
+
+    unknown = uuid.uuid4()
+    increment_stock_service(stocked_product, StockChange(quantity=8))
+    transfer_stock_service(
+        stocked_product,
+        StockTransfer(quantity=3, from_location="MAIN", to_location="B-1"),
+    )
+    decrement_stock_service(stocked_product, StockChange(quantity=5))
+
+    request = AvailabilityRequest(product_ids=[unknown, stocked_product])
+    assert get_availability_service(request)["items"] == [
+        {"product_id": str(unknown), "total": 0, "locations": {}},
+        {"product_id": str(stocked_product), "total": 3, "locations": {"B-1": 3}},
+    ]
+    warehouses = AvailabilityRequest(
+        product_ids=[stocked_product], location_kind="warehouse"
+    )
+    assert get_availability_service(warehouses)["items"][0]["total"] == 0
+
+
+def test_stock_requires_active_location(stocked_product):
+    """No se recibe mercancía en ubicaciones inexistentes o desactivadas"""
+    from schemas.inventory import LocationCreate, LocationUpdate, StockChange
+    from services.inventory_service import increment_stock_service
+    from services.location_service import (
+        create_location_service,
+        update_location_service,
+    )
+
+    with pytest.raises(HTTPException) as error:
+        increment_stock_service(
+            stocked_product, StockChange(quantity=1, location="NOPE")
+        )
+    assert error.value.status_code == 404
+
+    code = f"T-{uuid.uuid4().hex[:8]}"
+    created = create_location_service(LocationCreate(code=code, name="Temporal"))
+    assert created["kind"] == "warehouse"
+    with pytest.raises(HTTPException) as error:
+        create_location_service(LocationCreate(code=code, name="Repetida"))
+    assert error.value.status_code == 409
+
+    try:
+        update_location_service(code, LocationUpdate(active=False))
+        with pytest.raises(HTTPException) as error:
+            increment_stock_service(
+                stocked_product, StockChange(quantity=1, location=code)
+            )
+        assert error.value.status_code == 409
+    finally:
+        from sqlalchemy.orm import Session
+
+        from database import engine
+        from models_db import Location
+
+        with Session(engine) as session:
+            session.query(Location).filter(Location.code == code).delete()
+            session.commit()
+
+
+def test_reservation_holds_and_confirms_stock(stocked_product):
+    """Una reserva aparta unidades; al confirmarla se registran como venta"""
+    from schemas.inventory import ReservationCreate, StockSet
+    from services.inventory_service import (
+        get_product_stock_service,
+        get_stock_movements_service,
+        set_stock_service,
+    )
+    from services.reservation_service import (
+        confirm_reservation_service,
+        reserve_stock_service,
+    )
+
+    set_stock_service(stocked_product, StockSet(quantity=10))
+    reservation = reserve_stock_service(
+        ReservationCreate(
+            items=[{"product_id": stocked_product, "quantity": 4}], reference="CART-1"
+        )
+    )
+    assert reservation["status"] == "active"
+    stock = get_product_stock_service(stocked_product)
+    assert (stock["total"], stock["reserved"], stock["on_hand"]) == (6, {"MAIN": 4}, 10)
+
+    with pytest.raises(HTTPException) as error:
+        reserve_stock_service(
+            ReservationCreate(items=[{"product_id": stocked_product, "quantity": 7}])
+        )
+    assert error.value.status_code == 409
+
+    confirmed = confirm_reservation_service(uuid.UUID(reservation["id"]))
+    assert confirmed["status"] == "confirmed"
+    stock = get_product_stock_service(stocked_product)
+    assert (stock["total"], stock["reserved"], stock["on_hand"]) == (6, {}, 6)
+    sale = get_stock_movements_service(stocked_product)[0]
+    assert (sale["kind"], sale["quantity"], sale["reference"]) == ("sale", -4, "CART-1")
+
+    with pytest.raises(HTTPException) as error:
+        confirm_reservation_service(uuid.UUID(reservation["id"]))
+    assert error.value.status_code == 409
+
+
+def test_stock_count_keeps_reserved_units(stocked_product):
+    """Un conteo físico incluye lo reservado: no lo duplica ni lo pierde"""
+    from schemas.inventory import ReservationCreate, StockSet
+    from services.inventory_service import (
+        get_product_stock_service,
+        get_stock_movements_service,
+        set_stock_service,
+    )
+    from services.reservation_service import (
+        release_reservation_service,
+        reserve_stock_service,
+    )
+
+    set_stock_service(stocked_product, StockSet(quantity=10))
+    reservation = reserve_stock_service(
+        ReservationCreate(items=[{"product_id": stocked_product, "quantity": 4}])
+    )
+    assert set_stock_service(stocked_product, StockSet(quantity=10))["quantity"] == 6
+    stock = get_product_stock_service(stocked_product)
+    assert (stock["total"], stock["on_hand"]) == (6, 10)
+    assert len(get_stock_movements_service(stocked_product)) == 1  # sin ajuste
+
+    set_stock_service(stocked_product, StockSet(quantity=9))
+    adjustment = get_stock_movements_service(stocked_product)[0]
+    assert (adjustment["kind"], adjustment["quantity"]) == ("adjustment", -1)
+    with pytest.raises(HTTPException) as error:
+        set_stock_service(stocked_product, StockSet(quantity=3))
+    assert error.value.status_code == 409
+
+    release_reservation_service(uuid.UUID(reservation["id"]))
+    stock = get_product_stock_service(stocked_product)
+    assert (stock["total"], stock["on_hand"]) == (9, 9)
+
+
+def test_reservation_release_and_expiry(stocked_product):
+    """Liberar o vencer una reserva devuelve sus unidades, una sola vez"""
+    from sqlalchemy.orm import Session
+
+    from database import engine
+    from models_db import StockReservation
+    from schemas.inventory import ReservationCreate, StockSet
+    from services.inventory_service import get_product_stock_service, set_stock_service
+    from services.reservation_service import (
+        confirm_reservation_service,
+        expire_reservation,
+        get_reservation_service,
+        release_reservation_service,
+        reserve_stock_service,
+    )
+
+    set_stock_service(stocked_product, StockSet(quantity=5))
+    request = ReservationCreate(items=[{"product_id": stocked_product, "quantity": 2}])
+    released = uuid.UUID(reserve_stock_service(request)["id"])
+    expired = uuid.UUID(reserve_stock_service(request)["id"])
+    assert get_product_stock_service(stocked_product)["total"] == 1
+
+    assert release_reservation_service(released)["status"] == "released"
+    with pytest.raises(HTTPException) as error:
+        release_reservation_service(released)
+    assert error.value.status_code == 409
+
+    # Todavía no vence
+    assert not expire_reservation(str(expired))
+    with Session(engine) as session:
+        session.query(StockReservation).filter(StockReservation.id == expired).update(
+            {"expires_at": datetime.now(timezone.utc) - timedelta(seconds=1)}
+        )
+        session.commit()
+    with pytest.raises(HTTPException) as error:
+        confirm_reservation_service(expired)
+    assert error.value.detail == "Reservation expired"
+
+    assert expire_reservation(str(expired))
+    assert not expire_reservation(str(expired))
+    assert get_reservation_service(expired)["status"] == "expired"
+    assert get_product_stock_service(stocked_product)["total"] == 5
+
+
+def test_lots_are_allocated_fefo(stocked_product):
+    """Las salidas toman primero el lote que vence antes y nunca uno vencido"""
+    from datetime import date
+
+    from schemas.inventory import StockChange
+    from services.inventory_service import (
+        decrement_stock_service,
+        get_stock_movements_service,
+        increment_stock_service,
+    )
+    from services.lot_service import get_product_lots_service
+
+    today = date.today()
+    receipts = (
+        ("L-LATE", today + timedelta(days=60), 5),
+        ("L-SOON", today + timedelta(days=10), 3),
+        ("L-OLD", today - timedelta(days=1), 1),
+    )
+    for lot_code, expiry_date, quantity in receipts:
+        increment_stock_service(
+            stocked_product,
+            StockChange(quantity=quantity, lot_code=lot_code, expiry_date=expiry_date),
+        )
+    increment_stock_service(stocked_product, StockChange(quantity=2))  # sin lote
+
+    decrement_stock_service(stocked_product, StockChange(quantity=4))
+    sales = get_stock_movements_service(stocked_product)[:2]
+    assert sorted((m["lot_code"], m["quantity"]) for m in sales) == [
+        ("L-LATE", -1),
+        ("L-SOON", -3),
+    ]
+    lots = get_product_lots_service(stocked_product)
+    assert [(lot["lot_code"], lot["quantity"]) for lot in lots] == [
+        ("L-OLD", 1),
+        ("L-LATE", 4),
+    ]
+
+    with pytest.raises(HTTPException) as error:  # el lote no alcanza
+        decrement_stock_service(
+            stocked_product, StockChange(quantity=2, lot_code="L-OLD")
+        )
+    assert error.value.status_code == 409
+    with pytest.raises(HTTPException) as error:  # otro vencimiento
+        increment_stock_service(
+            stocked_product,
+            StockChange(quantity=1, lot_code="L-LATE", expiry_date=today),
+        )
+    assert error.value.status_code == 409
+    with pytest.raises(HTTPException) as error:  # lote nuevo sin vencimiento
+        increment_stock_service(
+            stocked_product, StockChange(quantity=1, lot_code="L-NEW")
+        )
+    assert error.value.status_code == 400
+
+    # Los lotes sin vencer no cubren 6: el resto sale del stock sin lote
+    stock = decrement_stock_service(stocked_product, StockChange(quantity=6))
+    assert stock["quantity"] == 1
+    assert [lot["lot_code"] for lot in get_product_lots_service(stocked_product)] == [
+        "L-OLD"
+    ]
+    decrement_stock_service(stocked_product, StockChange(quantity=1, lot_code="L-OLD"))
+    assert get_product_lots_service(stocked_product) == []
+
+
+def test_expired_lots_are_not_sellable(stocked_product):
+    """Las unidades de un lote vencido no se venden ni se reservan"""
+    from datetime import date
+
+    from schemas.inventory import ReservationCreate, StockChange
+    from services.inventory_service import (
+        decrement_stock_service,
+        get_product_stock_service,
+        increment_stock_service,
+    )
+    from services.lot_service import get_product_lots_service
+    from services.reservation_service import reserve_stock_service
+
+    yesterday = date.today() - timedelta(days=1)
+    increment_stock_service(
+        stocked_product,
+        StockChange(quantity=5, lot_code="L-EXP", expiry_date=yesterday),
+    )
+    increment_stock_service(stocked_product, StockChange(quantity=2))  # sin lote
+
+    for attempt in (
+        lambda: decrement_stock_service(stocked_product, StockChange(quantity=3)),
+        lambda: reserve_stock_service(
+            ReservationCreate(items=[{"product_id": stocked_product, "quantity": 3}])
+        ),
+    ):
+        with pytest.raises(HTTPException) as error:
+            attempt()
+        assert error.value.status_code == 409
+    assert get_product_stock_service(stocked_product)["total"] == 7
+
+    decrement_stock_service(stocked_product, StockChange(quantity=2))
+    with pytest.raises(HTTPException) as error:
+        decrement_stock_service(stocked_product, StockChange(quantity=1))
+    assert error.value.status_code == 409
+
+    # Baja explícita del lote vencido: stock y lotes quedan en cero juntos
+    decrement_stock_service(
+        stocked_product, StockChange(quantity=5, lot_code="L-EXP")
+    )
+    assert get_product_stock_service(stocked_product)["total"] == 0
+    assert get_product_lots_service(stocked_product) == []
+
+
+def test_transfer_moves_lots_and_expiring_report(stocked_product):
+    """Los lotes viajan con el traslado; el reporte lista los próximos a vencer"""
+    from datetime import date
+
+    from schemas.inventory import StockChange, StockTransfer
+    from services.inventory_service import (
+        increment_stock_service,
+        transfer_stock_service,
+    )
+    from services.lot_service import get_expiring_lots_service, get_product_lots_service
+
+    today = date.today()
+    receipts = (
+        ("L-1", today + timedelta(days=5), 3),
+        ("L-2", today + timedelta(days=40), 2),
+        ("L-0", today - timedelta(days=2), 1),
+    )
+    for lot_code, expiry_date, quantity in receipts:
+        increment_stock_service(
+            stocked_product,
+            StockChange(quantity=quantity, lot_code=lot_code, expiry_date=expiry_date),
+        )
+    transfer_stock_service(
+        stocked_product,
+        StockTransfer(quantity=4, from_location="MAIN", to_location="B-1"),
+    )
+    moved = get_product_lots_service(stocked_product, "B-1")
+    assert [(lot["lot_code"], lot["quantity"]) for lot in moved] == [
+        ("L-1", 3),
+        ("L-2", 1),
+    ]
+
+    def report(**kwargs):
+        return [
+            (lot["location"], lot["lot_code"], lot["days_left"])
+            for lot in get_expiring_lots_service(limit=1000, **kwargs)
+            if lot["product_id"] == str(stocked_product)
+        ]
+
+    assert report(days=7) == [("B-1", "L-1", 5)]
+    assert report(days=60, location="MAIN") == [("MAIN", "L-2", 40)]
+    assert report(days=7, include_expired=True) == [
+        ("MAIN", "L-0", -2),
+        ("B-1", "L-1", 5),
+    ]
+
+
+def test_expiry_scheduler_order_and_cancel():
+    """El heap entrega las claves vencidas en orden y respeta cancelaciones"""
+    from utils.expiry_scheduler import ExpiryScheduler
+
+    expired = []
+    scheduler = ExpiryScheduler(expired.append)
+    now = datetime.now(timezone.utc)
+    scheduler.schedule("b", now + timedelta(seconds=2))
+    scheduler.schedule("a", now + timedelta(seconds=1))
+    scheduler.schedule("c", now + timedelta(seconds=3))
+    scheduler.schedule("d", now + timedelta(seconds=1))
+    scheduler.cancel("d")
+    # Reprogramar solo cuenta el último vencimiento
+    scheduler.schedule("c", now + timedelta(hours=1))
+
+    assert scheduler.run_due(now) == 0
+    assert scheduler.run_due(now + timedelta(seconds=5)) == 2
+    assert expired == ["a", "b"]
+    assert len(scheduler) == 1
+
+
+def test_expiry_scheduler_thread():
+    """El thread despierta al vencer la clave más próxima"""
+    from utils.expiry_scheduler import ExpiryScheduler
+
+    done = threading.Event()
+    expired = []
+
+    def on_expire(key):
+        expired.append(key)
+        done.set()
+
+    scheduler = ExpiryScheduler(
+        on_expire, refill=lambda horizon: [], refill_interval=60
+    )
+    scheduler.start()
+    try:
+        scheduler.schedule("late", datetime.now(timezone.utc) + timedelta(hours=1))
+        scheduler.schedule(
+            "soon", datetime.now(timezone.utc) + timedelta(milliseconds=50)
+        )
+        assert done.wait(5)
+        assert expired == ["soon"]
+    finally:
+        scheduler.stop()
+
+
+def test_inventory_requires_auth(client):
+    """Los endpoints de inventario requieren autenticación"""
+    product_id = uuid.uuid4()
+    assert client.get("/inventory/").status_code in [401, 403]
+    assert client.get(f"/inventory/{product_id}").status_code in [401, 403]
+    response = client.post(
+        f"/inventory/{product_id}/decrement", json={"quantity": 1}
+    )
+    assert response.status_code in [401, 403]
+    response = client.post(
+        "/inventory/availability", json={"product_ids": [str(product_id)]}
+    )
+    assert response.status_code in [401, 403]
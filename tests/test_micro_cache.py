@@ -0,0 +1,105 @@
+import asyncio
+
+
+class TestMicroCacheMiddleware:
+    """Test the ASGI micro-cache and single-flight coalescing"""
+
+    def _app(self, ttl=5.0, version=lambda: 1):
+        from starlette.applications import Starlette
+        from starlette.responses import JSONResponse
+        from starlette.routing import Route
+
+        from src.utils.micro_cache import MicroCacheMiddleware
+
+        calls = []
+
+        async def products(request):
+            calls.append(request.headers.get("authorization"))
+            await asyncio.sleep(0.05)
+            return JSONResponse(
+                {"call": len(calls)}, headers={"ETag": f'W/"{len(calls)}"'}
+            )
+
+        async def private(request):
+            calls.append("private")
+            return JSONResponse({}, headers={"Cache-Control": "private"})
+
+        app = Starlette(
+            routes=[Route("/products/", products), Route("/products/me", private)]
+        )
+        app.add_middleware(
+            MicroCacheMiddleware,
+            paths=[r"/products/.*"],
+            ttl=ttl,
+            version_key=version,
+        )
+        return app, calls
+
+    def _get_many(self, app, requests):
+        import httpx
+
+        async def run():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as client:
+                return await asyncio.gather(
+                    *(client.get(path, headers=headers) for path, headers in requests)
+                )
+
+        return asyncio.run(run())
+
+    def test_concurrent_misses_share_one_computation(self):
+        """Test single-flight: 20 concurrent requests, one endpoint call"""
+        app, calls = self._app()
+        requests = [
+            ("/products/", {"Authorization": f"Bearer {i}"} if i % 2 else {})
+            for i in range(20)
+        ]
+        responses = self._get_many(app, requests)
+        assert len(calls) == 1
+        assert {response.json()["call"] for response in responses} == {1}
+
+    def test_cached_response_honours_if_none_match(self):
+        """Test 304 from the micro-cache when the ETag matches"""
+        app, calls = self._app()
+        first, second = self._get_many(
+            app,
+            [("/products/", {}), ("/products/", {"If-None-Match": 'W/"1"'})],
+        )
+        assert first.status_code == 200
+        assert second.status_code == 304
+        assert len(calls) == 1
+
+    def test_version_change_and_private_responses_bypass_cache(self):
+        """Test that a new catalog version misses and private data is not stored"""
+        version = [1]
+        app, calls = self._app(version=lambda: version[0])
+        self._get_many(app, [("/products/", {})])
+        version[0] = 2
+        self._get_many(app, [("/products/", {})])
+        assert len(calls) == 2
+
+        self._get_many(app, [("/products/me", {})])
+        self._get_many(app, [("/products/me", {})])
+        assert calls.count("private") == 2
+
+    def test_outer_middleware_edits_do_not_leak_into_cache(self):
+        """Test that each hit sends its own headers list to the outer layers"""
+        app, calls = self._app()
+
+        def tagging(inner):
+            async def middleware(scope, receive, send):
+                async def tag(message):
+                    if message["type"] == "http.response.start":
+                        message["headers"].append((b"x-seen", b"1"))
+                    await send(message)
+
+                await inner(scope, receive, tag)
+
+            return middleware
+
+        outer = tagging(app)
+        responses = [self._get_many(outer, [("/products/", {})])[0] for _ in range(3)]
+        assert len(calls) == 1
+        assert [r.headers.get_list("x-seen") for r in responses] == [["1"]] * 3
@@ -0,0 +1,128 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+
+class TestMinHashLSH:
+    """Test MinHash signatures and LSH candidate lookup"""
+
+    def _index(self):
+        from utils.minhash import MinHashLSH
+
+        index = MinHashLSH()
+        index.add_many(
+            [
+                ("1", "Chunky perro adulto 2kg alimento"),
+                ("2", "CHUNKY perro adulto 2 kg alimento"),
+                ("3", "Simparica TRIO antiparasitario"),
+                ("4", "asdsadsa"),
+                ("5", "ASDSADSA"),
+            ]
+        )
+        return index
+
+    def test_similar_texts_have_similar_signatures(self):
+        """Test that the signature agreement tracks text similarity"""
+        from utils.minhash import MinHashLSH
+
+        index = MinHashLSH()
+        same = index.signatures(["Chunky Perro", "chunky perro", "Simparica"])
+        assert (same[0] == same[1]).all()
+        assert (same[0] == same[2]).mean() < 0.3
+
+    def test_query_finds_near_duplicates(self):
+        """Test that a query returns near duplicates sorted by similarity"""
+        index = self._index()
+        matches = index.query("Chunky perro adulto alimento 2kg")
+        assert [doc_id for doc_id, _ in matches] == ["1", "2"]
+        assert matches[0][1] >= matches[1][1] >= 0.5
+        assert index.query("Chunky perro adulto alimento 2kg", exclude="1")[0][0] == "2"
+        assert index.query("Collar para gato") == []
+
+    def test_clusters(self):
+        """Test that near duplicates are grouped together"""
+        index = self._index()
+        clusters = [{doc_id for doc_id, _ in group} for group in index.clusters()]
+        assert {"1", "2"} in clusters
+        assert {"4", "5"} in clusters
+        assert all("3" not in group for group in clusters)
+
+    def test_remove_and_replace(self):
+        """Test that removed or replaced documents stop matching"""
+        index = self._index()
+        index.remove("1")
+        assert [doc_id for doc_id, _ in index.query("Chunky perro adulto 2kg")] == ["2"]
+        index.add("2", "Collar antipulgas")
+        assert index.query("Chunky perro adulto 2kg") == []
+        assert len(index) == 4
+
+    def test_edits_reuse_freed_rows(self):
+        """Test that replacing documents does not grow the signature array"""
+        index = self._index()
+        for round_number in range(50):
+            index.add_many(
+                [("1", f"Chunky perro adulto {round_number}kg"), ("3", "Simparica")]
+            )
+        index.remove("4")
+        index.add("6", "Collar antipulgas para gato")
+        assert len(index._doc_ids) == 5
+        assert index.query("Collar antipulgas para gato")[0][0] == "6"
+        assert [doc_id for doc_id, _ in index.query("asdsadsa")] == ["5"]
+        assert index.query("Chunky perro adulto 49kg")[0] == ("1", 1.0)
+
+
+class TestDuplicateService:
+    """Test the duplicate detection service"""
+
+    def test_check_new_product(self, db_products):
+        """Test that a new product is matched against the catalog"""
+        from schemas.product import ProductDuplicateCheck
+        from services.duplicate_service import check_duplicates_service
+
+        product = db_products["products"][0]
+        result = check_duplicates_service(
+            ProductDuplicateCheck(name=product.name.upper(), description=product.description)
+        )
+        assert result["duplicates"][0]["id"] == str(product.id)
+        assert result["duplicates"][0]["similarity"] == 1.0
+
+        excluded = check_duplicates_service(
+            ProductDuplicateCheck(
+                name=product.name, description=product.description, exclude_id=product.id
+            )
+        )
+        assert str(product.id) not in {item["id"] for item in excluded["duplicates"]}
+
+    def test_signatures_reload_after_writes_in_other_workers(self, db_products):
+        """Test that a product renamed by another worker is matched by its new text"""
+        from sqlalchemy.orm import Session
+
+        from database import engine
+        from models_db import Product
+        from schemas.product import ProductDuplicateCheck
+        from services.catalog_cache import PRODUCT_INDEXES_TAG, tag_versions
+        from services import duplicate_service
+        from services.duplicate_service import check_duplicates_service
+
+        product = db_products["products"][2]
+        new_name = f"Collar reflectivo ajustable {db_products['suffix']}"
+        check = ProductDuplicateCheck(name=new_name, description=product.description)
+        check_duplicates_service(check)  # firmas calculadas en este worker
+        old_index, old_names = duplicate_service._ensure_index_loaded()
+        old_size = len(old_names)
+        with Session(engine) as session:
+            session.get(Product, product.id).name = new_name
+            session.commit()
+        tag_versions.bump([PRODUCT_INDEXES_TAG])
+
+        result = check_duplicates_service(check)
+        assert result["duplicates"][0]["id"] == str(product.id)
+        assert result["duplicates"][0]["name"] == new_name
+        # Se recalcula en un índice nuevo; el par anterior no se vacía en uso
+        assert duplicate_service._ensure_index_loaded()[0] is not old_index
+        assert len(old_names) == old_size
+        assert old_names[str(product.id)] == product.name
+
+    def test_clusters_endpoint_requires_authentication(self, client):
+        """Test that the duplicate report requires authentication"""
+        assert client.get("/products/duplicates").status_code in (401, 403)
@@ -0,0 +1,78 @@
+import pytest
+
+
+class TestProductBulkOperations:
+    """Test set-based bulk update and delete"""
+
+    def test_bulk_update_by_filter(self, db_products):
+        """Test a single UPDATE re-categorizes every matching product"""
+        import uuid
+
+        from sqlalchemy.orm import Session
+
+        from database import engine
+        from models_db import Product
+        from schemas.product import ProductBulkUpdateRequest
+        from services.product_bulk_service import bulk_update_products_service
+
+        new_category = uuid.uuid4()
+        request = ProductBulkUpdateRequest(
+            filters={"category_id": [db_products["category_id"]]},
+            patch={"category_id": new_category},
+        )
+        assert bulk_update_products_service(request)["updated"] == 2
+
+        with Session(engine) as session:
+            count = (
+                session.query(Product)
+                .filter(Product.category_id == new_category)
+                .count()
+            )
+        assert count == 2
+
+    def test_bulk_delete_by_ids(self, db_products):
+        """Test a single DELETE removes the selected products"""
+        from schemas.product import ProductBulkDeleteRequest
+        from services.product_bulk_service import bulk_delete_products_service
+
+        ids = [product.id for product in db_products["products"][:2]]
+        request = ProductBulkDeleteRequest(ids=ids)
+        assert bulk_delete_products_service(request)["deleted"] == 2
+
+    def test_bulk_selection_is_required(self):
+        """Test that an empty selection is rejected"""
+        from fastapi import HTTPException
+
+        from schemas.product import ProductBulkDeleteRequest
+        from services.product_bulk_service import bulk_delete_products_service
+
+        with pytest.raises(HTTPException) as exc_info:
+            bulk_delete_products_service(ProductBulkDeleteRequest(filters={}))
+        assert exc_info.value.status_code == 400
+
+    def test_bulk_endpoints_require_auth(self, client):
+        """Test that bulk endpoints require authorization"""
+        assert client.patch("/products/bulk", json={}).status_code == 401
+        assert client.post("/products/bulk-delete", json={}).status_code == 401
+
+    def test_bulk_update_rejects_null_description(self, db_products):
+        """Test a null description is a validation error, not a server error"""
+        from fastapi import HTTPException
+        from pydantic import ValidationError
+
+        from schemas.product import ProductBulkPatch, ProductBulkUpdateRequest
+        from services.product_bulk_service import bulk_update_products_service
+
+        ids = [product.id for product in db_products["products"]]
+        with pytest.raises(ValidationError):
+            ProductBulkUpdateRequest(ids=ids, patch={"description": None})
+
+        # Si la restricción NOT NULL salta igual, la respuesta es 409
+        request = ProductBulkUpdateRequest.model_construct(
+            ids=ids,
+            filters=None,
+            patch=ProductBulkPatch.model_construct(description=None),
+        )
+        with pytest.raises(HTTPException) as exc_info:
+            bulk_update_products_service(request)
+        assert exc_info.value.status_code == 409
@@ -0,0 +1,44 @@
+import csv
+import io
+import json
+
+
+class TestProductExport:
+    """Test streaming catalog export"""
+
+    def test_ndjson_export_filters_by_category(self, db_products):
+        """Test NDJSON export yields one product per line"""
+        from schemas.product import ProductFileFormat
+        from services.product_bulk_service import export_products_service
+
+        chunks = export_products_service(
+            ProductFileFormat.NDJSON, category_ids=[db_products["category_id"]]
+        )
+        lines = b"".join(chunks).decode().splitlines()
+        names = sorted(json.loads(line)["name"] for line in lines)
+        assert names == sorted(product.name for product in db_products["products"][:2])
+
+    def test_csv_export_has_header(self, db_products):
+        """Test CSV export starts with a header row"""
+        from schemas.product import ProductFileFormat
+        from services.product_bulk_service import export_products_service
+
+        chunks = export_products_service(
+            ProductFileFormat.CSV, category_ids=[db_products["category_id"]]
+        )
+        rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode())))
+        assert len(rows) == 2
+        assert set(rows[0]) == {
+            "id",
+            "name",
+            "description",
+            "category_id",
+            "image_url",
+            "sku",
+            "barcode",
+        }
+
+    def test_export_endpoint_requires_auth(self, client):
+        """Test that the export endpoint requires authorization"""
+        response = client.get("/products/export")
+        assert response.status_code == 401
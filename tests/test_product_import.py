@@ -0,0 +1,153 @@
+import io
+import json
+import uuid
+
+import pytest
+
+
+@pytest.fixture
+def import_names():
+    """Nombres únicos para productos importados; se eliminan al final"""
+    from sqlalchemy.orm import Session
+
+    from database import engine
+    from models_db import Product
+
+    suffix = uuid.uuid4().hex[:8]
+    names = [f"Import A {suffix}", f"Import B {suffix}"]
+    yield names
+    with Session(engine) as session:
+        session.query(Product).filter(Product.name.in_(names)).delete(
+            synchronize_session=False
+        )
+        session.commit()
+
+
+class TestProductImport:
+    """Test streaming bulk product import"""
+
+    def test_csv_import_upserts_and_reports_errors(self, import_names):
+        """Test CSV rows are upserted by name and bad rows are reported"""
+        from sqlalchemy.orm import Session
+
+        from database import engine
+        from models_db import Product
+        from schemas.product import ProductFileFormat
+        from services.product_bulk_service import import_products_service
+
+        first, second = import_names
+        content = (
+            "name,description,image_url\n"
+            f"{first},Primera,\n"
+            f"{second},Segunda,https://example.com/b.jpg\n"
+            ",Sin nombre,\n"
+            f"{first},Actualizada,\n"
+        )
+        summary = import_products_service(
+            io.BytesIO(content.encode()), ProductFileFormat.CSV
+        )
+        assert summary["processed"] == 4
+        assert summary["upserted"] == 3
+        assert summary["failed"] == 1
+        assert summary["errors"][0]["row"] == 3
+
+        with Session(engine) as session:
+            product = session.query(Product).filter(Product.name == first).one()
+            assert product.description == "Actualizada"
+            assert product.image_url is None
+
+    def test_ndjson_import_updates_existing(self, import_names):
+        """Test NDJSON import updates a product imported earlier"""
+        from sqlalchemy.orm import Session
+
+        from database import engine
+        from models_db import Product
+        from schemas.product import ProductFileFormat
+        from services.product_bulk_service import import_products_service
+
+        name = import_names[0]
+        for description in ("Original", "Nueva"):
+            line = json.dumps({"name": name, "description": description})
+            summary = import_products_service(
+                io.BytesIO(f"{line}\nnot json\n".encode()), ProductFileFormat.NDJSON
+            )
+            assert summary["upserted"] == 1
+            assert summary["errors"][0]["row"] == 2
+
+        with Session(engine) as session:
+            products = session.query(Product).filter(Product.name == name).all()
+            assert [product.description for product in products] == ["Nueva"]
+
+    def test_code_conflicts_only_fail_their_rows(self, import_names):
+        """Test a duplicated SKU fails its own row instead of the whole batch"""
+        from sqlalchemy.orm import Session
+
+        from database import engine
+        from models_db import Product
+        from schemas.product import ProductFileFormat
+        from services.product_bulk_service import import_products_service
+
+        first, second = import_names
+        sku = f"SKU-{uuid.uuid4().hex[:8]}"
+        content = (
+            "name,description,sku\n"
+            f"{first},Primera,{sku}\n"
+            f"{second},Segunda,{sku}\n"
+        )
+        summary = import_products_service(
+            io.BytesIO(content.encode()), ProductFileFormat.CSV
+        )
+        assert summary["upserted"] == 1
+        assert summary["failed"] == 1
+        assert summary["errors"][0] == {
+            "row": 2,
+            "error": "SKU or barcode already in use",
+        }
+
+        with Session(engine) as session:
+            names = session.query(Product.name).filter(Product.sku == sku).all()
+            assert names == [(first,)]
+
+    def test_partial_import_keeps_missing_columns(self, import_names):
+        """Test a file without some columns does not clear them on update"""
+        from sqlalchemy.orm import Session
+
+        from database import engine
+        from models_db import Product
+        from schemas.product import ProductFileFormat
+        from services.product_bulk_service import import_products_service
+
+        first, second = import_names
+        category_id = uuid.uuid4()
+        sku = f"SKU-{uuid.uuid4().hex[:8]}"
+        full = json.dumps(
+            {
+                "name": first,
+                "description": "Completa",
+                "category_id": str(category_id),
+                "image_url": "https://example.com/a.jpg",
+                "sku": sku,
+                "barcode": f"BC-{sku}",
+            }
+        )
+        import_products_service(io.BytesIO(full.encode()), ProductFileFormat.NDJSON)
+
+        content = f"name,description\n{first},Parcial\n{second},Nueva\n"
+        summary = import_products_service(
+            io.BytesIO(content.encode()), ProductFileFormat.CSV
+        )
+        assert summary["upserted"] == 2
+
+        with Session(engine) as session:
+            product = session.query(Product).filter(Product.name == first).one()
+            assert product.description == "Parcial"
+            assert product.category_id == category_id
+            assert product.image_url == "https://example.com/a.jpg"
+            assert (product.sku, product.barcode) == (sku, f"BC-{sku}")
+
+    def test_import_endpoint_requires_auth(self, client):
+        """Test that the import endpoint requires authorization"""
+        response = client.post(
+            "/products/import", files={"file": ("p.csv", b"name,description\n")}
+        )
+        assert response.status_code == 401
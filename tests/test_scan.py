@@ -0,0 +1,145 @@
+import uuid
+
+import pytest
+
+
+@pytest.fixture
+def coded_products():
+    """Productos con código de barras y SKU, eliminados al final"""
+    from sqlalchemy.orm import Session
+
+    from database import engine
+    from models_db import Product
+    from services.catalog_events import notify_products_changed
+    from services.product_service import product_to_dict
+
+    suffix = uuid.uuid4().hex[:8]
+    products = [
+        Product(
+            id=uuid.uuid4(),
+            name=f"Chunky adulto 4kg {suffix}",
+            description="Alimento para perro",
+            barcode=f"770{suffix}1",
+            sku=f"CHK-{suffix}",
+        ),
+        Product(
+            id=uuid.uuid4(),
+            name=f"Simparica 20mg {suffix}",
+            description="Antiparasitario",
+            barcode=f"770{suffix}2",
+        ),
+    ]
+    with Session(engine, expire_on_commit=False) as session:
+        session.add_all(products)
+        session.commit()
+        notify_products_changed(saved=[product_to_dict(product) for product in products])
+
+    yield products
+
+    with Session(engine) as session:
+        session.query(Product).filter(
+            Product.id.in_([product.id for product in products])
+        ).delete(synchronize_session=False)
+        session.commit()
+    notify_products_changed(deleted_ids=[str(product.id) for product in products])
+
+
+class TestScan:
+    """Test barcode / SKU lookups"""
+
+    def test_scan_by_barcode_and_sku(self, client, coded_products):
+        """Test that a product is found by barcode or SKU without the database"""
+        from sqlalchemy import event
+
+        from database import engine
+        from services.scan_service import load_scan_index
+
+        load_scan_index()
+        food = coded_products[0]
+
+        statements = []
+
+        def count_statement(*args):
+            statements.append(args)
+
+        event.listen(engine, "before_cursor_execute", count_statement)
+        try:
+            by_barcode = client.get(f"/products/scan/{food.barcode}")
+            by_sku = client.get(f"/products/scan/{food.sku}")
+        finally:
+            event.remove(engine, "before_cursor_execute", count_statement)
+
+        assert by_barcode.status_code == 200
+        assert by_barcode.json()["id"] == str(food.id)
+        assert by_sku.json()["barcode"] == food.barcode
+        assert statements == []
+        assert client.get("/products/scan/0000000000000").status_code == 404
+
+    def test_batch_scan(self, client, coded_products):
+        """Test resolving several scanned codes in one request"""
+        food, medicine = coded_products
+        response = client.post(
+            "/products/scan",
+            json={"codes": [food.barcode, medicine.barcode, food.barcode, "nope"]},
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["products"][food.barcode]["id"] == str(food.id)
+        assert data["products"][medicine.barcode]["id"] == str(medicine.id)
+        assert data["missing"] == ["nope"]
+
+    def test_index_follows_writes(self, client, coded_products):
+        """Test that updates and conflicts are reflected in the index"""
+        from fastapi import HTTPException
+
+        from schemas.product import ProductUpdate
+        from services.product_service import update_product_service
+
+        food, medicine = coded_products
+        old_barcode = food.barcode
+        new_barcode = old_barcode + "9"
+        update_product_service(food.id, ProductUpdate(barcode=new_barcode))
+
+        assert client.get(f"/products/scan/{old_barcode}").status_code == 404
+        assert client.get(f"/products/scan/{new_barcode}").json()["id"] == str(food.id)
+
+        with pytest.raises(HTTPException) as error:
+            update_product_service(medicine.id, ProductUpdate(barcode=new_barcode))
+        assert error.value.status_code == 409
+        assert client.get(f"/products/scan/{new_barcode}").json()["id"] == str(food.id)
+
+    def test_index_reloads_after_writes_in_other_workers(self, client, coded_products):
+        """Test that a write seen only through the shared versions reloads the index"""
+        from sqlalchemy import event
+        from sqlalchemy.orm import Session
+
+        from database import engine
+        from models_db import Product
+        from schemas.product import ProductUpdate
+        from services.catalog_cache import PRODUCT_INDEXES_TAG, tag_versions
+        from services.product_service import update_product_service
+        from services.scan_service import load_scan_index
+
+        food, medicine = coded_products
+        load_scan_index()
+        # Escritura de este worker: se aplica al índice sin recargarlo
+        update_product_service(food.id, ProductUpdate(sku=food.sku + "-A"))
+        statements = []
+
+        def count_statement(*args):
+            statements.append(args)
+
+        event.listen(engine, "before_cursor_execute", count_statement)
+        try:
+            assert client.get(f"/products/scan/{food.sku}-A").status_code == 200
+        finally:
+            event.remove(engine, "before_cursor_execute", count_statement)
+        assert statements == []
+
+        # Escritura de otro worker: solo se ve el contador compartido
+        with Session(engine) as session:
+            session.get(Product, medicine.id).sku = f"OTHER-{medicine.barcode}"
+            session.commit()
+        tag_versions.bump([PRODUCT_INDEXES_TAG])
+        response = client.get(f"/products/scan/OTHER-{medicine.barcode}")
+        assert response.json()["id"] == str(medicine.id)
@@ -0,0 +1,74 @@
+class TestProductSearchIndex:
+    """Test the in-memory inverted index used for SQLite deployments"""
+
+    def _build_index(self):
+        from src.utils.search_index import ProductSearchIndex
+
+        index = ProductSearchIndex()
+        index.upsert("1", "Chunky perro adulto", "Alimento para perro adulto")
+        index.upsert("2", "Chunky gato", "Alimento para gato")
+        index.upsert("3", "Simparica TRIO", "Antiparasitario para perros")
+        return index
+
+    def test_tokenize_removes_accents(self):
+        """Test that tokens are lowercased and accent-free"""
+        from src.utils.search_index import tokenize
+
+        assert tokenize("Alimentación PERRO-adulto") == ["alimentacion", "perro", "adulto"]
+
+    def test_search_ranks_name_over_description(self):
+        """Test that name matches rank above description-only matches"""
+        index = self._build_index()
+        results = index.search("perr")
+        assert [doc_id for doc_id, _ in results] == ["1", "3"]
+
+    def test_search_requires_all_terms(self):
+        """Test that every query term must match"""
+        index = self._build_index()
+        assert [doc_id for doc_id, _ in index.search("chunky gat")] == ["2"]
+
+    def test_autocomplete_uses_name_prefix(self):
+        """Test type-ahead suggestions only consider product names"""
+        index = self._build_index()
+        assert index.autocomplete("chu") == [
+            ("1", "Chunky perro adulto"),
+            ("2", "Chunky gato"),
+        ]
+        assert index.autocomplete("antipar") == []
+
+    def test_remove_and_update(self):
+        """Test that updates and deletes keep the index consistent"""
+        index = self._build_index()
+        index.upsert("2", "Whiskas gato", "Alimento para gato")
+        index.remove("1")
+        assert index.autocomplete("chu") == []
+        assert [doc_id for doc_id, _ in index.search("whisk")] == ["2"]
+        assert len(index) == 2
+
+
+def test_search_index_reloads_after_writes_in_other_workers(db_products):
+    """Test that a rename seen only through the shared versions reaches the index"""
+    from sqlalchemy.orm import Session
+
+    from database import engine
+    from models_db import Product
+    from services.catalog_cache import PRODUCT_INDEXES_TAG, tag_versions
+    from services import search_service
+    from services.search_service import autocomplete_products_service
+
+    product = db_products["products"][0]
+    new_name = f"Renombrado {product.id.hex[:8]}"
+    autocomplete_products_service("Chunky")  # índice cargado en este worker
+    old_index = search_service.product_search_index
+    old_size = len(old_index)
+    with Session(engine) as session:
+        session.get(Product, product.id).name = new_name
+        session.commit()
+    tag_versions.bump([PRODUCT_INDEXES_TAG])
+
+    assert autocomplete_products_service(new_name) == [
+        {"id": str(product.id), "name": new_name}
+    ]
+    # Se reconstruye en un índice nuevo; el anterior no se vacía en uso
+    assert search_service.product_search_index is not old_index
+    assert len(old_index) == old_size
@@ -0,0 +1,115 @@
+import pytest
+from fastapi import HTTPException
+
+
+class TestTagCache:
+    """Test the tagged LRU/TTL result cache"""
+
+    def _cache(self, path=None, **kwargs):
+        from src.utils.tag_cache import SharedTagVersions, TagCache
+
+        return TagCache(SharedTagVersions(path), **kwargs)
+
+    def test_hit_and_invalidate_by_tag(self):
+        """Test that results are reused until one of their tags changes"""
+        cache = self._cache()
+        calls = []
+
+        @cache.cached(tags=lambda item_id: (f"item:{item_id}", "items"))
+        def get_item(item_id):
+            calls.append(item_id)
+            return {"id": item_id}
+
+        assert get_item(1) == get_item(1) == {"id": 1}
+        get_item(2)
+        assert calls == [1, 2]
+
+        cache.invalidate("item:1")
+        get_item(1)
+        get_item(2)
+        assert calls == [1, 2, 1]
+
+        cache.invalidate("items")
+        get_item(2)
+        assert calls == [1, 2, 1, 2]
+
+    def test_ttl_and_lru_eviction(self, monkeypatch):
+        """Test expiry by TTL and eviction of the least recently used entry"""
+        from src.utils import tag_cache
+
+        cache = self._cache(max_entries=2, ttl=10)
+        calls = []
+
+        @cache.cached(tags=lambda key: ())
+        def compute(key):
+            calls.append(key)
+            return key
+
+        compute("a"), compute("b"), compute("a"), compute("c")
+        compute("a")
+        compute("b")
+        assert calls == ["a", "b", "c", "b"]
+
+        now = tag_cache.time.monotonic()
+        monkeypatch.setattr(tag_cache.time, "monotonic", lambda: now + 11)
+        compute("a")
+        assert calls[-1] == "a"
+
+    def test_not_found_is_cached(self):
+        """Test negative caching of 404 errors"""
+        cache = self._cache()
+        calls = []
+
+        @cache.cached(tags=lambda item_id: (f"item:{item_id}",))
+        def get_item(item_id):
+            calls.append(item_id)
+            raise HTTPException(status_code=404, detail="Not found")
+
+        for _ in range(2):
+            with pytest.raises(HTTPException) as error:
+                get_item(1)
+            assert error.value.status_code == 404
+        assert calls == [1]
+
+    def test_invalidation_is_shared_between_workers(self, tmp_path):
+        """Test that two processes mapping the same file see invalidations"""
+        from src.utils.tag_cache import SharedTagVersions
+
+        path = str(tmp_path / "versions")
+        worker_a = SharedTagVersions(path)
+        worker_b = SharedTagVersions(path)
+
+        before = worker_a.snapshot(["product:1"])
+        worker_b.bump(["product:1"])
+        assert worker_a.snapshot(["product:1"]) != before
+        assert worker_a.snapshot(["product:1"]) == worker_b.snapshot(["product:1"])
+
+    def test_product_reads_skip_database_until_write(self, db_products):
+        """Test the product service is cached and invalidated by writes"""
+        from sqlalchemy import event
+
+        from database import engine
+        from schemas.product import ProductBulkUpdateRequest
+        from services.product_bulk_service import bulk_update_products_service
+        from services.product_service import get_product_by_id_service
+
+        product = db_products["products"][0]
+        statements = []
+
+        def count_statement(*args):
+            statements.append(args)
+
+        event.listen(engine, "before_cursor_execute", count_statement)
+        try:
+            get_product_by_id_service(product.id)
+            get_product_by_id_service(product.id)
+            assert len(statements) == 1
+
+            bulk_update_products_service(
+                ProductBulkUpdateRequest(ids=[product.id], patch={"description": "Otra"})
+            )
+            statements.clear()
+            assert get_product_by_id_service(product.id)["description"] == "Otra"
+            assert len(statements) == 1
+        finally:
+            event.remove(engine, "before_cursor_execute", count_statement)